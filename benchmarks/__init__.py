@@ -0,0 +1 @@
+# PSINet benchmark suite (python -m benchmarks --help)
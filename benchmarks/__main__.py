@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import datetime
+import json
+import logging
+
+from benchmarks.suite import BACKENDS, DEFAULT_LAYERS, DEFAULT_SIZES, build_cases, compare, run_benchmarks
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PSINet benchmarks: build time, run throughput, memory.")
+    parser.add_argument("--backends", type=lambda s: s.split(','), default=list(BACKENDS),
+                        help=f"Comma-separated backends (default: {','.join(BACKENDS)}).")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES),
+                        help="L1 sizes of the scaled variants (default: 100,400,1600).")
+    parser.add_argument("--layers", type=_int_list, default=list(DEFAULT_LAYERS),
+                        help="Layer counts of the scaled variants (default: 1,2,3,4).")
+    parser.add_argument("--no-configs", action="store_true", help="Skip the configs/*.yaml cases.")
+    parser.add_argument("--cycles", type=int, default=1, help="Cycles per case (default: 1).")
+    parser.add_argument("--work-dir", type=str, default="bench_outputs", help="Scratch directory.")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Results JSON (default: <work-dir>/results_<timestamp>.json).")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative change counted as a regression (default: 0.2).")
+    args = parser.parse_args()
+
+    cases = build_cases(args.backends, args.sizes, args.layers, include_configs=not args.no_configs,
+                        cycles=args.cycles)
+    output = args.output or str(Path(args.work_dir) /
+                                f"results_{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    results = run_benchmarks(cases, args.work_dir, output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for case, metric, old, new, change, worse in compare(results, baseline, args.tolerance):
+            regressions += worse
+            print(f"{'REGRESSION' if worse else 'ok':>10}  {case:<45} {metric:<13} {old:12.4g} -> {new:12.4g} "
+                  f"({change:+.1%})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
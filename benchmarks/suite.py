@@ -0,0 +1,211 @@
+import copy
+import datetime
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+CONFIG_DIR = Path(__file__).resolve().parents[1] / 'configs'
+BACKENDS = {
+    'numpy': {'brian2_device': 'runtime', 'codegen_target': 'numpy'},
+    'cython': {'brian2_device': 'runtime', 'codegen_target': 'cython'},
+    'standalone': {'brian2_device': 'cpp_standalone'},
+}
+DEFAULT_SIZES = (100, 400, 1600)
+DEFAULT_LAYERS = (1, 2, 3, 4)
+# Compared metrics: an increase of the first group / a decrease of the second is a regression
+LOWER_IS_BETTER = ('build_s', 'run_s', 'save_s', 'peak_rss_mb')
+HIGHER_IS_BETTER = ('sim_speed', 'spikes_per_s')
+
+
+def scaled_config(l1_size, num_layers):
+    """
+    Synthetic-digit config with num_layers layers; L1 has l1_size excitatory neurons
+    and every further layer half as many as the previous one.
+    """
+    layers, connections = [], {}
+    prev = None
+    for k in range(num_layers):
+        name = f"L{k+1}"
+        ne = max(int(l1_size) >> k, 4)
+        layers.append({'name': name, 'num_excitatory': ne, 'num_inhibitory': max(ne // 4, 1),
+                       'enable_lateral_inhibition': True, 'lateral_strength': 0.2})
+        key = f"inp_{name.lower()}" if prev is None else f"{prev.lower()}_{name.lower()}"
+        connections[key] = {'w_max': 0.3, 'a_plus': 0.01, 'a_minus': -0.01,
+                            'tau_plus_ms': 20.0, 'tau_minus_ms': 20.0, 'initial_weight_max': 0.1}
+        prev = name
+    return {
+        'run_id': f"scaled_l1-{l1_size}_layers-{num_layers}",
+        'simulation_params': {'duration_per_pattern_ms': 100, 'silence_period_ms': 50,
+                              'cycles': 1, 'present_all_digits': True},
+        'input_params': {'dataset': 'synthetic', 'max_rate_hz': 150},
+        'network_params': {'layers': layers},
+        'connections_params': connections,
+        'monitor_params': {'record_l1_spikes': True, 'record_weight_subset_size': 100},
+        'output_params': {'save_plots': False, 'save_raw_data': True},
+    }
+
+
+def build_cases(backends=tuple(BACKENDS), sizes=DEFAULT_SIZES, layers=DEFAULT_LAYERS,
+                include_configs=True, cycles=1):
+    """
+    Benchmark cases: every repository config and every scaled variant, per backend.
+
+    All cases run offline on the synthetic digits with `cycles` cycles.
+
+    Returns:
+        List of (case_name, config) pairs.
+    """
+    bases = []
+    if include_configs:
+        for path in sorted(CONFIG_DIR.glob('*.yaml')):
+            with open(path) as f:
+                bases.append((path.stem, yaml.safe_load(f)))
+    bases.extend((f"scaled_l1-{s}_layers-{n}", scaled_config(s, n)) for s in sizes for n in layers)
+
+    cases = []
+    for backend in backends:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {tuple(BACKENDS)}")
+        for name, base in bases:
+            cfg = copy.deepcopy(base)
+            cfg['run_id'] = f"bench_{name}_{backend}"
+            sim_p = cfg.setdefault('simulation_params', {})
+            sim_p.pop('codegen_target', None)
+            sim_p.update(BACKENDS[backend])
+            sim_p['cycles'] = int(cycles)
+            cfg.setdefault('input_params', {})['dataset'] = 'synthetic'
+            cfg.pop('resume_from', None)
+            cfg['mode'] = 'train'
+            cases.append((f"{name}/{backend}", cfg))
+    return cases
+
+
+def synapse_stats(hierarchy):
+    """Synapse count and approximate memory (bytes of per-synapse arrays) per connection."""
+    stats = {}
+    for key, syn in hierarchy.connections.items():
+        s = syn.synapses
+        n = int(syn.num_connections)
+        # Unique per-synapse arrays of this Synapses object (i/j alias the index arrays)
+        arrays = {id(var): var for var in s.variables.values()
+                  if getattr(getattr(var, 'owner', None), 'name', None) == s.name
+                  and not getattr(var, 'scalar', True) and getattr(var, 'size', None) == n}
+        nbytes = sum(n * np.dtype(var.dtype).itemsize for var in arrays.values())
+        stats[key] = {'synapses': n, 'bytes': nbytes}
+    return stats
+
+
+def run_case(name, config, work_dir):
+    """Worker: build, run and save one case in a fresh process and return its measurements."""
+    from psinet.simulation.simulator import Simulator
+
+    config = copy.deepcopy(config)
+    case_dir = Path(work_dir) / config['run_id']
+    case_dir.mkdir(parents=True, exist_ok=True)
+    config.setdefault('output_params', {})['base_output_dir'] = str(case_dir / 'outputs')
+    config['simulation_params']['codegen_cache_dir'] = str(Path(work_dir) / 'cache')
+    config_path = case_dir / 'config.yaml'
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+    result = {'case': name, 'status': 'ok'}
+    try:
+        sim = Simulator(config_path=str(config_path))
+        t0 = time.perf_counter()
+        sim.build()
+        t1 = time.perf_counter()
+        sim.run()
+        t2 = time.perf_counter()
+        sim.save_results()
+        t3 = time.perf_counter()
+        metrics = sim.summary()
+        simulated_s = metrics['simulated_ms'] / 1000.0
+        spikes = sum(v for k, v in metrics.items() if k.endswith('_spikes'))
+        result.update({
+            'build_s': t1 - t0,
+            'run_s': t2 - t1,
+            'save_s': t3 - t2,
+            'simulated_s': simulated_s,
+            'sim_speed': simulated_s / (t2 - t1),
+            'spikes': spikes,
+            'spikes_per_s': spikes / (t2 - t1),
+            'connections': synapse_stats(sim.network_objects['hierarchy']),
+        })
+    except Exception as e:
+        logging.exception(f"Benchmark case {name} failed")
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    # ru_maxrss is in kilobytes on Linux
+    result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    return result
+
+
+def run_benchmarks(cases, work_dir, output_file):
+    """
+    Run every case sequentially, each in its own spawned process (clean Brian2 state
+    and a meaningful per-case peak RSS), and write the results as JSON.
+    """
+    import brian2
+
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+        for name, cfg in cases:
+            result = pool.submit(run_case, name, cfg, str(work_dir)).result()
+            results.append(result)
+            if result['status'] == 'ok':
+                logging.info(f"{name}: build {result['build_s']:.2f} s, run {result['run_s']:.2f} s "
+                             f"({result['sim_speed']:.3f} sim s / wall s), save {result['save_s']:.2f} s, "
+                             f"peak RSS {result['peak_rss_mb']:.0f} MB")
+            else:
+                logging.warning(f"{name}: {result['error']}")
+
+    payload = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'brian2': brian2.__version__,
+            'numpy': np.__version__,
+        },
+        'results': results,
+    }
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w') as f:
+        json.dump(payload, f, indent=2)
+    logging.info(f"Benchmark results written to {output_file}")
+    return payload
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compare two benchmark payloads case by case.
+
+    Returns:
+        List of (case, metric, baseline_value, value, relative_change, regressed) for
+        every metric present in both; regressed means worse by more than `tolerance`.
+    """
+    base = {r['case']: r for r in baseline['results'] if r.get('status') == 'ok'}
+    rows = []
+    for r in results['results']:
+        b = base.get(r['case'])
+        if b is None or r.get('status') != 'ok':
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric not in r or metric not in b or not b[metric]:
+                continue
+            change = (r[metric] - b[metric]) / b[metric]
+            worse = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            rows.append((r['case'], metric, b[metric], r[metric], change, worse))
+    return rows
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from psinet.simulation.sweep import run_sweep
+import argparse
+import datetime
+import logging
+import yaml
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parallel PSINet parameter sweep.")
+    parser.add_argument("config_file", type=str, help="Base YAML configuration file.")
+    parser.add_argument("sweep_file", type=str, help="YAML sweep specification (mode, params, ...).")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel processes (default: CPU count).")
+    parser.add_argument("--output-dir", type=str, default=None,
+                        help="Sweep directory (default: <base_output_dir>/sweep_<run_id>_<timestamp>).")
+    args = parser.parse_args()
+
+    with open(args.config_file) as f:
+        base_config = yaml.safe_load(f)
+    with open(args.sweep_file) as f:
+        spec = yaml.safe_load(f)
+
+    output_dir = args.output_dir
+    if output_dir is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        base_dir = Path(base_config['output_params']['base_output_dir'])
+        output_dir = base_dir / f"sweep_{base_config.get('run_id', 'unnamed_run')}_{timestamp}"
+
+    run_sweep(base_config, spec, output_dir, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
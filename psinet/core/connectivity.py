@@ -0,0 +1,104 @@
+# Bu dosya, sinaps gruplarının bağlantı desenlerini (kim kime bağlı) üretir.
+# Desenler koşul dizgeleri yerine vektörel (i, j) indeks dizileri olarak hesaplanır,
+# böylece geniş katmanlarda bellek ve kurulum süresi bağlantı sayısıyla ölçeklenir.
+import numpy as np
+
+CONNECTIVITY_TYPES = ('all', 'random', 'fan_in', 'receptive_field')
+
+
+def all_to_all(n_pre, n_post, exclude_self=False):
+    """Her kaynak nöronu her hedef nörona bağlar."""
+    i = np.repeat(np.arange(n_pre), n_post)
+    j = np.tile(np.arange(n_post), n_pre)
+    if exclude_self:
+        keep = i != j
+        i, j = i[keep], j[keep]
+    return i, j
+
+
+def random_connectivity(n_pre, n_post, p, rng, exclude_self=False):
+    """
+    Her (i, j) çifti bağımsız olarak p olasılıkla bağlanır.
+
+    Toplam bağlantı sayısı Binom(n_pre*n_post, p)'den çekilir ve düz indeksler
+    tekrarsız örneklenir; yoğun bir maske oluşturulmaz.
+    """
+    total = n_pre * n_post
+    n_syn = rng.binomial(total, float(p))
+    flat = np.sort(rng.choice(total, size=n_syn, replace=False))
+    i, j = np.divmod(flat, n_post)
+    if exclude_self:
+        keep = i != j
+        i, j = i[keep], j[keep]
+    return i, j
+
+
+def fixed_fan_in(n_pre, n_post, k, rng, exclude_self=False):
+    """Her hedef nöron, rastgele seçilmiş tam olarak k kaynak nörondan girdi alır."""
+    n_cand = n_pre - 1 if exclude_self else n_pre
+    k = int(k)
+    if not 0 < k <= n_cand:
+        raise ValueError(f"fan_in k={k} must be between 1 and {n_cand}")
+    scores = rng.random((n_post, n_pre))
+    if exclude_self:
+        # Kendine bağlantıyı asla seçilmeyecek şekilde işaretle
+        diag = np.arange(min(n_pre, n_post))
+        scores[diag, diag] = np.inf
+    i = np.argpartition(scores, k - 1, axis=1)[:, :k].ravel()
+    j = np.repeat(np.arange(n_post), k)
+    return i, j
+
+
+def receptive_fields(n_pre, n_post, image_shape=(28, 28), patch_size=5, stride=3):
+    """
+    Yerel 2D alıcı alanlar: her hedef nöron, girdi görüntüsündeki bir patch_size x
+    patch_size yamaya bağlanır. Yamalar stride adımıyla bir ızgaraya dizilir ve
+    hedef nöronlar ızgara konumlarına sırayla (döngüsel) atanır.
+    """
+    height, width = image_shape
+    if n_pre != height * width:
+        raise ValueError(f"receptive_field connectivity needs {height*width} inputs, got {n_pre}")
+    patch_size, stride = int(patch_size), int(stride)
+    if patch_size > min(height, width) or stride < 1:
+        raise ValueError(f"Invalid receptive field: patch_size={patch_size}, stride={stride}")
+    n_y = (height - patch_size) // stride + 1
+    n_x = (width - patch_size) // stride + 1
+    pos = np.arange(n_post) % (n_y * n_x)
+    py, px = np.divmod(pos, n_x)
+    origin = (py * stride) * width + px * stride
+    offsets = (np.arange(patch_size)[:, None] * width + np.arange(patch_size)[None, :]).ravel()
+    i = (origin[:, None] + offsets[None, :]).ravel()
+    j = np.repeat(np.arange(n_post), offsets.size)
+    return i, j
+
+
+def connection_indices(spec, n_pre, n_post, exclude_self=False):
+    """
+    Bir bağlantı tanımından (i, j) indeks dizilerini üretir.
+
+    Args:
+        spec (dict | None): Bağlantı tanımı. None veya {'type': 'all'} tümden tüme demektir.
+            {'type': 'random', 'p': 0.1}
+            {'type': 'fan_in', 'k': 50}
+            {'type': 'receptive_field', 'patch_size': 5, 'stride': 3, 'image_shape': [28, 28]}
+            İsteğe bağlı 'seed' anahtarı rastgele desenleri tekrarlanabilir yapar.
+        n_pre (int): Kaynak nöron sayısı.
+        n_post (int): Hedef nöron sayısı.
+        exclude_self (bool): i == j bağlantılarını dışarıda bırak (aynı grup içi bağlantılar için).
+
+    Returns:
+        (np.ndarray, np.ndarray): Kaynak ve hedef indeksleri.
+    """
+    spec = dict(spec or {})
+    kind = spec.get('type', 'all')
+    if kind not in CONNECTIVITY_TYPES:
+        raise ValueError(f"Unknown connectivity type '{kind}', expected one of {CONNECTIVITY_TYPES}")
+    rng = np.random.default_rng(spec.get('seed'))
+    if kind == 'all':
+        return all_to_all(n_pre, n_post, exclude_self=exclude_self)
+    if kind == 'random':
+        return random_connectivity(n_pre, n_post, spec['p'], rng, exclude_self=exclude_self)
+    if kind == 'fan_in':
+        return fixed_fan_in(n_pre, n_post, spec['k'], rng, exclude_self=exclude_self)
+    return receptive_fields(n_pre, n_post, image_shape=tuple(spec.get('image_shape', (28, 28))),
+                            patch_size=spec.get('patch_size', 5), stride=spec.get('stride', 3))
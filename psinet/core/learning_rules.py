@@ -8,12 +8,12 @@ STDP_EQUATION = '''
     dapre/dt = -apre / (taupre + 1e-10*second) : 1 (clock-driven)
     dapost/dt = -apost / (taupost + 1e-10*second) : 1 (clock-driven)
     
-    # STDP parametreleri
-    taupre : second
-    taupost : second
-    wmax : 1
-    Apre : 1
-    Apost : 1
+    # STDP parametreleri (bağlantı başına tek skaler: sinaps başına bellek kullanmaz)
+    taupre : second (shared)
+    taupost : second (shared)
+    wmax : 1 (shared)
+    Apre : 1 (shared)
+    Apost : 1 (shared)
 '''
 
 # Ağırlıkların nasıl güncelleneceğini tanımlayan kurallar
@@ -26,4 +26,64 @@ STDP_ON_PRE = '''
 STDP_ON_POST = '''
     apost += Apost # Çıkış nöronunun ateşleme izini artır
     w = clip(w + apre, 0, wmax) # Ağırlığı, giriş izine göre güncelle
-'''
\ No newline at end of file
+'''
+
+# Olay güdümlü (event-driven) STDP: izler her adımda değil, yalnızca bir ateşleme
+# geldiğinde son güncellemeden bu yana geçen süreye göre analitik olarak azaltılır.
+# Adım başına maliyet O(sinaps) yerine O(ateşleme x yelpaze) olur. on_pre/on_post aynıdır.
+STDP_EQUATION_EVENT = '''
+    w : 1 # Sinaptik ağırlık
+    
+    # İzler yalnızca ateşleme anlarında güncellenir
+    dapre/dt = -apre / (taupre + 1e-10*second) : 1 (event-driven)
+    dapost/dt = -apost / (taupost + 1e-10*second) : 1 (event-driven)
+    
+    # STDP parametreleri (bağlantı başına tek skaler: sinaps başına bellek kullanmaz)
+    taupre : second (shared)
+    taupost : second (shared)
+    wmax : 1 (shared)
+    Apre : 1 (shared)
+    Apost : 1 (shared)
+'''
+
+# Nöron izli STDP: izler her sinapsta değil, nöron gruplarında saklanır
+# (bkz. neuron.STDP_TRACE_EQUATION). Her ateşlemede nöronun izi 1 artar,
+# genlikler (Apre/Apost) ağırlık güncellemesinde uygulanır.
+STDP_EQUATION_NEURON = '''
+    w : 1 # Sinaptik ağırlık
+    
+    # STDP parametreleri (zaman sabiti nöron grubundadır: tau_stdp)
+    wmax : 1 (shared)
+    Apre : 1 (shared)
+    Apost : 1 (shared)
+'''
+
+STDP_ON_PRE_NEURON = '''
+    v_post += w   # Gelen ateşleme, hedef nöronun potansiyelini artırır
+    w = clip(w + Apost * xtrace_post, 0, wmax) # Ağırlığı, çıkış nöronunun izine göre güncelle
+'''
+
+STDP_ON_POST_NEURON = '''
+    w = clip(w + Apre * xtrace_pre, 0, wmax) # Ağırlığı, giriş nöronunun izine göre güncelle
+'''
+
+# Dondurulmuş (değerlendirme) modu: iz yok, on_post yolu yok, ağırlıklar sabit.
+# Parametre değişkenleri yalnızca diğer modlarla aynı arayüzü korumak için tutulur.
+STDP_EQUATION_FROZEN = '''
+    w : 1 # Sinaptik ağırlık (öğrenme kapalı)
+    wmax : 1 (shared)
+    Apre : 1 (shared)
+    Apost : 1 (shared)
+'''
+
+STDP_ON_PRE_FROZEN = '''
+    v_post += w   # Gelen ateşleme, hedef nöronun potansiyelini artırır
+'''
+
+# Bağlantı başına seçilebilen STDP varyantları: mod -> (model, on_pre, on_post)
+STDP_MODES = {
+    'clock': (STDP_EQUATION, STDP_ON_PRE, STDP_ON_POST),
+    'event': (STDP_EQUATION_EVENT, STDP_ON_PRE, STDP_ON_POST),
+    'neuron': (STDP_EQUATION_NEURON, STDP_ON_PRE_NEURON, STDP_ON_POST_NEURON),
+    'frozen': (STDP_EQUATION_FROZEN, STDP_ON_PRE_FROZEN, None),
+}
@@ -1,7 +1,7 @@
 ## Developer: inkbytefo
 ## Modified: 2025-11-08
 # Gerekli Brian2 bileşenlerini içe aktaralım
-from brian2 import NeuronGroup, ms, pA
+from brian2 import NeuronGroup, ms, pA, second
 
 # Nöronumuzun davranışını tanımlayan diferansiyel denklem.
 # Bu, Leaky Integrate-and-Fire (LIF) modelinin temelidir.
@@ -20,6 +20,23 @@ tau : second
 tau_theta : second # Adaptasyon zaman sabitesi
 '''
 
+# Kaba saatli adaptasyon: theta ODE ile değil, ayrı (daha yavaş) bir saatte
+# run_regularly ile tam üstel azalmayla güncellenir (bkz. BionicNeuron theta_dt).
+LIF_STEPPED_THETA_EQUATION = '''
+dv/dt = (I - v) / tau : 1 (unless refractory)
+theta : 1  # Adaptif eşik; azalması kendi saatinde uygulanır
+I : 1
+tau : second
+tau_theta : second # Adaptasyon zaman sabitesi
+'''
+
+# Nöron izli STDP için ateşleme izi (bkz. learning_rules.STDP_EQUATION_NEURON).
+# İz, sinaps başına değil nöron başına bir kez entegre edilir.
+STDP_TRACE_EQUATION = '''
+dxtrace/dt = -xtrace / tau_stdp : 1
+tau_stdp : second # STDP izi zaman sabitesi
+'''
+
 class BionicNeuron:
     """
     PSINet mimarisinin temel işlem birimi.
@@ -28,7 +45,7 @@ class BionicNeuron:
     nöron grubunu sarmalar (encapsulates) with spike-rate adaptation.
     """
     def __init__(self, num_neurons, tau=10*ms, threshold_initial=1.0, reset_v=0.0, refractory=5*ms,
-                 tau_theta=100*ms, delta_theta=0.1):
+                 tau_theta=100*ms, delta_theta=0.1, stdp_trace_tau=None, theta_dt=None):
         """
         Bir grup Biyonik Nöron oluşturur.
 
@@ -40,23 +57,46 @@ class BionicNeuron:
             refractory (Quantity): Ateşlemeden sonraki tepkisizlik süresi.
             tau_theta (Quantity): Adaptif eşiğin sıfıra dönme zaman sabitesi.
             delta_theta (float): Her ateşlemede eşiğe eklenecek miktar.
+            stdp_trace_tau (Quantity): Verilirse, nöron izli STDP için nöron başına
+                                  bir ateşleme izi (xtrace) eklenir.
+            theta_dt (Quantity): Verilirse adaptif eşiğin azalması her adımda değil, bu
+                                  aralıkla (exp(-theta_dt/tau_theta) çarpanıyla) uygulanır.
+                                  tau_theta'ya göre küçük aralıklarda sonuç neredeyse aynıdır,
+                                  ama adım başına güncellenen değişken sayısı azalır.
         """
         # Brian2'nin NeuronGroup'unu kullanarak nöronları yaratıyoruz.
         # Brian2 bu denklemleri alıp arka planda verimli C++ koduna çevirir.
+        model = LIF_ADAPTIVE_EQUATION if theta_dt is None else LIF_STEPPED_THETA_EQUATION
+        reset = f'v = {reset_v}; theta += {delta_theta}' # Ateşlemede eşiği artır
+        if stdp_trace_tau is not None:
+            model += STDP_TRACE_EQUATION
+            reset += '; xtrace += 1'
         self.group = NeuronGroup(
             num_neurons,
-            model=LIF_ADAPTIVE_EQUATION,
+            model=model,
             threshold=f'v > (theta + {threshold_initial})', # Eşik artık dinamik
-            reset=f'v = {reset_v}; theta += {delta_theta}', # Ateşlemede eşiği artır
+            reset=reset,
             refractory=refractory,
             method='exact' # Bu basit denklem için en doğru çözücü
         )
+        if stdp_trace_tau is not None:
+            self.group.tau_stdp = stdp_trace_tau
+        if theta_dt is not None:
+            # Tam üstel azalma, theta_dt adımlarla (adımın başında, durum güncellemesinden önce)
+            self.group.run_regularly(f'theta = theta * exp(-{float(theta_dt / second)!r}*second / tau_theta)',
+                                     dt=theta_dt)
         
         # Nöronların parametrelerini ayarlıyoruz
         self.group.tau = tau
         self.group.tau_theta = tau_theta
         self.group.theta = 0  # Başlangıçta adaptasyon sıfır
         self.num_neurons = num_neurons
+        # Denklem dizgelerine gömülen sabitler (ör. NumPy çıkarım motoru için; bkz. simulation.inference)
+        self.threshold_initial = float(threshold_initial)
+        self.reset_v = float(reset_v)
+        self.delta_theta = float(delta_theta)
+        self.refractory = refractory
+        self.theta_dt = theta_dt
 
     def __repr__(self):
         return f"BionicNeuron(N={self.num_neurons})"
\ No newline at end of file
@@ -1,14 +1,32 @@
 ## Developer: inkbytefo
 ## Modified: 2025-11-08
+import numpy as np
 from brian2 import Synapses, ms
-from .learning_rules import STDP_EQUATION, STDP_ON_PRE, STDP_ON_POST
+from .learning_rules import STDP_MODES
+from .connectivity import connection_indices
+
+# Öğrenmeyen bağlantılar için model: yalnızca ağırlık, yalnızca on_pre yolu
+STATIC_EQUATION = 'w : 1'
+STATIC_SHARED_EQUATION = 'w : 1 (shared)' # Tüm sinapslar için tek bir skaler ağırlık
+STATIC_ON_PRE = 'v_post += w'
+
+def _connect(synapses, connectivity, exclude_self=False):
+    """Sinapsları bağlantı tanımına göre bağlar ve kurulan bağlantı sayısını döndürür."""
+    n_pre, n_post = synapses.source.N, synapses.target.N
+    if connectivity is None and not exclude_self:
+        synapses.connect()
+        return n_pre * n_post
+    i, j = connection_indices(connectivity, n_pre, n_post, exclude_self=exclude_self)
+    synapses.connect(i=i, j=j)
+    return len(i)
 
 class BionicSynapse:
     """
     Nöron grupları arasında öğrenen bağlantıları yönetir.
     """
     def __init__(self, pre_neurons, post_neurons, tau_pre=20*ms, tau_post=20*ms,
-                 w_max=0.01, A_pre=0.01, A_post=-0.0105, initial_weight_max=0.01):
+                 w_max=0.01, A_pre=0.01, A_post=-0.0105, initial_weight_max=0.01,
+                 stdp_mode='clock', connectivity=None, seed=None):
         """
         STDP öğrenme kuralına sahip bir sinaps grubu oluşturur.
 
@@ -19,35 +37,59 @@ class BionicSynapse:
             w_max (float): Maksimum sinaptik ağırlık.
             A_pre/A_post (float): Her ateşlemede izlerdeki artış/azalış miktarı.
                                   A_post'un A_pre'den biraz daha negatif olması
-            initial_weight_max (float): Başlangıç sinaptik ağırlıklarının maksimum değeri.
                                   genellikle daha kararlı bir öğrenme sağlar.
+            initial_weight_max (float): Başlangıç sinaptik ağırlıklarının maksimum değeri.
+            stdp_mode (str): İzlerin nasıl hesaplanacağı:
+                'clock'  - sinaps başına her adımda entegre edilen izler (varsayılan),
+                'event'  - sinaps başına, yalnızca ateşlemelerde analitik azaltılan izler,
+                'neuron' - kaynak/hedef nöron gruplarında saklanan izler (xtrace);
+                           her iki grup da stdp_trace_tau ile oluşturulmuş olmalıdır.
+                           Bu modda tau_pre/tau_post kullanılmaz.
+                'frozen' - öğrenme kapalı (değerlendirme): iz ve on_post yolu yoktur,
+                           yalnızca ağırlık iletilir.
+            connectivity (dict): Bağlantı tanımı (bkz. connectivity.connection_indices).
+                                  None ise tümden tüme bağlanır.
+            seed (int | np.random.SeedSequence): Başlangıç ağırlıkları için tohum. None ise
+                                  NumPy'nin global üreteci kullanılır (brian2.seed ile tekrarlanabilir).
+
+        STDP parametreleri (taupre, taupost, wmax, Apre, Apost) bağlantı başına paylaşılan
+        skalerlerdir; sinaps başına yalnızca ağırlık ve (mod 'clock'/'event' ise) izler saklanır.
         """
+        if stdp_mode not in STDP_MODES:
+            raise ValueError(f"Unknown stdp_mode '{stdp_mode}', expected one of {tuple(STDP_MODES)}")
         pre_group = pre_neurons.group if hasattr(pre_neurons, 'group') else pre_neurons
         post_group = post_neurons.group if hasattr(post_neurons, 'group') else post_neurons
+        if stdp_mode == 'neuron':
+            for role, g in (('pre', pre_group), ('post', post_group)):
+                if 'xtrace' not in g.variables:
+                    raise ValueError(f"stdp_mode 'neuron' requires an 'xtrace' variable on the {role}synaptic "
+                                     f"group '{g.name}' (create it with stdp_trace_tau, or use 'event').")
+        self.stdp_mode = stdp_mode
+        model, on_pre, on_post = STDP_MODES[stdp_mode]
         
         self.synapses = Synapses(
             pre_group, 
             post_group,
-            model=STDP_EQUATION,
-            on_pre=STDP_ON_PRE,
-            on_post=STDP_ON_POST
+            model=model,
+            on_pre=on_pre,
+            on_post=on_post
         )
         
-        self.synapses.connect()
+        self.num_connections = _connect(self.synapses, connectivity)
         
         # Öğrenme parametrelerini ayarla (defaults; caller may override after object creation)
-        self.synapses.taupre = tau_pre
-        self.synapses.taupost = tau_post
-        self.synapses.wmax = w_max
-        self.synapses.Apre = A_pre
-        self.synapses.Apost = A_post
+        self.set_learning_params(tau_pre=tau_pre, tau_post=tau_post, w_max=w_max, A_pre=A_pre, A_post=A_post)
         
-        self.synapses.w = f'rand() * {initial_weight_max}'
+        # Ağırlıklar tek bir vektörel NumPy çağrısıyla üretilir (sinaps başına kod üretimi yok)
+        rng = np.random.default_rng(seed) if seed is not None else np.random
+        self.synapses.w_[:] = rng.random(self.num_connections) * initial_weight_max
     
     def set_learning_params(self, tau_pre=None, tau_post=None, w_max=None, A_pre=None, A_post=None):
-        if tau_pre is not None:
+        # 'neuron' modunda zaman sabitleri nöron gruplarında (tau_stdp) tutulur
+        has_taus = 'taupre' in self.synapses.variables
+        if tau_pre is not None and has_taus:
             self.synapses.taupre = tau_pre
-        if tau_post is not None:
+        if tau_post is not None and has_taus:
             self.synapses.taupost = tau_post
         if w_max is not None:
             self.synapses.wmax = w_max
@@ -57,4 +99,41 @@ class BionicSynapse:
             self.synapses.Apost = A_post
     
     def __repr__(self):
-        return f"BionicSynapse connecting {self.synapses.source.N} to {self.synapses.target.N} neurons."
\ No newline at end of file
+        return f"BionicSynapse connecting {self.synapses.source.N} to {self.synapses.target.N} neurons."
+
+
+class StaticSynapse:
+    """
+    Nöron grupları arasında öğrenmeyen, sabit ağırlıklı bağlantıları yönetir.
+
+    STDP izleri, kırpma güncellemeleri ve on_post yolu yoktur; her ateşleme yalnızca
+    hedef nöronun potansiyeline ağırlığı ekler.
+    """
+    def __init__(self, pre_neurons, post_neurons, weight=1.0, shared_weight=True,
+                 connectivity=None, exclude_self=False):
+        """
+        Sabit bir sinaps grubu oluşturur (varsayılan: tümden tüme).
+
+        Args:
+            pre_neurons (BionicNeuron): Kaynak nöron grubu.
+            post_neurons (BionicNeuron): Hedef nöron grubu.
+            weight (float): Sinaptik ağırlık (negatif değerler baskılayıcıdır).
+            shared_weight (bool): True ise tüm sinapslar tek bir paylaşılan skaler ağırlık
+                                  kullanır; False ise sinaps başına ağırlık saklanır.
+            connectivity (dict): Bağlantı tanımı (bkz. connectivity.connection_indices).
+            exclude_self (bool): Aynı grup içinde i == j bağlantılarını kurma.
+        """
+        pre_group = pre_neurons.group if hasattr(pre_neurons, 'group') else pre_neurons
+        post_group = post_neurons.group if hasattr(post_neurons, 'group') else post_neurons
+
+        self.synapses = Synapses(
+            pre_group,
+            post_group,
+            model=STATIC_SHARED_EQUATION if shared_weight else STATIC_EQUATION,
+            on_pre=STATIC_ON_PRE
+        )
+        self.num_connections = _connect(self.synapses, connectivity, exclude_self=exclude_self)
+        self.synapses.w = weight
+
+    def __repr__(self):
+        return f"StaticSynapse connecting {self.synapses.source.N} to {self.synapses.target.N} neurons."
@@ -1,6 +1,13 @@
 # PSINet IO Module
 # Bu modül, dış dünya ile PSINet arasındaki veri dönüşümlerini yönetir
 
-from .encoders import image_to_poisson_rates, create_input_layer
+from .encoders import (
+    ENCODINGS, image_to_poisson_rates, encode_rates, cached_rate_matrix, rates_to_spikes, active_input_indices,
+    create_input_layer, create_scheduled_input_layer, update_scheduled_input,
+    create_spike_input_layer, set_input_spikes,
+)
+from .loaders import MnistStream
 
-__all__ = ['image_to_poisson_rates', 'create_input_layer']
\ No newline at end of file
+__all__ = ['ENCODINGS', 'image_to_poisson_rates', 'encode_rates', 'cached_rate_matrix', 'rates_to_spikes',
+           'active_input_indices', 'create_input_layer', 'create_scheduled_input_layer', 'update_scheduled_input',
+           'create_spike_input_layer', 'set_input_spikes', 'MnistStream']
\ No newline at end of file
@@ -1,22 +1,42 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
 import numpy as np
-from brian2 import PoissonGroup, Hz
 
-def image_to_poisson_rates(image, min_rate=0*Hz, max_rate=100*Hz, invert=True):
+# Brian2 (ve onunla birlikte yüklenen matplotlib/sympy) yalnızca Brian2 nesnesi kuran
+# fonksiyonlarda içe aktarılır; frekans/ateşleme kodlaması saf NumPy'dir ve hızlı yüklenir.
+
+RATE_CACHE_VERSION = 1
+# Giriş kodlamaları: 'poisson' PoissonGroup kullanır, diğerleri önceden hesaplanmış
+# ateşleme dizileriyle SpikeGeneratorGroup kullanır (bkz. rates_to_spikes)
+ENCODINGS = ('poisson', 'latency', 'rank_order', 'regular')
+
+def image_to_poisson_rates(image, min_rate=None, max_rate=None, invert=True):
     """
     Bir görüntü matrisini, piksel yoğunluğuna göre Poisson ateşleme frekanslarına dönüştürür.
 
     Args:
-        image (np.ndarray): 2D numpy dizisi olarak görüntü (genellikle 0-255 arası).
-        min_rate (Quantity): En açık piksel için ateşleme frekansı.
-        max_rate (Quantity): En koyu piksel için ateşleme frekansı.
+        image (np.ndarray): 2D numpy dizisi olarak görüntü (genellikle 0-255 arası) veya
+                     (N, 28, 28) boyutlu bir görüntü yığını (toplu, vektörel dönüşüm).
+        min_rate (Quantity): En açık piksel için ateşleme frekansı (varsayılan: 0 Hz).
+        max_rate (Quantity): En koyu piksel için ateşleme frekansı (varsayılan: 100 Hz).
         invert (bool): Eğer True ise, daha yüksek piksel değeri (beyaz) daha düşük
                      ateşleme frekansına neden olur (MNIST için ideal).
 
     Returns:
-        np.ndarray: Her piksel için bir ateşleme frekansı (Hz cinsinden) içeren 1D dizi.
+        np.ndarray: Her piksel için bir ateşleme frekansı (Hz cinsinden) içeren 1D dizi;
+                    yığın verilirse (N, piksel sayısı) boyutlu dizi.
     """
+    from brian2 import Hz
+    min_rate = 0*Hz if min_rate is None else min_rate
+    max_rate = 100*Hz if max_rate is None else max_rate
     # Görüntüyü 0-1 aralığına normalize et
-    image_flat = image.flatten().astype(float)
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image_flat = image.reshape(image.shape[0], -1).astype(float)
+    else:
+        image_flat = image.flatten().astype(float)
     image_flat /= 255.0
     
     if invert:
@@ -26,16 +46,241 @@ def image_to_poisson_rates(image, min_rate=0*Hz, max_rate=100*Hz, invert=True):
     rates = image_flat * (max_rate - min_rate) + min_rate
     return rates
 
-def create_input_layer(rates):
+def encode_rates(images, max_rate_hz=100.0, min_rate_hz=0.0, invert=True):
+    """
+    (N, 28, 28) uint8 görüntü yığınını tek bir vektörel çağrıyla frekans matrisine dönüştürür.
+
+    image_to_poisson_rates ile aynı eşleme; ancak birimsiz (Hz), bitişik (C-contiguous)
+    float32 bir matris döndürür. Sıcak yolda (giriş katmanına satır atama) birim
+    denetimi yapılmaz: satırlar doğrudan `input_layer.rates_[:]` ile atanır.
+
+    Args:
+        images (np.ndarray): (N, yükseklik, genişlik) veya (N, piksel) boyutlu görüntüler (0-255).
+        max_rate_hz / min_rate_hz (float): En koyu / en açık piksel için frekans (Hz).
+        invert (bool): Bkz. image_to_poisson_rates.
+
+    Returns:
+        np.ndarray: (N, piksel sayısı) boyutlu float32 frekans matrisi (Hz).
+    """
+    images = np.asarray(images)
+    rates = images.reshape(images.shape[0], -1).astype(np.float32)
+    rates *= np.float32((max_rate_hz - min_rate_hz) / 255.0)
+    if invert:
+        rates = np.float32(max_rate_hz - min_rate_hz) - rates
+    rates += np.float32(min_rate_hz)
+    return np.ascontiguousarray(rates)
+
+def cached_rate_matrix(images, cache_dir, dataset, indices=None, max_rate_hz=100.0, min_rate_hz=0.0,
+                       invert=True, chunk_size=4096):
+    """
+    encode_rates sonucunu diskte önbelleğe alır ve bellek eşlemeli (memory-mapped) döndürür.
+
+    Anahtar veri kümesi adı, seçilen indeksler, görüntü boyutu, frekans aralığı ve
+    invert'ten türetilir; aynı ayarlarla sonraki çalıştırmalar kodlamayı atlar.
+    Matris parça parça yazılır (bellek kullanımı chunk_size ile sınırlı) ve
+    geçici bir isimden yerine taşınır. Satırlar (`rates[k]`) kopyasız görünümlerdir.
+
+    Args:
+        images (np.ndarray): Kaynak görüntüler (bellek eşlemeli olabilir).
+        cache_dir (str | Path): Önbellek dizini.
+        dataset (str): Veri kümesi/bölüm adı (ör. 'mnist-train'), anahtarın parçası.
+        indices (array-like): Kodlanacak görüntü indeksleri; None ise tümü.
+        max_rate_hz, min_rate_hz, invert: Bkz. encode_rates.
+
+    Returns:
+        np.ndarray: Salt okunur, bellek eşlemeli (len(indices), piksel sayısı) float32 matris.
+    """
+    index_list = None if indices is None else [int(k) for k in np.asarray(indices).ravel()]
+    key = {
+        'version': RATE_CACHE_VERSION,
+        'dataset': str(dataset),
+        'shape': list(np.shape(images)),
+        'indices': index_list,
+        'max_rate_hz': float(max_rate_hz),
+        'min_rate_hz': float(min_rate_hz),
+        'invert': bool(invert),
+    }
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    cache_dir = Path(cache_dir).expanduser().resolve()
+    path = cache_dir / f"{dataset}_{digest}.npy"
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        rows = np.arange(len(images)) if index_list is None else np.asarray(index_list, dtype=np.int64)
+        num_pixels = int(np.prod(np.shape(images)[1:]))
+        logging.info(f"Encoding {rows.size} images to rates, cached at {path}")
+        tmp = path.with_name(path.stem + '.tmp.npy')
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(rows.size, num_pixels))
+        for start in range(0, rows.size, chunk_size):
+            sel = rows[start:start + chunk_size]
+            out[start:start + sel.size] = encode_rates(images[sel], max_rate_hz, min_rate_hz, invert)
+        out.flush()
+        del out
+        tmp.replace(path)
+    return np.load(path, mmap_mode='r')
+
+def active_input_indices(rates_hz, rows=None, min_active_fraction=0.0, chunk_size=4096):
+    """
+    Eğitim kümesinde (neredeyse) hiç ateşlemeyen giriş kanallarını ayıklamak için
+    korunacak piksel indekslerini döndürür.
+
+    Bir piksel, frekansının sıfırdan büyük olduğu görüntülerin oranı
+    min_active_fraction'dan büyükse korunur (varsayılan: en az bir görüntüde aktif).
+    Matris parça parça okunur; bellek eşlemeli büyük matrisler kopyalanmaz.
+
+    Args:
+        rates_hz (np.ndarray): (N, piksel sayısı) frekans matrisi (bkz. encode_rates).
+        rows (array-like): Hesaba katılacak satırlar; None ise tümü.
+        min_active_fraction (float): Korunmak için gereken en düşük aktiflik oranı.
+
+    Returns:
+        np.ndarray: Artan sırada korunan piksel indeksleri (int64). Budanmış grubun
+                    k. nöronu orijinal görüntünün indices[k]. pikselidir.
+    """
+    rows = np.arange(len(rates_hz)) if rows is None else np.sort(np.asarray(rows))
+    active = np.zeros(np.shape(rates_hz)[1], dtype=np.int64)
+    for start in range(0, rows.size, chunk_size):
+        active += (np.asarray(rates_hz[rows[start:start + chunk_size]]) > 0).sum(axis=0)
+    return np.flatnonzero(active > float(min_active_fraction) * max(rows.size, 1))
+
+
+def create_input_layer(rates, dt=None):
     """
     Verilen ateşleme frekanslarına sahip bir Poisson nöron grubu oluşturur.
     
     Args:
         rates (np.ndarray): Nöronların ateşleme frekansları (Hz).
+        dt (Quantity): Grubun kendi saat adımı (varsayılan: defaultclock). Daha kaba bir
+                       adım, giriş başına örnekleme sayısını azaltır.
         
     Returns:
         PoissonGroup: Brian2'nin PoissonGroup nesnesi.
     """
+    from brian2 import PoissonGroup
     num_inputs = len(rates)
-    input_layer = PoissonGroup(num_inputs, rates=rates)
-    return input_layer
\ No newline at end of file
+    input_layer = PoissonGroup(num_inputs, rates=rates, dt=dt)
+    return input_layer
+
+def create_scheduled_input_layer(rate_table_hz, slot_pattern, slot_dt, offset=None, dt=None):
+    """
+    Ateşleme frekansları önceden derlenmiş bir zaman çizelgesinden okunan Poisson grubu oluşturur.
+
+    Her zaman diliminde (slot) aktif olan desen `slot_pattern` ile seçilir; böylece
+    tüm göster/sessizlik dizisi tek bir `run()` çağrısıyla simüle edilebilir.
+
+    Args:
+        rate_table_hz (np.ndarray): (desen sayısı, giriş sayısı) boyutlu frekans tablosu (Hz, birimsiz).
+        slot_pattern (np.ndarray): Her zaman dilimi için tablo satır indeksi.
+        slot_dt (Quantity): Bir zaman diliminin süresi.
+        offset (Quantity): Çizelgenin başladığı simülasyon zamanı (varsayılan: 0 ms).
+        dt (Quantity): Grubun kendi saat adımı (varsayılan: defaultclock; bkz. create_input_layer).
+
+    Returns:
+        PoissonGroup: Frekansları `rate_table(slot_pattern(t - schedule_offset)*ms, i)`
+                      ifadesiyle belirlenen grup.
+    """
+    from brian2 import PoissonGroup
+    rate_table_hz = np.asarray(rate_table_hz, dtype=float)
+    group = PoissonGroup(rate_table_hz.shape[1],
+                         rates='rate_table(slot_pattern(t - schedule_offset)*ms, i)',
+                         namespace={}, dt=dt)
+    update_scheduled_input(group, rate_table_hz, slot_pattern, slot_dt, offset=offset)
+    return group
+
+def update_scheduled_input(input_layer, rate_table_hz, slot_pattern, slot_dt, offset=None):
+    """
+    Zamanlanmış bir giriş katmanına yeni bir çizelge parçası (chunk) yükler.
+
+    Grup ve bağlantıları yeniden kurulmaz; yalnızca isim alanındaki tablolar değişir
+    ve bir sonraki `run()` çağrısında kullanılır (runtime modu).
+
+    Args:
+        input_layer (PoissonGroup): create_scheduled_input_layer ile oluşturulmuş grup.
+        rate_table_hz, slot_pattern, slot_dt: Bkz. create_scheduled_input_layer.
+        offset (Quantity): Bu parçanın başladığı simülasyon zamanı (varsayılan: 0 ms).
+    """
+    from brian2 import TimedArray, Hz, ms
+    rate_table_hz = np.asarray(rate_table_hz, dtype=float)
+    # Satır k, "zaman" k*ms olarak adreslenir (iki seviyeli arama tablosu)
+    input_layer.namespace['rate_table'] = TimedArray(rate_table_hz * Hz, dt=1*ms)
+    input_layer.namespace['slot_pattern'] = TimedArray(np.asarray(slot_pattern, dtype=float), dt=slot_dt)
+    input_layer.namespace['schedule_offset'] = 0*ms if offset is None else offset
+
+def rates_to_spikes(rates_hz, encoding, window_ms, max_rate_hz, threshold=0.0):
+    """
+    Frekans satırlarını (bkz. encode_rates) deterministik ateşleme dizilerine dönüştürür.
+
+    Kodlamalar (x = frekans / max_rate_hz, 0-1 arası yoğunluk; yalnızca x > threshold
+    olan pikseller ateşler, sıfır pikseller hiç olay üretmez):
+        'latency'    - ilk ateşlemeye kadar geçen süre: piksel başına tek ateşleme,
+                       t = (1 - x) * window_ms (en parlak piksel en önce).
+        'rank_order' - sıra kodlaması: piksel başına tek ateşleme; aktif pikseller
+                       yoğunluk sırasına göre pencereye eşit aralıklarla yayılır
+                       (zamanlar yalnızca sıraya bağlıdır).
+        'regular'    - düzenli ateşleme dizisi: frekans r ile t = k / r (k = 1, 2, ...),
+                       pencere içinde; Poisson gürültüsü yoktur.
+
+    Args:
+        rates_hz (np.ndarray): (N, piksel sayısı) frekans matrisi (Hz, birimsiz).
+        encoding (str): 'latency', 'rank_order' veya 'regular'.
+        window_ms (float): Sunum penceresinin süresi (ms); tüm zamanlar [0, window_ms) içindedir.
+        max_rate_hz (float): Yoğunluğu 1 olan frekans.
+        threshold (float): Bu yoğunluğun altındaki pikseller ateşlemez.
+
+    Returns:
+        (rows, indices, times_ms): Satır (görüntü) numarası, piksel indeksi ve pencere
+        başına göre ateşleme zamanı; satıra göre sıralı düz diziler.
+    """
+    rates_hz = np.asarray(rates_hz, dtype=np.float32).reshape(-1, np.shape(rates_hz)[-1])
+    window_ms = float(window_ms)
+    x = rates_hz / np.float32(max_rate_hz)
+    if encoding == 'latency':
+        rows, indices = np.nonzero(x > threshold)
+        times = (1.0 - np.clip(x[rows, indices], 0.0, 1.0)) * window_ms
+    elif encoding == 'rank_order':
+        active = x > threshold
+        rows, indices = np.nonzero(active)
+        # Kararlı sıralama: eşit yoğunluklarda küçük piksel indeksi önce ateşler
+        order = np.argsort(-x, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(x.shape[1])[None, :], axis=1)
+        num_active = active.sum(axis=1)
+        times = ranks[rows, indices] * (window_ms / np.maximum(num_active[rows], 1))
+    elif encoding == 'regular':
+        active_rows, active_idx = np.nonzero(x > threshold)
+        rate = rates_hz[active_rows, active_idx].astype(float)
+        # k / r < window_ms koşulunu sağlayan ateşleme sayısı
+        counts = np.maximum(np.ceil(rate * window_ms / 1000.0) - 1, 0).astype(np.int64)
+        rows = np.repeat(active_rows, counts)
+        indices = np.repeat(active_idx, counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        times = k * (1000.0 / np.repeat(rate, counts))
+    else:
+        raise ValueError(f"Unknown spike encoding '{encoding}', expected one of {ENCODINGS[1:]}")
+    return rows.astype(np.int64), indices.astype(np.int32), np.asarray(times, dtype=float)
+
+def create_spike_input_layer(num_inputs):
+    """
+    Önceden hesaplanmış ateşleme dizileriyle beslenen (başlangıçta sessiz) bir giriş grubu oluşturur.
+
+    Args:
+        num_inputs (int): Giriş nöronu (piksel) sayısı.
+
+    Returns:
+        SpikeGeneratorGroup: Ateşlemeleri set_input_spikes ile yüklenen grup.
+    """
+    from brian2 import SpikeGeneratorGroup, ms
+    return SpikeGeneratorGroup(int(num_inputs), np.array([], dtype=np.int32), np.array([]) * ms)
+
+def set_input_spikes(input_layer, indices, times_ms, offset=None):
+    """
+    create_spike_input_layer ile oluşturulmuş gruba yeni ateşlemeler yükler (öncekiler silinir).
+
+    Args:
+        input_layer (SpikeGeneratorGroup): Giriş grubu.
+        indices (np.ndarray): Ateşleyen piksel indeksleri.
+        times_ms (np.ndarray): offset'e göre ateşleme zamanları (ms, birimsiz).
+        offset (Quantity): Zamanların başladığı simülasyon zamanı (genellikle Network.t).
+    """
+    from brian2 import ms
+    times = np.asarray(times_ms, dtype=float) * ms
+    input_layer.set_spikes(np.asarray(indices, dtype=np.int32), times if offset is None else times + offset)
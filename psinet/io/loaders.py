@@ -1,33 +1,170 @@
+import gzip
+import logging
 from pathlib import Path
 from typing import Tuple
 import numpy as np
 
-def load_mnist(data_dir: str = "~/.psinet_data") -> Tuple[np.ndarray, np.ndarray]:
+MNIST_SPLITS = {
+    'train': ('train-images-idx3-ubyte', 'train-labels-idx1-ubyte'),
+    'test': ('t10k-images-idx3-ubyte', 't10k-labels-idx1-ubyte'),
+}
+# IDX type codes -> numpy dtypes (data is big-endian)
+_IDX_DTYPES = {0x08: '>u1', 0x09: '>i1', 0x0B: '>i2', 0x0C: '>i4', 0x0D: '>f4', 0x0E: '>f8'}
+
+
+def read_idx(path) -> np.ndarray:
+    """
+    Read an IDX file (optionally gzip-compressed) into a numpy array.
+
+    Uncompressed files are memory-mapped; .gz files are decompressed in memory.
     """
-    Load MNIST train images and labels using torchvision with local caching.
+    path = Path(path)
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rb') as f:
+        header = f.read(4)
+        if len(header) != 4 or header[0] != 0 or header[1] != 0 or header[2] not in _IDX_DTYPES:
+            raise ValueError(f"{path} is not an IDX file")
+        ndim = header[3]
+        shape = tuple(int(x) for x in np.frombuffer(f.read(4 * ndim), dtype='>u4'))
+        dtype = np.dtype(_IDX_DTYPES[header[2]])
+        if opener is gzip.open:
+            data = np.frombuffer(f.read(), dtype=dtype, count=int(np.prod(shape)))
+            return data.reshape(shape)
+    return np.memmap(path, dtype=dtype, mode='r', offset=4 + 4 * ndim, shape=shape)
+
+
+def _find_idx(data_path: Path, name: str) -> Path:
+    # Plain layout (<data_dir>/mnist) and torchvision's (<data_dir>/mnist/MNIST/raw)
+    for folder in (data_path, data_path / 'MNIST' / 'raw', data_path / 'raw'):
+        for candidate in (folder / name, folder / (name + '.gz')):
+            if candidate.exists():
+                return candidate
+    raise FileNotFoundError(f"MNIST file '{name}' not found under {data_path}")
+
+
+def load_mnist(data_dir: str = "~/.psinet_data", split: str = 'train') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load MNIST images and labels from local files, memory-mapped.
+
+    On first use the raw IDX files (plain or .gz, either directly in <data_dir>/mnist
+    or in torchvision's MNIST/raw layout) are converted to .npy files next to them;
+    later calls memory-map those, so loading takes milliseconds and images are only
+    read from disk when indexed. Nothing is downloaded.
 
     Args:
-        data_dir: Base directory to cache datasets. Will create ~/.psinet_data/mnist by default.
+        data_dir: Base data directory; MNIST files live under <data_dir>/mnist.
+        split: 'train' or 'test'.
 
     Returns:
-        images: np.ndarray of shape (N, 28, 28), dtype uint8
-        labels: np.ndarray of shape (N,), dtype uint8/int64
+        images: read-only memory-mapped array of shape (N, 28, 28), dtype uint8
+        labels: read-only memory-mapped array of shape (N,), dtype uint8
     """
+    if split not in MNIST_SPLITS:
+        raise ValueError(f"Unknown MNIST split '{split}', expected one of {tuple(MNIST_SPLITS)}")
     data_path = Path(data_dir).expanduser().resolve() / 'mnist'
-    data_path.mkdir(parents=True, exist_ok=True)
-
-    try:
-        import torchvision
-        from torchvision import transforms
-    except Exception as e:
-        raise RuntimeError(
-            "torchvision is required for load_mnist. Please ensure it is installed."
-        ) from e
-
-    transform = transforms.Compose([transforms.ToTensor()])
-    ds = torchvision.datasets.MNIST(root=str(data_path), train=True, download=True, transform=transform)
-
-    # Convert to numpy (uint8 images in 0..255)
-    images = (ds.data.numpy()).astype(np.uint8)
-    labels = ds.targets.numpy()
-    return images, labels
+    images_npy = data_path / f'{split}_images.npy'
+    labels_npy = data_path / f'{split}_labels.npy'
+
+    if not (images_npy.exists() and labels_npy.exists()):
+        images_name, labels_name = MNIST_SPLITS[split]
+        images = read_idx(_find_idx(data_path, images_name))
+        labels = read_idx(_find_idx(data_path, labels_name))
+        if images.shape[0] != labels.shape[0]:
+            raise ValueError(f"MNIST {split}: {images.shape[0]} images but {labels.shape[0]} labels")
+        logging.info(f"Caching MNIST {split} split as .npy under {data_path}")
+        # Write under a temporary name first so an interrupted conversion is never picked up
+        for array, target in ((images, images_npy), (labels, labels_npy)):
+            tmp = target.with_name(target.stem + '.tmp.npy')
+            np.save(tmp, np.ascontiguousarray(array, dtype=np.uint8))
+            tmp.replace(target)
+
+    return np.load(images_npy, mmap_mode='r'), np.load(labels_npy, mmap_mode='r')
+
+class MnistStream:
+    """
+    Streaming iterator over a subset of a labelled image dataset.
+
+    Only index arrays are held for the whole stream; images are gathered chunk by
+    chunk (fancy indexing, so a memory-mapped array is read lazily), which keeps
+    memory bounded by ``chunk_size`` regardless of how many images are presented.
+
+    Each iteration yields ``(indices, images, labels)`` for one chunk.
+    """
+    def __init__(self, images, labels, num_images=None, chunk_size=256, digits=None,
+                 shuffle=True, balance_classes=False, epochs=1, seed=None, shard=0, num_shards=1):
+        """
+        Args:
+            images: Array-like of shape (N, 28, 28).
+            labels: Array-like of shape (N,).
+            num_images: Images per epoch (default: all eligible images).
+            chunk_size: Maximum number of images per chunk.
+            digits: Restrict the stream to these labels (default: all labels).
+            shuffle: Shuffle the order within each epoch.
+            balance_classes: Take the same number of images from every digit and
+                             interleave them, so each chunk is roughly class balanced.
+            epochs: Number of passes over the selected images.
+            seed: Seed for selection and shuffling.
+            shard, num_shards: Keep only block ``shard`` of ``num_shards`` equal, disjoint
+                blocks of the selection (data-parallel replicas pass the same seed, so the
+                blocks partition one common selection; the remainder is dropped).
+        """
+        if int(chunk_size) <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= int(shard) < int(num_shards):
+            raise ValueError(f"shard must be in [0, {int(num_shards)}), got {shard}")
+        self.images = images
+        self.labels = np.asarray(labels)
+        self.chunk_size = int(chunk_size)
+        self.shuffle = bool(shuffle)
+        self.epochs = int(epochs)
+        self.rng = np.random.default_rng(seed)
+
+        if digits is None:
+            digits = np.unique(self.labels)
+        self.digits = [int(d) for d in digits]
+        eligible = np.flatnonzero(np.isin(self.labels, self.digits))
+        if eligible.size == 0:
+            raise ValueError(f"No images found for digits {self.digits}")
+
+        if balance_classes:
+            per_class = [np.flatnonzero(self.labels == d) for d in self.digits]
+            per_class = [self.rng.permutation(idx) if self.shuffle else idx for idx in per_class]
+            n_each = min(len(idx) for idx in per_class)
+            if num_images is not None:
+                n_each = min(n_each, max(1, int(num_images) // len(self.digits)))
+            # Interleave d0, d1, ..., d0, d1, ... so every chunk sees all classes
+            self._balanced = np.stack([idx[:n_each] for idx in per_class], axis=1)
+            rows = self._balanced.shape[0] // int(num_shards)
+            self._balanced = self._balanced[int(shard) * rows:(int(shard) + 1) * rows]
+            self.indices = self._balanced.ravel()
+        else:
+            self._balanced = None
+            if self.shuffle:
+                eligible = self.rng.permutation(eligible)
+            self.indices = eligible[:num_images] if num_images is not None else eligible
+            size = self.indices.size // int(num_shards)
+            self.indices = self.indices[int(shard) * size:(int(shard) + 1) * size]
+        if self.indices.size == 0:
+            raise ValueError(f"Shard {shard} of {num_shards} is empty")
+
+    @property
+    def num_images(self):
+        """Images presented per epoch."""
+        return int(self.indices.size)
+
+    def __len__(self):
+        """Total number of chunks over all epochs."""
+        return self.epochs * -(-self.num_images // self.chunk_size)
+
+    def __iter__(self):
+        for epoch in range(self.epochs):
+            order = self.indices
+            if self.shuffle and epoch > 0:
+                if self._balanced is not None:
+                    # Reshuffle within each class, keeping the interleaved layout
+                    order = self.rng.permuted(self._balanced, axis=0).ravel()
+                else:
+                    order = self.rng.permutation(order)
+            for start in range(0, order.size, self.chunk_size):
+                idx = order[start:start + self.chunk_size]
+                yield idx, np.asarray(self.images[idx]), self.labels[idx]
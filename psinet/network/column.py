@@ -1,6 +1,7 @@
-from brian2 import ms, Synapses
+from brian2 import ms
 from ..core.neuron import BionicNeuron
-from ..core.synapse import BionicSynapse
+from ..core.synapse import BionicSynapse, StaticSynapse
+from .inhibition import PopulationInhibition, LATERAL_INHIBITION_MODES
 
 class BionicColumn:
     """
@@ -10,7 +11,9 @@ class BionicColumn:
     ve aralarındaki bağlantıları içerir. "Winner-Take-All" benzeri
     bir rekabetçi dinamik oluşturur.
     """
-    def __init__(self, num_excitatory=80, num_inhibitory=20, enable_lateral_inhibition=True, lateral_strength=0.2):
+    def __init__(self, num_excitatory=80, num_inhibitory=20, enable_lateral_inhibition=True, lateral_strength=0.2,
+                 stdp_mode='clock', stdp_trace_tau=None, e_to_e_connectivity=None, lateral_connectivity=None,
+                 lateral_inhibition_mode='synapses', seed=None, theta_dt=None):
         """
         Bir Biyonik Sütun oluşturur.
 
@@ -19,38 +22,55 @@ class BionicColumn:
             num_inhibitory (int): Engelleyici nöron sayısı.
             enable_lateral_inhibition (bool): Uyarıcılar arası yanal engellemeyi aç/kapat.
             lateral_strength (float): Yanal engelleme darbelerinin şiddeti.
+            stdp_mode (str): Uyarıcılar arası (E→E) STDP izlerinin modu ('clock', 'event', 'neuron').
+            stdp_trace_tau (Quantity): Uyarıcı nöronlarda nöron izli STDP için iz zaman sabitesi.
+                                  'neuron' modunda verilmezse 20 ms kullanılır.
+            e_to_e_connectivity (dict): E→E STDP sinapslarının bağlantı tanımı (None: tümden tüme).
+            lateral_connectivity (dict): Yanal engellemenin bağlantı tanımı (None: i != j tümden tüme).
+            lateral_inhibition_mode (str): 'synapses' (i != j sinaps nesnesi) veya 'population'
+                                  (sayısal olarak eşdeğer O(N) popülasyon sayacı; yalnızca
+                                  tümden tüme bağlantıyla kullanılabilir).
+            seed (int | np.random.SeedSequence): E→E başlangıç ağırlıkları için tohum (bkz. BionicSynapse).
+            theta_dt (Quantity): Adaptif eşik azalmasının saat aralığı (None: her adım; bkz. BionicNeuron).
         """
         print(f"BionicColumn oluşturuluyor: {num_excitatory} Uyarıcı, {num_inhibitory} Engelleyici...")
         
         # 1. Nöron Popülasyonlarını Oluştur
         # Engelleyici nöronlar genellikle daha hızlı tepki verir (daha küçük tau)
-        self.excitatory_neurons = BionicNeuron(num_neurons=num_excitatory, tau=10*ms)
-        self.inhibitory_neurons = BionicNeuron(num_neurons=num_inhibitory, tau=5*ms)
+        if stdp_mode == 'neuron' and stdp_trace_tau is None:
+            stdp_trace_tau = 20*ms
+        self.excitatory_neurons = BionicNeuron(num_neurons=num_excitatory, tau=10*ms, stdp_trace_tau=stdp_trace_tau,
+                                               theta_dt=theta_dt)
+        self.inhibitory_neurons = BionicNeuron(num_neurons=num_inhibitory, tau=5*ms, theta_dt=theta_dt)
         
         # 2. İç Bağlantıları Kur (Sinapslar)
         # Kendi kendine öğrenme için uyarıcı nöronlar arasında STDP sinapsları
-        self.E_to_E_synapse = BionicSynapse(self.excitatory_neurons, self.excitatory_neurons, initial_weight_max=0.1)
+        self.E_to_E_synapse = BionicSynapse(self.excitatory_neurons, self.excitatory_neurons, initial_weight_max=0.1,
+                                            stdp_mode=stdp_mode, connectivity=e_to_e_connectivity, seed=seed)
         
         # Uyarıcı -> Engelleyici bağlantısı (Rekabeti başlatır)
-        # Bu bağlantı öğrenmez, sabittir.
-        self.E_to_I_synapse = BionicSynapse(self.excitatory_neurons, self.inhibitory_neurons, initial_weight_max=2.0)
-        self.E_to_I_synapse.synapses.connect() # Her uyarıcı her engelleyiciyi besler
-        self.E_to_I_synapse.synapses.w = 2.0 # Daha güçlü bağlantı
+        # Bu bağlantı öğrenmez, sabittir: her uyarıcı her engelleyiciyi besler.
+        self.E_to_I_synapse = StaticSynapse(self.excitatory_neurons, self.inhibitory_neurons, weight=2.0)
 
         # Engelleyici -> Uyarıcı bağlantısı (Rekabeti uygular)
         # Bu, "Winner-Take-All" mekanizmasının anahtarıdır.
-        # Bu da öğrenmez.
-        self.I_to_E_synapse = BionicSynapse(self.inhibitory_neurons, self.excitatory_neurons, initial_weight_max=3.0)
-        self.I_to_E_synapse.synapses.connect() # Her engelleyici her uyarıcıyı baskılar
-        self.I_to_E_synapse.synapses.w = -3.0 # Çok güçlü, negatif (baskılayıcı) bağlantı
+        # Bu da öğrenmez: her engelleyici her uyarıcıyı güçlü, negatif ağırlıkla baskılar.
+        self.I_to_E_synapse = StaticSynapse(self.inhibitory_neurons, self.excitatory_neurons, weight=-3.0)
 
         # L1 içi zayıf lateral engelleme: Uyarıcılar birbirini hafifçe baskılar (soft WTA)
+        # Tek bir paylaşılan skaler ağırlık (-lateral_strength) kullanılır.
+        if lateral_inhibition_mode not in LATERAL_INHIBITION_MODES:
+            raise ValueError(f"Unknown lateral_inhibition_mode '{lateral_inhibition_mode}', "
+                             f"expected one of {LATERAL_INHIBITION_MODES}")
         self.E_lateral_inhib = None
-        if enable_lateral_inhibition:
-            self.E_lateral_inhib = Synapses(self.excitatory_neurons.group,
-                                            self.excitatory_neurons.group,
-                                            on_pre=f'v_post -= {float(lateral_strength)}')
-            self.E_lateral_inhib.connect(condition='i != j')
+        if enable_lateral_inhibition and lateral_inhibition_mode == 'population':
+            if lateral_connectivity is not None and lateral_connectivity.get('type', 'all') != 'all':
+                raise ValueError("lateral_inhibition_mode 'population' requires all-to-all lateral connectivity")
+            self.E_lateral_inhib = PopulationInhibition(self.excitatory_neurons, lateral_strength)
+        elif enable_lateral_inhibition:
+            self.E_lateral_inhib = StaticSynapse(self.excitatory_neurons, self.excitatory_neurons,
+                                                 weight=-float(lateral_strength),
+                                                 connectivity=lateral_connectivity, exclude_self=True)
 
         print("BionicColumn oluşturuldu.")
 
@@ -66,6 +86,8 @@ class BionicColumn:
             self.E_to_I_synapse.synapses,
             self.I_to_E_synapse.synapses,
         ]
-        if self.E_lateral_inhib is not None:
-            objs.append(self.E_lateral_inhib)
+        if isinstance(self.E_lateral_inhib, PopulationInhibition):
+            objs.extend(self.E_lateral_inhib.all_objects)
+        elif self.E_lateral_inhib is not None:
+            objs.append(self.E_lateral_inhib.synapses)
         return objs
\ No newline at end of file
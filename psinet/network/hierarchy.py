@@ -1,6 +1,7 @@
 from .column import BionicColumn
 from ..core.synapse import BionicSynapse
 from brian2 import Network, ms
+import numpy as np
 
 class Hierarchy:
     """
@@ -8,7 +9,7 @@ class Hierarchy:
     The first layer receives input from an external input layer (PoissonGroup),
     and each subsequent layer receives from the previous layer's excitatory neurons.
     """
-    def __init__(self, input_layer, layers_config, connections_params=None):
+    def __init__(self, input_layer, layers_config, connections_params=None, seed=None):
         """
         Args:
             input_layer: PoissonGroup providing input spikes.
@@ -24,13 +25,31 @@ class Hierarchy:
                 - 'inp_<first_layer_name_lower>' e.g., 'inp_l1'
                 - '<prev>_<curr>' e.g., 'l1_l2'
                 Each value: {'w_max': float, 'a_plus': float, 'a_minus': float}
+                Optional 'stdp_mode': 'clock' (default), 'event' or 'neuron'
+                (see BionicSynapse). A layer dict may also set 'stdp_mode' for its
+                internal E→E synapses.
+                Optional 'connectivity': connectivity spec (see
+                core.connectivity.connection_indices); layer dicts accept
+                'e_to_e_connectivity' and 'lateral_connectivity'.
+                A layer dict may set 'theta_update_interval_ms' to decay the adaptive
+                thresholds of its neurons on that coarser clock (see BionicNeuron).
+            seed: Optional seed for the initial weights. Every learning synapse object
+                (E→E of each layer, then the connections in build order) draws from its
+                own child of np.random.SeedSequence(seed); None uses NumPy's global RNG.
         """
         self.input_layer = input_layer
+        self.layers_config = layers_config
         self.layers_in_order = []
         self.layers_by_name = {}
         self.connections = {}
         self.input_to_first_syn = None
 
+        cp = connections_params or {}
+        trace_taus = self.stdp_trace_taus(layers_config, cp)
+        # One weight seed per learning synapse object: E→E per layer plus one connection per layer
+        n_seeded = 2 * len(layers_config)
+        seeds = iter(np.random.SeedSequence(seed).spawn(n_seeded) if seed is not None else [None] * n_seeded)
+
         # Build layers
         for layer_def in layers_config:
             name = layer_def.get('name', f"L{len(self.layers_in_order)+1}")
@@ -40,12 +59,20 @@ class Hierarchy:
             lat = float(layer_def.get('lateral_strength', 0.2))
 
             print(f"\nKatman oluşturuluyor ({name})...")
-            col = BionicColumn(ne, ni, enable_lateral_inhibition=eli, lateral_strength=lat)
+            tau_tr = trace_taus.get(name)
+            theta_ms = layer_def.get('theta_update_interval_ms')
+            col = BionicColumn(ne, ni, enable_lateral_inhibition=eli, lateral_strength=lat,
+                               stdp_mode=layer_def.get('stdp_mode', 'clock'),
+                               stdp_trace_tau=tau_tr*ms if tau_tr is not None else None,
+                               e_to_e_connectivity=layer_def.get('e_to_e_connectivity'),
+                               lateral_connectivity=layer_def.get('lateral_connectivity'),
+                               lateral_inhibition_mode=layer_def.get('lateral_inhibition_mode', 'synapses'),
+                               seed=next(seeds),
+                               theta_dt=float(theta_ms)*ms if theta_ms is not None else None)
             self.layers_by_name[name] = col
             self.layers_in_order.append(name)
 
         # Build connections (learning-enabled)
-        cp = connections_params or {}
 
         # Input -> first layer
         first = self.layers_in_order[0]
@@ -63,6 +90,9 @@ class Hierarchy:
             tau_pre=p_inp['tau_plus_ms']*ms,
             tau_post=p_inp['tau_minus_ms']*ms,
             initial_weight_max=p_inp.get('initial_weight_max', 0.01),
+            stdp_mode=p_inp.get('stdp_mode', 'clock'),
+            connectivity=p_inp.get('connectivity'),
+            seed=next(seeds),
         )
         self.connections[key_inp] = self.input_to_first_syn
 
@@ -82,9 +112,49 @@ class Hierarchy:
                 tau_pre=p['tau_plus_ms']*ms,
                 tau_post=p['tau_minus_ms']*ms,
                 initial_weight_max=p.get('initial_weight_max', 0.01),
+                stdp_mode=p.get('stdp_mode', 'clock'),
+                connectivity=p.get('connectivity'),
+                seed=next(seeds),
             )
             self.connections[key] = syn
 
+    @staticmethod
+    def stdp_trace_taus(layers_config, connections_params):
+        """
+        Trace time constants (ms) required on each layer's excitatory neurons by
+        connections using stdp_mode 'neuron'. A layer's single trace serves both as
+        presynaptic (tau_plus_ms) and postsynaptic (tau_minus_ms) trace, so all
+        neuron-mode connections touching a layer must agree on it.
+
+        Returns:
+            {layer_name: tau_ms}
+        """
+        names = [l.get('name', f"L{n+1}") for n, l in enumerate(layers_config)]
+        required = {}
+
+        def need(layer, tau, source):
+            tau = float(tau)
+            if layer in required and required[layer][0] != tau:
+                raise ValueError(f"Conflicting STDP trace time constants for layer '{layer}': "
+                                 f"{required[layer][0]} ms ({required[layer][1]}) vs {tau} ms ({source})")
+            required[layer] = (tau, source)
+
+        for name, layer_def in zip(names, layers_config):
+            if layer_def.get('stdp_mode') == 'neuron':
+                need(name, 20.0, f"{name} E→E")
+        if names:
+            key_inp = f"inp_{names[0].lower()}"
+            p = connections_params.get(key_inp, {})
+            if p.get('stdp_mode') == 'neuron':
+                need(names[0], p.get('tau_minus_ms', 20.0), key_inp)
+        for prev_name, curr_name in zip(names[:-1], names[1:]):
+            key = f"{prev_name.lower()}_{curr_name.lower()}"
+            p = connections_params.get(key, {})
+            if p.get('stdp_mode') == 'neuron':
+                need(prev_name, p.get('tau_plus_ms', 20.0), key)
+                need(curr_name, p.get('tau_minus_ms', 20.0), key)
+        return {name: tau for name, (tau, _) in required.items()}
+
     # Backwards compatibility helpers
     @property
     def layer1(self):
@@ -0,0 +1,41 @@
+import numpy as np
+from brian2 import NeuronGroup, Synapses
+
+LATERAL_INHIBITION_MODES = ('synapses', 'population')
+
+
+class PopulationInhibition:
+    """
+    Uyarıcılar arası tümden tüme yanal engellemenin O(N) karşılığı.
+
+    `v_post -= s` kuralına sahip i != j sinapsları, her adımda her nörondan
+    `s * (o adımdaki ateşleme sayısı - kendi ateşlemesi)` çıkarmakla aynıdır.
+    Ateşlemeler tek bir sayaç nöronunda toplanır (N sinaps, ateşleme başına O(1)),
+    sinaptik yayılımdan sonra sayaç tüm nöronlara yayınlanır ve sıfırlanır.
+    Böylece N² sinaps yerine 2N sinaps ve adım başına O(N) iş gerekir.
+    """
+    def __init__(self, neurons, strength):
+        """
+        Args:
+            neurons (BionicNeuron): Uyarıcı nöron grubu (refractory tanımlı olmalı; lastspike kullanılır).
+            strength (float): Yanal engelleme darbelerinin şiddeti (lateral_strength).
+        """
+        group = neurons.group if hasattr(neurons, 'group') else neurons
+        n = group.N
+
+        # Bu adımdaki ateşleme sayacı
+        self.counter = NeuronGroup(1, 'count : 1')
+        self.collect = Synapses(group, self.counter, on_pre='count_post += 1')
+        self.collect.connect(i=np.arange(n), j=np.zeros(n, dtype=int))
+
+        # Sayaç -> tüm nöronlar: kendi ateşlemesi hariç s * sayı kadar baskıla
+        self.broadcast = Synapses(self.counter, group, model='strength : 1 (shared)')
+        self.broadcast.connect(i=np.zeros(n, dtype=int), j=np.arange(n))
+        self.broadcast.strength = float(strength)
+        self.broadcast.run_regularly('v_post -= strength * (count_pre - int(lastspike_post == t))',
+                                     when='after_synapses', order=0)
+        self.counter.run_regularly('count = 0', when='after_synapses', order=1)
+
+    @property
+    def all_objects(self):
+        return [self.counter, self.collect, self.broadcast]
@@ -0,0 +1,175 @@
+import numpy as np
+
+
+def spike_counts_per_digit(spike_t_ms, spike_i, windows_ms, num_neurons, digits=None):
+    """
+    Count spikes per (digit, neuron) over the presentation windows in a single pass.
+
+    The window edges are located in the time-sorted spike train with ``searchsorted``
+    and the counts are accumulated with one ``bincount`` over (window -> digit,
+    neuron), so the cost is O(spikes + windows log spikes) instead of
+    O(windows x spikes). Monitor output is already time-ordered; other input is
+    sorted first. Windows are half-open [t0, t1) and must not overlap.
+
+    Args:
+        spike_t_ms: Spike times in ms (sorted is fastest, any order accepted).
+        spike_i: Neuron index of each spike.
+        windows_ms: {digit: (K, 2) array-like of [t0, t1) windows in ms}.
+        num_neurons: Number of neurons in the layer; spikes with larger indices are ignored.
+        digits: Row order of the result (default: sorted digits of windows_ms).
+
+    Returns:
+        np.ndarray of shape (len(digits), num_neurons) with int64 spike counts.
+    """
+    if digits is None:
+        digits = sorted(windows_ms)
+    digits = list(digits)
+    num_neurons = int(num_neurons)
+
+    bounds, rows = [], []
+    for row, d in enumerate(digits):
+        w = np.asarray(windows_ms.get(d, ()), dtype=float).reshape(-1, 2)
+        bounds.append(w)
+        rows.append(np.full(len(w), row, dtype=np.int64))
+    bounds = np.concatenate(bounds) if bounds else np.empty((0, 2))
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    counts_shape = (len(digits), num_neurons)
+    if bounds.size == 0:
+        return np.zeros(counts_shape, dtype=np.int64)
+
+    starts, ends = bounds[:, 0], bounds[:, 1]
+
+    t = np.asarray(spike_t_ms, dtype=float)
+    i = np.asarray(spike_i, dtype=np.int64)
+    if t.size > 1 and not np.all(t[1:] >= t[:-1]):
+        order = np.argsort(t, kind='stable')
+        t, i = t[order], i[order]
+
+    # Spike ranges of each window in the time-sorted spike train, then a running
+    # sum of +row/-row markers labels every spike with its window's digit row
+    # (windows do not overlap, so at most one window is open at a time).
+    first = np.searchsorted(t, starts, side='left')
+    last = np.searchsorted(t, ends, side='left')
+    marks = np.zeros(t.size + 1, dtype=np.int64)
+    np.add.at(marks, first, rows + 1)
+    np.add.at(marks, last, -(rows + 1))
+    label = np.cumsum(marks[:-1]) - 1
+    valid = (label >= 0) & (i >= 0) & (i < num_neurons)
+    flat = label[valid] * num_neurons + i[valid]
+    return np.bincount(flat, minlength=counts_shape[0] * num_neurons).reshape(counts_shape)
+
+
+def assign_labels(counts, presentations=None):
+    """
+    Assign each neuron the digit it responds to most strongly.
+
+    Args:
+        counts: (digit x neuron) spike count matrix (e.g. from spike_counts_per_digit).
+        presentations: Number of presentations per digit (rows are turned into mean
+                       responses, so unbalanced digits are not favoured). Optional.
+
+    Returns:
+        np.ndarray of shape (num_neurons,) with the row index of each neuron's digit.
+    """
+    rates = np.asarray(counts, dtype=float)
+    if presentations is not None:
+        rates = rates / np.maximum(np.asarray(presentations, dtype=float), 1.0)[:, None]
+    return np.argmax(rates, axis=0)
+
+
+def classify_by_votes(counts_per_image, assignments, num_digits):
+    """
+    Spike-count voting readout: every image is assigned the digit whose neurons fire
+    most on average (digits without assigned neurons never win).
+
+    Args:
+        counts_per_image: (images x neuron) spike counts.
+        assignments: (neuron,) digit row index per neuron (see assign_labels).
+        num_digits: Number of digit rows.
+
+    Returns:
+        np.ndarray of shape (images,) with predicted digit row indices.
+    """
+    counts = np.asarray(counts_per_image, dtype=float)
+    one_hot = np.zeros((len(assignments), num_digits))
+    one_hot[np.arange(len(assignments)), assignments] = 1.0
+    per_digit = one_hot.sum(axis=0)
+    votes = counts @ one_hot
+    votes = np.where(per_digit > 0, votes / np.maximum(per_digit, 1.0), -np.inf)
+    return np.argmax(votes, axis=1)
+
+
+def selectivity_index(counts):
+    """
+    Mean digit selectivity of the responsive neurons of a (digit x neuron) count matrix.
+
+    Per neuron the share of its spikes that fall on its preferred digit is rescaled
+    so that 0 means equal response to all digits and 1 means a single digit. Neurons
+    without spikes are ignored; returns 0.0 if none fired or there is only one digit.
+    """
+    counts = np.asarray(counts, dtype=float)
+    num_digits = counts.shape[0]
+    total = counts.sum(axis=0)
+    active = total > 0
+    if num_digits < 2 or not np.any(active):
+        return 0.0
+    share = counts[:, active].max(axis=0) / total[active]
+    return float(np.mean((share - 1.0 / num_digits) / (1.0 - 1.0 / num_digits)))
+
+
+def spike_count_drift(counts, reference):
+    """
+    Compare two spike count matrices of the same layer (e.g. per digit and neuron,
+    from runs with different time steps).
+
+    Returns:
+        Dict with 'total' / 'reference_total' spike counts, 'total_change' (relative
+        change of the total), 'mean_abs_change' (mean absolute per-entry difference
+        relative to the mean reference entry) and 'correlation' (Pearson correlation
+        of the entries; for constant matrices 1.0 if they are equal, else 0.0).
+    """
+    counts = np.asarray(counts, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    if counts.shape != reference.shape:
+        raise ValueError(f"Count matrices differ in shape: {counts.shape} vs {reference.shape}")
+    total, ref_total = float(counts.sum()), float(reference.sum())
+    ref_mean = max(float(reference.mean()) if reference.size else 0.0, 1e-12)
+    a, b = counts.ravel() - counts.mean(), reference.ravel() - reference.mean()
+    norm = float(np.sqrt((a * a).sum() * (b * b).sum()))
+    if norm > 0:
+        correlation = float((a * b).sum() / norm)
+    else:
+        correlation = 1.0 if np.array_equal(counts, reference) else 0.0
+    return {
+        'total': int(total),
+        'reference_total': int(ref_total),
+        'total_change': (total - ref_total) / max(ref_total, 1.0),
+        'mean_abs_change': float(np.abs(counts - reference).mean()) / ref_mean if reference.size else 0.0,
+        'correlation': correlation,
+    }
+
+
+def receptive_field_matrix(w, i, j, num_post, input_pixels=None, num_pixels=784):
+    """
+    Dense (post-neuron x pixel) weight matrix of an input connection.
+
+    With a pruned input layer (``input_pixels``: pixel index of every input neuron,
+    as saved in raw_data.npz/checkpoints) the weights are scattered back onto the
+    full image; pruned pixels get weight 0. Row k reshaped to (28, 28) is the
+    receptive field of neuron k.
+
+    Args:
+        w, i, j: Synaptic weights and their pre/post indices.
+        num_post: Number of postsynaptic neurons.
+        input_pixels: Pixel index per input neuron (None: input neuron k is pixel k).
+        num_pixels: Number of pixels of the full image.
+
+    Returns:
+        np.ndarray of shape (num_post, num_pixels).
+    """
+    i = np.asarray(i, dtype=np.int64)
+    if input_pixels is not None:
+        i = np.asarray(input_pixels, dtype=np.int64)[i]
+    fields = np.zeros((int(num_post), int(num_pixels)), dtype=float)
+    fields[np.asarray(j, dtype=np.int64), i] = np.asarray(w, dtype=float)
+    return fields
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import brian2 as b2
+
+from psinet.core import learning_rules, neuron, synapse
+
+CODEGEN_TARGETS = ('numpy', 'cython', 'auto')
+DEFAULT_CACHE_DIR = '~/.psinet_data/cache'
+
+
+def cython_available():
+    """
+    Probe whether Cython runtime code generation works on this machine.
+
+    Compiles a trivial extension through Brian2's own availability check, so a
+    missing Cython install or C compiler is detected before the network is built.
+    Does not change any Brian2 preference.
+    """
+    try:
+        from brian2.codegen.runtime.cython_rt import CythonCodeObject
+        return bool(CythonCodeObject.is_available())
+    except Exception as e:
+        logging.debug(f"Cython probe failed: {e}")
+        return False
+
+
+def select_codegen_target(requested='auto', cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Configure Brian2's runtime code generation target.
+
+    Args:
+        requested: 'numpy', 'cython' or 'auto' (cython if a compiler is available, else numpy).
+        cache_dir: Base cache directory; compiled Cython modules are shared under
+                   <cache_dir>/cython across runs and processes.
+
+    Returns:
+        The target that was actually selected ('numpy' or 'cython').
+    """
+    requested = str(requested).lower()
+    if requested not in CODEGEN_TARGETS:
+        raise ValueError(f"Unknown codegen_target '{requested}', expected one of {CODEGEN_TARGETS}")
+
+    target = 'numpy'
+    if requested in ('cython', 'auto'):
+        cython_dir = Path(cache_dir).expanduser().resolve() / 'cython'
+        cython_dir.mkdir(parents=True, exist_ok=True)
+        b2.prefs.codegen.runtime.cython.cache_dir = str(cython_dir)
+        if cython_available():
+            target = 'cython'
+        elif requested == 'cython':
+            logging.warning("codegen_target 'cython' requested but no working compiler/Cython found; "
+                            "falling back to 'numpy'.")
+
+    b2.prefs.codegen.target = target
+    logging.info(f"Brian2 runtime codegen target: {target} (requested: {requested})")
+    return target
+
+
+# ------------------------------ STANDALONE ---------------------------------
+# STDP settings that are passed to the compiled binary as run_args instead of
+# being baked into the generated code (placeholders are used at code generation).
+STDP_RUN_ARG_DEFAULTS = {
+    'w_max': 1.0,
+    'a_plus': 0.0,
+    'a_minus': 0.0,
+    'tau_plus_ms': 20.0,
+    'tau_minus_ms': 20.0,
+}
+
+
+def topology_hash(num_inputs, layers_config, connections_params, extra=()):
+    """
+    Hash of the network topology and equations: layer sizes and wiring, model
+    equations and the simulation dt. It selects the shared build directory; rates
+    and STDP amplitudes/time constants are excluded because they are passed as
+    run_args. Durations and the schedule length are also excluded, but they are
+    constants in the generated code, so changing them recompiles the affected
+    sources in the same directory instead of starting from scratch.
+    """
+    # Only the STDP variants in use, so adding a variant does not invalidate builds/checkpoints
+    modes_used = sorted({l.get('stdp_mode', 'clock') for l in layers_config}
+                        | {v.get('stdp_mode', 'clock') for v in (connections_params or {}).values()})
+    structure = {
+        'num_inputs': int(num_inputs),
+        'layers': [
+            {
+                'name': l.get('name'),
+                'num_excitatory': int(l.get('num_excitatory', 100)),
+                'num_inhibitory': int(l.get('num_inhibitory', 25)),
+                'enable_lateral_inhibition': bool(l.get('enable_lateral_inhibition', True)),
+                'lateral_strength': float(l.get('lateral_strength', 0.2)),
+                'stdp_mode': l.get('stdp_mode', 'clock'),
+                'e_to_e_connectivity': l.get('e_to_e_connectivity'),
+                'lateral_connectivity': l.get('lateral_connectivity'),
+                'lateral_inhibition_mode': l.get('lateral_inhibition_mode', 'synapses'),
+            }
+            for l in layers_config
+        ],
+        'connections': {
+            k: [float(v.get('initial_weight_max', 0.01)), v.get('stdp_mode', 'clock'), v.get('connectivity')]
+            for k, v in sorted((connections_params or {}).items())
+        },
+        'equations': [
+            {m: learning_rules.STDP_MODES.get(m) for m in modes_used},
+            neuron.LIF_ADAPTIVE_EQUATION, neuron.STDP_TRACE_EQUATION,
+            synapse.STATIC_SHARED_EQUATION, synapse.STATIC_ON_PRE,
+        ],
+        'dt': float(b2.defaultclock.dt / b2.second),
+        'float_dtype': b2.prefs.core.default_float_dtype.__name__,
+        'brian2': b2.__version__,
+        'extra': [str(e) for e in extra],
+    }
+    payload = json.dumps(structure, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def standalone_build_dir(cache_dir, key):
+    """Shared, topology-keyed directory for cpp_standalone code and binaries."""
+    path = Path(cache_dir).expanduser().resolve() / 'standalone' / key
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def placeholder_connections_params(connections_params):
+    """Copy of connections_params with STDP run-time parameters replaced by fixed placeholders."""
+    return {k: {**v, **STDP_RUN_ARG_DEFAULTS} for k, v in (connections_params or {}).items()}
+
+
+def stdp_run_args(hierarchy, connections_params):
+    """
+    Map the real STDP parameters onto the synapse variables of a built hierarchy,
+    in the form expected by ``device.build(..., run_args=...)``.
+    """
+    run_args = {}
+    for key, syn in hierarchy.connections.items():
+        p = {**STDP_RUN_ARG_DEFAULTS, **connections_params[key]}
+        s = syn.synapses
+        run_args[s.wmax] = p['w_max']
+        run_args[s.Apre] = p['a_plus']
+        run_args[s.Apost] = p['a_minus']
+        if 'taupre' in s.variables:
+            run_args[s.taupre] = p['tau_plus_ms'] * b2.ms
+            run_args[s.taupost] = p['tau_minus_ms'] * b2.ms
+    # 'neuron' mode keeps the trace time constants on the excitatory groups
+    real_params = {k: {**STDP_RUN_ARG_DEFAULTS, **v} for k, v in connections_params.items()}
+    for name, tau_ms in hierarchy.stdp_trace_taus(hierarchy.layers_config, real_params).items():
+        run_args[hierarchy.layers_by_name[name].excitatory_neurons.group.tau_stdp] = tau_ms * b2.ms
+    return run_args
+
+
+def timed_array_run_args(input_layer):
+    """
+    run_args for the TimedArrays of a scheduled input layer (rate table and slot table).
+
+    Values passed this way are written to content-addressed files, so concurrent runs
+    sharing a build directory never read each other's stimulus data.
+    """
+    namespace = getattr(input_layer, 'namespace', None) or {}
+    return {ta: b2.Quantity(ta.values, dim=ta.dim)
+            for ta in namespace.values() if isinstance(ta, b2.TimedArray)}
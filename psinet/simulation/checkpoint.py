@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+
+def hierarchy_state(hierarchy):
+    """
+    Collect the trainable/dynamic state of a Hierarchy as flat float32 arrays.
+
+    Keys: '<layer>/E/v', '<layer>/E/theta', '<layer>/I/v', '<layer>/I/theta',
+    '<layer>/e_to_e/w' for every layer and 'conn/<key>/w' for every inter-layer
+    connection. Each value is read with one bulk copy of the underlying array.
+    """
+    state = {}
+    for name in hierarchy.layers_in_order:
+        col = hierarchy.layers_by_name[name]
+        for tag, neurons in (('E', col.excitatory_neurons), ('I', col.inhibitory_neurons)):
+            for var in ('v', 'theta'):
+                state[f'{name}/{tag}/{var}'] = np.asarray(getattr(neurons.group, var + '_')[:], dtype=np.float32)
+        state[f'{name}/e_to_e/w'] = np.asarray(col.E_to_E_synapse.synapses.w_[:], dtype=np.float32)
+    for key, syn in hierarchy.connections.items():
+        state[f'conn/{key}/w'] = np.asarray(syn.synapses.w_[:], dtype=np.float32)
+    return state
+
+
+def _targets(hierarchy):
+    """Map every checkpoint key to the Brian2 group and variable it restores."""
+    targets = {}
+    for name in hierarchy.layers_in_order:
+        col = hierarchy.layers_by_name[name]
+        for tag, neurons in (('E', col.excitatory_neurons), ('I', col.inhibitory_neurons)):
+            for var in ('v', 'theta'):
+                targets[f'{name}/{tag}/{var}'] = (neurons.group, var)
+        targets[f'{name}/e_to_e/w'] = (col.E_to_E_synapse.synapses, 'w')
+    for key, syn in hierarchy.connections.items():
+        targets[f'conn/{key}/w'] = (syn.synapses, 'w')
+    return targets
+
+
+def save_checkpoint(path, hierarchy, topology_key, position, input_pixels=None):
+    """
+    Write a checkpoint (uncompressed .npz of float32 arrays plus JSON metadata).
+
+    The file is written under a temporary name and renamed, so an interrupted write
+    never replaces the previous checkpoint.
+
+    Args:
+        path: Target .npz file.
+        hierarchy: Built Hierarchy.
+        topology_key: Topology hash (see backend.topology_hash); checked on restore.
+        position: JSON-serializable schedule position (e.g. presented count, t_ms).
+        input_pixels: Pixel index of every input neuron if the input was pruned; stored
+            in the metadata so that resumed/evaluated networks rebuild the same input.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {'version': CHECKPOINT_VERSION, 'topology': topology_key, 'position': position}
+    if input_pixels is not None:
+        meta['input_pixels'] = [int(k) for k in input_pixels]
+    tmp = path.with_name(path.stem + '.tmp.npz')
+    with open(tmp, 'wb') as f:
+        np.savez(f, __meta__=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                 **hierarchy_state(hierarchy))
+    os.replace(tmp, path)
+    logging.info(f"Checkpoint written: {path} ({position})")
+
+
+def load_checkpoint(path):
+    """Return (arrays, meta) of a checkpoint written by save_checkpoint."""
+    with np.load(Path(path).expanduser(), allow_pickle=False) as data:
+        meta = json.loads(data['__meta__'].tobytes().decode('utf-8'))
+        arrays = {k: data[k] for k in data.files if k != '__meta__'}
+    if meta.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {meta.get('version')} in {path}")
+    return arrays, meta
+
+
+def restore_hierarchy(hierarchy, arrays, meta, topology_key):
+    """
+    Copy checkpoint arrays back into a Hierarchy built with the same topology.
+
+    Raises:
+        ValueError: If the topology hash, the set of arrays or any array size differs.
+    """
+    if meta['topology'] != topology_key:
+        raise ValueError(f"Checkpoint topology {meta['topology']} does not match the network ({topology_key})")
+    targets = _targets(hierarchy)
+    if set(targets) != set(arrays):
+        raise ValueError(f"Checkpoint arrays do not match the network: "
+                         f"missing {sorted(set(targets) - set(arrays))}, extra {sorted(set(arrays) - set(targets))}")
+    for key, (obj, var) in targets.items():
+        view = getattr(obj, var + '_')
+        if len(view) != arrays[key].size:
+            # e.g. unseeded random connectivity produced a different synapse count
+            raise ValueError(f"Checkpoint array '{key}' has {arrays[key].size} values, network has {len(view)}")
+        view[:] = arrays[key]
@@ -0,0 +1,143 @@
+import argparse
+import copy
+import json
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from psinet.simulation.analysis import spike_count_drift
+
+# Brian2's default time step
+DEFAULT_DT_MS = 0.1
+# Relative change of the total spike count above which a dt counts as drifting
+DEFAULT_DRIFT_TOLERANCE = 0.1
+
+
+def checked_interval_ms(interval_ms, dt_ms, name):
+    """
+    Validate the clock interval of an object running slower than the simulation.
+
+    Returns:
+        The interval in ms (float), or None if interval_ms is None.
+
+    Raises:
+        ValueError: If the interval is shorter than dt or not a whole number of steps
+            (the object would then sample off the simulation grid).
+    """
+    if interval_ms is None:
+        return None
+    interval_ms, dt_ms = float(interval_ms), float(dt_ms)
+    steps = interval_ms / dt_ms
+    if steps < 1 - 1e-9 or not math.isclose(steps, round(steps), rel_tol=0, abs_tol=1e-6):
+        raise ValueError(f"{name} must be a whole multiple of dt ({dt_ms} ms), got {interval_ms} ms")
+    return interval_ms
+
+
+def dt_variant(config, dt_ms, output_dir):
+    """Copy of config simulated with time step dt_ms; writes into output_dir, without plots or checkpoints."""
+    cfg = copy.deepcopy(config)
+    cfg['run_id'] = f"{config.get('run_id', 'run')}_dt{dt_ms:g}"
+    cfg.setdefault('simulation_params', {})['dt_ms'] = float(dt_ms)
+    cfg['simulation_params'].pop('checkpoint_every', None)
+    out_p = cfg.setdefault('output_params', {})
+    out_p.update(base_output_dir=str(Path(output_dir) / 'runs'), save_plots=False, save_checkpoint=False)
+    return cfg
+
+
+def run_counts(config, config_dir):
+    """
+    Worker: run one config in this (fresh) process and return its per-layer spike
+    counts ({layer: (digits x neurons)}), simulated steps and wall time.
+    """
+    from psinet.simulation.simulator import Simulator
+
+    config_path = Path(config_dir) / f"{config['run_id']}.yaml"
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    start = time.perf_counter()
+    sim = Simulator(config_path=str(config_path))
+    sim.build()
+    sim.run()
+    sim.save_results()
+    dt_ms = float(config['simulation_params']['dt_ms'])
+    return {
+        'counts': sim.spike_counts(),
+        'steps': int(round(sim.summary()['simulated_ms'] / dt_ms)),
+        'wall_s': round(time.perf_counter() - start, 3),
+        'output_dir': str(sim.output_dir),
+    }
+
+
+def check_dt_drift(config, reference_dt_ms, output_dir, dt_ms=None, tolerance=DEFAULT_DRIFT_TOLERANCE):
+    """
+    Spike-count accuracy of a time step: run config at dt_ms (default: its own
+    simulation_params.dt_ms) and at a finer reference_dt_ms, each in its own spawned
+    process, and compare the per-(digit, neuron) spike counts of every recorded
+    layer (see analysis.spike_count_drift). Writes <output_dir>/dt_drift.json.
+
+    Poisson input draws different spikes at every dt, so the counts only agree in
+    distribution; deterministic input encodings give a sharper comparison.
+
+    Returns:
+        The report dict (per-layer drift, steps and wall time of both runs, and
+        'ok': whether every layer's total count changed by at most tolerance).
+    """
+    output_dir = Path(output_dir)
+    config_dir = output_dir / 'configs'
+    config_dir.mkdir(parents=True, exist_ok=True)
+    if dt_ms is None:
+        dt_ms = float(config.get('simulation_params', {}).get('dt_ms', DEFAULT_DT_MS))
+    configs = {'test': dt_variant(config, dt_ms, output_dir),
+               'reference': dt_variant(config, reference_dt_ms, output_dir)}
+
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=2, mp_context=ctx, max_tasks_per_child=1) as pool:
+        futures = {name: pool.submit(run_counts, cfg, str(config_dir)) for name, cfg in configs.items()}
+        runs = {name: future.result() for name, future in futures.items()}
+
+    layers = {}
+    for layer, counts in runs['test']['counts'].items():
+        layers[layer] = spike_count_drift(counts, runs['reference']['counts'][layer])
+    report = {
+        'dt_ms': float(dt_ms),
+        'reference_dt_ms': float(reference_dt_ms),
+        'tolerance': float(tolerance),
+        'layers': layers,
+        'ok': all(abs(d['total_change']) <= tolerance for d in layers.values()),
+    }
+    for name, run in runs.items():
+        report[name] = {k: run[k] for k in ('steps', 'wall_s', 'output_dir')}
+    with open(output_dir / 'dt_drift.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    for layer, d in layers.items():
+        logging.info(f"dt={dt_ms} ms vs {reference_dt_ms} ms, {layer}: total spikes {d['total']} vs "
+                     f"{d['reference_total']} ({d['total_change']:+.1%}), count correlation {d['correlation']:.3f}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Spike-count drift of a simulation time step against a finer reference.")
+    parser.add_argument("config_file", type=str, help="YAML configuration file.")
+    parser.add_argument("--reference-dt-ms", type=float, default=DEFAULT_DT_MS / 2,
+                        help=f"Reference time step (default: {DEFAULT_DT_MS / 2}).")
+    parser.add_argument("--dt-ms", type=float, default=None,
+                        help="Tested time step (default: simulation_params.dt_ms of the config).")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_DRIFT_TOLERANCE,
+                        help=f"Allowed relative change of the total spike count (default: {DEFAULT_DRIFT_TOLERANCE}).")
+    parser.add_argument("--output-dir", type=str, default="dt_drift", help="Output directory (default: dt_drift).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.config_file) as f:
+        config = yaml.safe_load(f)
+    report = check_dt_drift(config, args.reference_dt_ms, args.output_dir, dt_ms=args.dt_ms, tolerance=args.tolerance)
+    raise SystemExit(0 if report['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
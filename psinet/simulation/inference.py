@@ -0,0 +1,240 @@
+import numpy as np
+
+# Brian2's SpikeGeneratorGroup shifts spike times by 1e-3 dt before binning them
+_SPIKE_BIN_SHIFT = 1e-3
+
+
+def _dense(synapses, n_pre, n_post):
+    """Dense (pre x post) weight matrix of a Brian2 Synapses object (per-synapse or shared w)."""
+    i = np.asarray(synapses.i[:], dtype=np.int64)
+    j = np.asarray(synapses.j[:], dtype=np.int64)
+    w = np.broadcast_to(np.asarray(synapses.w_[:], dtype=float), i.shape)
+    matrix = np.zeros((n_pre, n_post))
+    np.add.at(matrix, (i, j), w)
+    return matrix
+
+
+def _neuron_params(neurons):
+    group = neurons.group
+    return {
+        'n': int(group.N),
+        'tau_ms': np.array(group.tau_[:], dtype=float) * 1000.0,
+        'tau_theta_ms': np.array(group.tau_theta_[:], dtype=float) * 1000.0,
+        'theta': np.array(group.theta_[:], dtype=float),  # copy: the runtime array keeps changing
+        'threshold': neurons.threshold_initial,
+        'reset': neurons.reset_v,
+        'delta_theta': neurons.delta_theta,
+        'refractory_ms': float(neurons.refractory) * 1000.0,  # Quantity in seconds
+        # Coarser theta decay clock (None: every step)
+        'theta_interval_ms': None if neurons.theta_dt is None else float(neurons.theta_dt) * 1000.0,
+    }
+
+
+def export_hierarchy(hierarchy):
+    """
+    Export the frozen forward dynamics of a Hierarchy as plain NumPy arrays.
+
+    Returns:
+        List of per-layer dicts in build order: 'name', 'E'/'I' neuron parameters
+        (sizes, time constants, current theta, threshold/reset constants) and the
+        dense weight matrices 'ff' (previous layer's E or input -> E), 'ee' (E->E
+        STDP weights plus lateral inhibition), 'ei' (E->I) and 'ie' (I->E).
+    """
+    from psinet.network.inhibition import PopulationInhibition
+
+    layers = []
+    n_prev = int(hierarchy.input_layer.N)
+    connections = list(hierarchy.connections.values())
+    for name, conn in zip(hierarchy.layers_in_order, connections):
+        col = hierarchy.layers_by_name[name]
+        ne, ni = int(col.excitatory_neurons.group.N), int(col.inhibitory_neurons.group.N)
+        ee = _dense(col.E_to_E_synapse.synapses, ne, ne)
+        lateral = col.E_lateral_inhib
+        if isinstance(lateral, PopulationInhibition):
+            strength = float(np.asarray(lateral.broadcast.strength_[:]))
+            ee -= strength * (1.0 - np.eye(ne))
+        elif lateral is not None:
+            ee += _dense(lateral.synapses, ne, ne)
+        layers.append({
+            'name': name,
+            'E': _neuron_params(col.excitatory_neurons),
+            'I': _neuron_params(col.inhibitory_neurons),
+            'ff': _dense(conn.synapses, n_prev, ne),
+            'ee': ee,
+            'ei': _dense(col.E_to_I_synapse.synapses, ne, ni),
+            'ie': _dense(col.I_to_E_synapse.synapses, ni, ne),
+        })
+        n_prev = ne
+    return layers
+
+
+def _propagate(v, spikes, weights):
+    """v += spikes @ weights, summing only the weight rows of the neurons that spiked."""
+    b, k = np.nonzero(spikes)
+    if b.size == 0:
+        return
+    if b.size * 8 > spikes.size:
+        v += spikes.astype(weights.dtype) @ weights
+        return
+    rows, starts = np.unique(b, return_index=True)
+    v[rows] += np.add.reduceat(weights[k], starts, axis=0)
+
+
+class InferenceEngine:
+    """
+    Batched, pure-NumPy simulation of a trained (frozen) Hierarchy for evaluation.
+
+    B images are simulated at once as (B x N) state arrays. Every time step follows
+    Brian2's schedule: exact LIF/threshold decay (theta on its own clock if the
+    neurons use one), then thresholds of all groups, then synaptic propagation of
+    this step's spikes (v_post += w), then resets (v = reset, theta += delta_theta).
+    As in Brian2, v is an "unless refractory" variable: neither the decay nor
+    synaptic input change it while a neuron is refractory (including the step of
+    its spike). Propagation only gathers the weight rows of spiking neurons (a dense
+    product is used when spikes are not sparse).
+
+    Unlike the sequential Brian2 evaluation, every image starts from the exported
+    state (v = 0, exported theta, no refractoriness) instead of inheriting the
+    adaptation of the previous image, so counts agree in distribution, and exactly
+    for deterministic inputs presented to a freshly reset network.
+    """
+    def __init__(self, layers, dt_ms, dtype=np.float32):
+        """
+        Args:
+            layers: Per-layer arrays as returned by export_hierarchy.
+            dt_ms: Simulation time step (ms).
+            dtype: Floating point type of the state and weights.
+        """
+        self.layers = layers
+        self.dt_ms = float(dt_ms)
+        self.dtype = np.dtype(dtype)
+        self.names = [l['name'] for l in layers]
+        self.num_inputs = layers[0]['ff'].shape[0]
+        self._w = [{k: np.ascontiguousarray(l[k], dtype=self.dtype) for k in ('ff', 'ee', 'ei', 'ie')}
+                   for l in layers]
+
+    @classmethod
+    def from_hierarchy(cls, hierarchy, dt_ms=None, dtype=np.float32):
+        """Engine with the current weights and theta of a Brian2 Hierarchy (dt: Brian2's defaultclock)."""
+        if dt_ms is None:
+            import brian2 as b2
+            dt_ms = float(b2.defaultclock.dt / b2.ms)
+        return cls(export_hierarchy(hierarchy), dt_ms, dtype=dtype)
+
+    def _group_state(self, params, batch):
+        dt = self.dt_ms
+        theta_ms = params.get('theta_interval_ms') or dt
+        return {
+            'v': np.zeros((batch, params['n']), dtype=self.dtype),
+            'theta': np.tile(np.asarray(params['theta'], dtype=self.dtype), (batch, 1)),
+            'ready': np.zeros((batch, params['n']), dtype=np.int64),  # first non-refractory step
+            'decay_v': np.exp(-dt / params['tau_ms']).astype(self.dtype),
+            'decay_theta': np.exp(-theta_ms / params['tau_theta_ms']).astype(self.dtype),
+            'theta_steps': max(int(round(theta_ms / dt)), 1),
+            'refractory_steps': int(round(params['refractory_ms'] / dt)),
+        }
+
+    def run(self, duration_ms, rates_hz=None, spikes=None, num_images=None, readout=None,
+            min_spikes=0, check_interval_ms=5.0, seed=None):
+        """
+        Present a batch of images for duration_ms and count the readout spikes.
+
+        Args:
+            duration_ms: Presentation time (maximum time with early exit).
+            rates_hz: (B, inputs) Poisson rates, or
+            spikes: (rows, indices, times_ms) spike trains (see io.rates_to_spikes) together
+                with num_images.
+            readout: Layer whose excitatory spikes are counted (default: last layer).
+            min_spikes: Stop an image once its readout produced this many spikes, checked
+                every check_interval_ms (0: always run the full duration).
+            seed: Seed of the Poisson input.
+
+        Returns:
+            np.ndarray (B, readout size) of int32 spike counts.
+        """
+        if (rates_hz is None) == (spikes is None):
+            raise ValueError("Pass either rates_hz or spikes")
+        dt = self.dt_ms
+        n_steps = int(round(float(duration_ms) / dt))
+        out_layer = self.names.index(readout if readout is not None else self.names[-1])
+
+        if rates_hz is not None:
+            p_spike = np.asarray(rates_hz, dtype=np.float32) * np.float32(dt / 1000.0)
+            batch = p_spike.shape[0]
+            rng = np.random.default_rng(seed)
+        else:
+            rows, indices, times = (np.asarray(a) for a in spikes)
+            batch = int(num_images)
+            steps = ((times + _SPIKE_BIN_SHIFT * dt) / dt).astype(np.int64)
+            order = np.argsort(steps, kind='stable')
+            rows, indices, steps = rows[order], indices[order], steps[order]
+            bounds = np.searchsorted(steps, np.arange(n_steps + 1))
+
+        state = [{'E': self._group_state(l['E'], batch), 'I': self._group_state(l['I'], batch)}
+                 for l in self.layers]
+        counts = np.zeros((batch, self.layers[out_layer]['E']['n']), dtype=np.int32)
+        alive = np.arange(batch)                 # original image of every simulated row
+        position = np.arange(batch)              # simulated row of every original image (-1: done)
+        check_steps = max(int(round(float(check_interval_ms) / dt)), 1)
+
+        for step in range(n_steps):
+            if min_spikes > 0 and step and step % check_steps == 0:
+                done = counts[alive].sum(axis=1) >= min_spikes
+                if done.any():
+                    keep = ~done
+                    position[alive[done]] = -1
+                    alive = alive[keep]
+                    position[alive] = np.arange(alive.size)
+                    if rates_hz is not None:
+                        p_spike = p_spike[keep]
+                    for layer_state in state:
+                        for g in layer_state.values():
+                            for key in ('v', 'theta', 'ready'):
+                                g[key] = g[key][keep]
+                    if alive.size == 0:
+                        break
+
+            # Input spikes of this step
+            if rates_hz is not None:
+                s_in = rng.random(p_spike.shape, dtype=np.float32) < p_spike
+            else:
+                s_in = np.zeros((alive.size, self.num_inputs), dtype=bool)
+                r = position[rows[bounds[step]:bounds[step + 1]]]
+                ok = r >= 0
+                s_in[r[ok], indices[bounds[step]:bounds[step + 1]][ok]] = True
+
+            # State update and thresholds
+            fired = []
+            for layer, layer_state in zip(self.layers, state):
+                layer_spikes = {}
+                for tag in ('E', 'I'):
+                    g, params = layer_state[tag], layer[tag]
+                    active = g['ready'] <= step
+                    g['v'] = np.where(active, g['v'] * g['decay_v'], g['v'])
+                    if step % g['theta_steps'] == 0:
+                        g['theta'] *= g['decay_theta']
+                    layer_spikes[tag] = (g['v'] > g['theta'] + params['threshold']) & active
+                    g['open'] = active & ~layer_spikes[tag]
+                    g['dv'] = np.zeros_like(g['v'])
+                fired.append(layer_spikes)
+
+            # Synaptic propagation of this step's spikes (only into non-refractory neurons)
+            pre = s_in
+            for w, layer_state, layer_spikes in zip(self._w, state, fired):
+                dv_e, dv_i = layer_state['E']['dv'], layer_state['I']['dv']
+                _propagate(dv_e, pre, w['ff'])
+                _propagate(dv_e, layer_spikes['E'], w['ee'])
+                _propagate(dv_e, layer_spikes['I'], w['ie'])
+                _propagate(dv_i, layer_spikes['E'], w['ei'])
+                pre = layer_spikes['E']
+
+            # Resets
+            for layer, layer_state, layer_spikes in zip(self.layers, state, fired):
+                for tag in ('E', 'I'):
+                    g, params, s = layer_state[tag], layer[tag], layer_spikes[tag]
+                    g['v'] += np.where(g['open'], g['dv'], 0)
+                    g['v'][s] = params['reset']
+                    g['theta'][s] += params['delta_theta']
+                    g['ready'][s] = step + g['refractory_steps']
+            counts[alive] += fired[out_layer]['E']
+        return counts
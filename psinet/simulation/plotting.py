@@ -0,0 +1,255 @@
+"""
+Result figures. Imported lazily by Simulator.save_results so that importing the
+simulator core does not load matplotlib's plotting stack; figures are built with
+the object-oriented API (no pyplot state, no global backend switch).
+
+Also runnable as ``python -m psinet.simulation.plotting raw_data.npz final_plot.png
+--num-l1 N [--num-l2 M] [--decimate]`` to render from saved raw data in a separate
+process (see output_params.plot_in_background).
+"""
+import argparse
+import logging
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+from psinet.simulation.analysis import spike_counts_per_digit
+
+
+DEFAULT_RASTER_BINS = 1000
+DEFAULT_TRACE_POINTS = 2000
+
+
+def decimate_trace(t, w, max_points=DEFAULT_TRACE_POINTS):
+    """
+    Downsample (t, w) traces to at most ``max_points`` samples per trace.
+
+    Every bucket of consecutive samples is replaced by its minimum and maximum (at
+    the bucket's first time), so short excursions such as STDP jumps stay visible.
+
+    Args:
+        t: (T,) sample times.
+        w: (T,) or (T, traces) values.
+        max_points: Point budget per trace (at least 2).
+
+    Returns:
+        (t, w) with at most max_points rows.
+    """
+    t, w = np.asarray(t), np.asarray(w)
+    if len(t) <= max_points:
+        return t, w
+    starts = np.linspace(0, len(t), max(int(max_points) // 2, 1), endpoint=False).astype(np.int64)
+    low = np.minimum.reduceat(w, starts, axis=0)
+    high = np.maximum.reduceat(w, starts, axis=0)
+    return np.repeat(t[starts], 2), np.stack([low, high], axis=1).reshape((-1,) + w.shape[1:])
+
+
+def raster_image(t, i, num_neurons, t_max, time_bins=DEFAULT_RASTER_BINS, neuron_bins=DEFAULT_RASTER_BINS):
+    """
+    Spike counts of a raster binned into a (neuron bins x time bins) image.
+
+    Returns:
+        (counts, extent) for ``imshow(counts, extent=extent, origin='lower')``.
+    """
+    num_neurons = max(int(num_neurons), 1)
+    t_max = max(float(t_max), 1e-9)
+    counts, _, _ = np.histogram2d(np.asarray(i, dtype=float), np.asarray(t, dtype=float),
+                                  bins=(min(num_neurons, int(neuron_bins)), int(time_bins)),
+                                  range=((0, num_neurons), (0, t_max)))
+    return counts, (0.0, t_max, 0.0, float(num_neurons))
+
+
+def _raster(ax, t, i, num_neurons, t_max, decimate, time_bins):
+    if decimate:
+        counts, extent = raster_image(t, i, num_neurons, t_max, time_bins=time_bins)
+        ax.imshow(np.log1p(counts), extent=extent, origin='lower', aspect='auto',
+                  cmap='gray_r', interpolation='nearest')
+    else:
+        ax.plot(t, i, '.k', markersize=1)
+
+
+def plot_final_results(path, win, spikes_l1, num_l1, weights_inp_l1=None,
+                       spikes_l2=None, num_l2=None, weights_l1_l2=None,
+                       decimate=False, raster_bins=DEFAULT_RASTER_BINS, max_trace_points=DEFAULT_TRACE_POINTS):
+    """
+    Write the summary figure (rasters, digit preference/selectivity, sampled weights).
+
+    Args:
+        path: Output image file.
+        win: {digit: (K, 2) array of [t0, t1) windows in ms}.
+        spikes_l1, spikes_l2: (t_ms, i) spike arrays of L1 / L2 (L2 optional).
+        num_l1, num_l2: Number of excitatory neurons of L1 / L2.
+        weights_inp_l1, weights_l1_l2: Optional (t_ms, w) sampled weight traces.
+        decimate: Draw rasters as binned (log-count) images with ``raster_bins`` time
+            bins and min/max-downsample weight traces to ``max_trace_points``; cost
+            and memory no longer grow with the number of spikes and samples.
+    """
+    t1, i1 = spikes_l1
+    N1 = num_l1
+    if decimate:
+        weights_inp_l1 = None if weights_inp_l1 is None else decimate_trace(*weights_inp_l1, max_trace_points)
+        weights_l1_l2 = None if weights_l1_l2 is None else decimate_trace(*weights_l1_l2, max_trace_points)
+    # Common time axis of the binned rasters: up to the last spike or presentation window
+    ends = [float(np.max(t)) for t in (t1, None if spikes_l2 is None else spikes_l2[0]) if t is not None and len(t)]
+    ends += [float(np.max(w)) for w in win.values() if np.size(w)]
+    t_max = max(ends, default=1.0)
+
+    # Per-digit counts for L1 (if classic two-digit, still works)
+    digit_keys = list(win.keys())
+    mat_l1 = spike_counts_per_digit(t1, i1, win, N1, digits=[int(d) for d in digit_keys])
+    counts_per_digit = dict(zip(digit_keys, mat_l1))
+
+    # Prepare figure with optional L2
+    has_l2 = spikes_l2 is not None
+    fig_rows = 3 if has_l2 else 2
+    fig = Figure(figsize=(18 if has_l2 else 14, 6 + 3*fig_rows))
+    axes = fig.subplots(fig_rows, 3 if has_l2 else 2)
+
+    # L1 raster
+    _raster(axes[0, 0], t1, i1, N1, t_max, decimate, raster_bins)
+    axes[0, 0].set_title('L1 Spikes')
+    axes[0, 0].set_xlabel('Time (ms)')
+    axes[0, 0].set_ylabel('Neuron index')
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Simple preference plot for two digits if present, else sum top/bottom
+    if len(counts_per_digit) == 2:
+        digits = sorted(counts_per_digit.keys())
+        pref = counts_per_digit[digits[0]] - counts_per_digit[digits[1]]
+        colors = np.where(pref >= 0, 'tab:red', 'tab:blue')
+        axes[0, 1].bar(np.arange(N1), pref, color=colors, width=0.9)
+        axes[0, 1].set_title(f'Preference (pos: {digits[0]}, neg: {digits[1]})')
+        axes[0, 1].axhline(0, color='k', linewidth=0.8)
+    else:
+        total_counts = np.sum(np.stack(list(counts_per_digit.values()), axis=0), axis=0)
+        axes[0, 1].bar(np.arange(N1), total_counts, color='tab:gray', width=0.9)
+        axes[0, 1].set_title('L1 total spike counts (all digits)')
+
+    # Weight dynamics (Input->L1)
+    if weights_inp_l1 is not None:
+        axes[1, 0].plot(*weights_inp_l1, alpha=0.7, linewidth=0.8)
+        axes[1, 0].set_title('Input→L1 weight dynamics (sampled)')
+        axes[1, 0].set_xlabel('Time (ms)')
+        axes[1, 0].set_ylabel('w')
+        axes[1, 0].grid(True, alpha=0.3)
+
+    # Summary text / L2 or L1->L2 weights
+    if has_l2:
+        t2, i2 = spikes_l2
+        num_raster_l2 = num_l2 if num_l2 is not None else int(np.max(i2, initial=0)) + 1
+        _raster(axes[1, 1], t2, i2, num_raster_l2, t_max, decimate, raster_bins)
+        axes[1, 1].set_title('L2 Spikes')
+        axes[1, 1].set_xlabel('Time (ms)')
+        axes[1, 1].set_ylabel('Neuron index')
+        axes[1, 1].grid(True, alpha=0.3)
+
+        # L1->L2 weight dynamics if present
+        if weights_l1_l2 is not None:
+            axes[2, 0].plot(*weights_l1_l2, alpha=0.7, linewidth=0.8)
+            axes[2, 0].set_title('L1→L2 weight dynamics (sampled)')
+            axes[2, 0].set_xlabel('Time (ms)')
+            axes[2, 0].set_ylabel('w')
+
+        # Enhanced L2 selectivity analysis and bar plot
+        N2 = num_l2
+        if N2 is not None:
+            # Calculate L2 spike counts per digit (indices >= N2 are ignored)
+            digits_sorted = sorted(win.keys())
+            mat = spike_counts_per_digit(t2, i2, win, N2,
+                                         digits=[int(d) for d in digits_sorted]).T  # shape (N2, num_digits)
+
+            # Find preferred digit for each L2 neuron
+            pref_digit_idx = np.argmax(mat, axis=1)
+            pref_digit = np.array(digits_sorted)[pref_digit_idx]
+            pref_count = mat[np.arange(N2), pref_digit_idx]
+
+            # Enhanced L2 selectivity bar chart
+            ax_sel = axes[1, 2]
+            cmap = colormaps['tab10']
+            colors = [cmap(int(d) % 10) for d in pref_digit]
+
+            # Create bar chart with enhanced visualization
+            ax_sel.bar(np.arange(N2), pref_count, color=colors, width=0.9)
+            ax_sel.set_title('L2 Neuron Selectivity Analysis\n(Bar color = Preferred Digit, Height = Spike Count)',
+                             fontsize=10, fontweight='bold')
+            ax_sel.set_xlabel('L2 Neuron Index', fontsize=9)
+            ax_sel.set_ylabel('Spike Count for Preferred Digit', fontsize=9)
+            ax_sel.grid(True, alpha=0.3, axis='y')
+
+            # Add colorbar legend mapping digits to colors
+            sm = ScalarMappable(cmap=cmap, norm=Normalize(vmin=0, vmax=9))
+            sm.set_array([])
+            cbar = fig.colorbar(sm, ax=ax_sel, fraction=0.046, pad=0.04)
+            cbar.set_ticks(np.arange(10))
+            cbar.set_ticklabels([str(d) for d in range(10)])
+            cbar.set_label('Digit', fontsize=9)
+
+            # Add statistics text
+            digit_specialists = {d: np.sum(pref_digit == d) for d in digits_sorted}
+            max_specialists = max(digit_specialists.values())
+            most_specialized_digit = [d for d, count in digit_specialists.items() if count == max_specialists][0]
+
+            stats_text = f"Total L2 neurons: {N2}\n"
+            stats_text += f"Most specialized digit: {most_specialized_digit} ({max_specialists} neurons)\n"
+            stats_text += f"Digit specialists: " + ", ".join([f"{d}:{count}" for d, count in digit_specialists.items()])
+
+            ax_sel.text(0.02, 0.98, stats_text, transform=ax_sel.transAxes,
+                        fontsize=8, verticalalignment='top',
+                        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+
+            axes[2, 0].grid(True, alpha=0.3)
+
+        # Summary text
+        text = (f"L1: spikes={len(t1)}, active={len(np.unique(i1))}/{N1}\n"
+                f"L2: spikes={len(t2)}, active={len(np.unique(i2))}")
+        axes[2, 1].axis('off')
+        axes[2, 1].text(0.05, 0.9, text, fontsize=12, va='top')
+    else:
+        # No L2: put summary in bottom-right
+        text = f"L1: spikes={len(t1)}, active={len(np.unique(i1))}/{N1}"
+        axes[1, 1].axis('off')
+        axes[1, 1].text(0.05, 0.9, text, fontsize=12, va='top')
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=150, bbox_inches='tight')
+
+
+def plot_from_raw(raw_path, path, num_l1, num_l2=None, decimate=True,
+                  raster_bins=DEFAULT_RASTER_BINS, max_trace_points=DEFAULT_TRACE_POINTS):
+    """Render the summary figure from a saved raw_data.npz (see Simulator.save_results)."""
+    with np.load(raw_path, allow_pickle=True) as raw:
+        data = {k: raw[k] for k in raw.files}
+    win = data['windows_per_digit'].item()
+
+    def pair(a, b):
+        return (data[a], data[b]) if a in data and b in data else None
+
+    spikes_l2 = pair('L2_t_ms', 'L2_i')
+    plot_final_results(path, win, pair('L1_t_ms', 'L1_i'), num_l1,
+                       weights_inp_l1=pair('w_inp_l1_t_ms', 'w_inp_l1'),
+                       spikes_l2=spikes_l2, num_l2=num_l2 if spikes_l2 is not None else None,
+                       weights_l1_l2=pair('w_l1_l2_t_ms', 'w_l1_l2') if spikes_l2 is not None else None,
+                       decimate=decimate, raster_bins=raster_bins, max_trace_points=max_trace_points)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render final_plot.png from a saved raw_data.npz.")
+    parser.add_argument('raw_data', help="raw_data.npz written by Simulator.save_results.")
+    parser.add_argument('output', help="Output image file.")
+    parser.add_argument('--num-l1', type=int, required=True, help="Excitatory neurons in L1.")
+    parser.add_argument('--num-l2', type=int, default=None, help="Excitatory neurons in L2.")
+    parser.add_argument('--decimate', action='store_true', help="Binned rasters and downsampled weight traces.")
+    parser.add_argument('--raster-bins', type=int, default=DEFAULT_RASTER_BINS)
+    parser.add_argument('--max-trace-points', type=int, default=DEFAULT_TRACE_POINTS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    plot_from_raw(args.raw_data, args.output, args.num_l1, args.num_l2, decimate=args.decimate,
+                  raster_bins=args.raster_bins, max_trace_points=args.max_trace_points)
+    logging.info(f"Plot written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
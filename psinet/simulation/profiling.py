@@ -0,0 +1,146 @@
+import json
+import resource
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import brian2 as b2
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc; falls back to the peak)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is in kB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class PhaseProfiler:
+    """
+    Opt-in wall-time and memory bookkeeping for the phases of a Simulator run.
+
+    ``with profiler.phase('run'): ...`` (or ``profiler.lap('hierarchy_build')`` for
+    consecutive sections) accumulates calls, total and maximum wall time and the
+    RSS change per phase name. Brian2's per-code-object
+    times (``run(..., profile=True)``) are summed with ``add_brian2_profile`` because
+    Brian2 replaces them on every ``run()`` call.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.codeobject_s = {}
+        self._lap_t = time.perf_counter()
+        self._lap_rss = current_rss_mb()
+
+    def lap(self, name=None):
+        """Record the time since the previous lap as phase ``name`` (None only restarts the clock)."""
+        t, rss = time.perf_counter(), current_rss_mb()
+        if name is not None:
+            self.record(name, t - self._lap_t, rss - self._lap_rss)
+        self._lap_t, self._lap_rss = t, rss
+
+    @contextmanager
+    def phase(self, name):
+        rss0 = current_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, current_rss_mb() - rss0)
+
+    def record(self, name, seconds, rss_delta_mb=0.0):
+        p = self.phases.setdefault(name, {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'rss_delta_mb': 0.0})
+        p['calls'] += 1
+        p['total_s'] += seconds
+        p['max_s'] = max(p['max_s'], seconds)
+        p['rss_delta_mb'] += rss_delta_mb
+
+    def add_brian2_profile(self, profiling_info):
+        """Accumulate [(codeobject_name, time), ...] as reported by Network.profiling_info."""
+        for name, t in profiling_info:
+            self.codeobject_s[name] = self.codeobject_s.get(name, 0.0) + float(t)
+
+
+def read_standalone_profile(results_dir):
+    """Parse cpp_standalone's profiling_info.txt ('<codeobject> <seconds>' per line)."""
+    path = Path(results_dir) / 'profiling_info.txt'
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [(key, float(val)) for key, val in (line.split() for line in f if line.strip())]
+
+
+def component_names(hierarchy, monitors):
+    """
+    Map Brian2 object names to PSINet components, e.g. 'L1/E', 'L1/E->E',
+    'L1/lateral', 'inp_l1', 'input', 'monitor:spikes_L1'.
+    """
+    names = {hierarchy.input_layer.name: 'input'}
+    for layer in hierarchy.layers_in_order:
+        col = hierarchy.layers_by_name[layer]
+        names[col.excitatory_neurons.group.name] = f'{layer}/E'
+        names[col.inhibitory_neurons.group.name] = f'{layer}/I'
+        names[col.E_to_E_synapse.synapses.name] = f'{layer}/E->E'
+        names[col.E_to_I_synapse.synapses.name] = f'{layer}/E->I'
+        names[col.I_to_E_synapse.synapses.name] = f'{layer}/I->E'
+        lateral = col.E_lateral_inhib
+        if lateral is not None:
+            objs = lateral.all_objects if hasattr(lateral, 'all_objects') else [lateral.synapses]
+            for obj in objs:
+                names[obj.name] = f'{layer}/lateral'
+    for key, syn in hierarchy.connections.items():
+        names[syn.synapses.name] = key
+    for key, mon in monitors.items():
+        names[mon.name] = f'monitor:{key}'
+    return names
+
+
+def aggregate_by_component(codeobject_s, names):
+    """
+    Sum code object times per component. Profiled code objects are named after
+    their owner ('<object name>' or '<object name>_<role>'); the longest matching
+    object name wins, so e.g. 'synapses_1' and 'synapses_10' are not confused.
+    """
+    by_length = sorted(names, key=len, reverse=True)
+    totals = {}
+    for code_name, seconds in codeobject_s.items():
+        owner = next((n for n in by_length if code_name == n or code_name.startswith(n + '_')), None)
+        component = names[owner] if owner is not None else 'other'
+        totals[component] = totals.get(component, 0.0) + seconds
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def monitor_sizes(monitors):
+    """Number of stored entries and approximate bytes held by each monitor."""
+    sizes = {}
+    for key, mon in monitors.items():
+        n = int(mon.variables['N'].get_value())
+        if isinstance(mon, b2.StateMonitor):
+            per_entry = 8 + 8 * len(mon.record) * len(mon.recorded_variables)  # t + values
+        else:
+            per_entry = 12 if mon.record else 0  # float64 t + int32 i
+        sizes[key] = {'entries': n, 'bytes': n * per_entry}
+    return sizes
+
+
+def write_report(path, profiler, hierarchy, monitors, extra=None):
+    """Write the machine-readable profile report (JSON)."""
+    names = component_names(hierarchy, monitors)
+    report = {
+        'phases': profiler.phases,
+        'peak_rss_mb': peak_rss_mb(),
+        'brian2_components_s': aggregate_by_component(profiler.codeobject_s, names),
+        'brian2_codeobjects_s': dict(sorted(profiler.codeobject_s.items(), key=lambda i: i[1], reverse=True)),
+        'monitors': monitor_sizes(monitors),
+    }
+    report.update(extra or {})
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=lambda o: o.item() if isinstance(o, np.generic) else str(o))
+    return report
@@ -0,0 +1,92 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import brian2 as b2
+
+
+class SegmentStore:
+    """
+    Appendable on-disk array store: every flush writes one ``.npy`` segment per field.
+
+    Layout: ``<directory>/<name>/<field>_<segment:06d>.npy``. Segments of a field are
+    concatenated along the first axis when loaded; ``mmap=True`` memory-maps them so
+    only the segments that are actually indexed are read.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._next_segment = {}
+
+    def append(self, name, **fields):
+        """Write one segment for each field of ``name`` (all fields share the segment number)."""
+        seg = self._next_segment.get(name, 0)
+        folder = self.directory / name
+        folder.mkdir(parents=True, exist_ok=True)
+        for field, array in fields.items():
+            np.save(folder / f'{field}_{seg:06d}.npy', np.asarray(array))
+        self._next_segment[name] = seg + 1
+
+    def segments(self, name, field, mmap=True):
+        """List of the segments of one field, in write order."""
+        files = sorted((self.directory / name).glob(f'{field}_[0-9]*.npy'))
+        return [np.load(f, mmap_mode='r' if mmap else None) for f in files]
+
+    def load(self, name, field, empty_shape=(0,), dtype=float):
+        """Concatenate all segments of one field."""
+        parts = self.segments(name, field)
+        if not parts:
+            return np.empty(empty_shape, dtype=dtype)
+        return np.concatenate(parts, axis=0)
+
+
+class DiskRecorder:
+    """
+    Moves the contents of spike and weight monitors to a SegmentStore in chunks.
+
+    A network operation flushes every ``flush_interval``: the recorded data is written
+    as new segments and the monitors are emptied, so peak memory is bounded by what
+    accumulates within one interval regardless of the run length (runtime device only).
+    """
+    def __init__(self, directory, flush_interval=1000*b2.ms):
+        self.store = SegmentStore(directory)
+        self.spike_monitors = {}
+        self.weight_monitors = {}
+        self.operation = b2.NetworkOperation(self.flush, dt=flush_interval, when='end')
+
+    def add_spike_monitor(self, name, monitor):
+        self.spike_monitors[name] = monitor
+
+    def add_weight_monitor(self, name, monitor):
+        self.weight_monitors[name] = monitor
+
+    def flush(self):
+        """Write everything recorded since the last flush and clear the monitors."""
+        for name, mon in self.spike_monitors.items():
+            n = int(mon.variables['N'].get_value())
+            if n == 0:
+                continue
+            self.store.append(name, t_ms=np.asarray(mon.t_[:n] * 1000.0, dtype=float),
+                              i=np.asarray(mon.i[:n], dtype=np.int32))
+            mon.resize(0)
+            mon.variables['N'].set_value(0)
+        for name, mon in self.weight_monitors.items():
+            n = int(mon.variables['N'].get_value())
+            if n == 0:
+                continue
+            # (samples, synapses) like the in-memory ``w.T``; float32 halves the footprint
+            self.store.append(name, t_ms=np.asarray(mon.t_[:n] * 1000.0, dtype=float),
+                              w=np.asarray(mon.w[:, :n].T, dtype=np.float32))
+            mon.resize(0)
+        logging.debug(f"Recordings flushed to {self.store.directory}")
+
+    def spikes(self, name):
+        """(t_ms, i) of all flushed spikes of a monitor."""
+        return (self.store.load(name, 't_ms'),
+                self.store.load(name, 'i', dtype=np.int32))
+
+    def weights(self, name):
+        """(t_ms, w) of all flushed weight samples; w has shape (samples, synapses)."""
+        n_syn = len(self.weight_monitors[name].record) if name in self.weight_monitors else 0
+        return (self.store.load(name, 't_ms'),
+                self.store.load(name, 'w', empty_shape=(0, n_syn), dtype=np.float32))
@@ -0,0 +1,182 @@
+import logging
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+
+def plastic_synapses(hierarchy):
+    """Synapses objects with STDP weights, in a fixed order: E->E of every layer, then inter-layer connections."""
+    synapses = [hierarchy.layers_by_name[name].E_to_E_synapse.synapses for name in hierarchy.layers_in_order]
+    return synapses + [conn.synapses for conn in hierarchy.connections.values()]
+
+
+def plastic_size(hierarchy):
+    """Total number of plastic weights of a Hierarchy."""
+    return int(sum(len(s.w_[:]) for s in plastic_synapses(hierarchy)))
+
+
+class ReplicaGroup:
+    """
+    Weight exchange between K data-parallel training replicas, one per process.
+
+    Every replica owns one row of a (K x weights) float64 array in shared memory.
+    A merge writes the replica's plastic weights into its row, waits for all
+    replicas, loads the mean over the rows back into its network and waits again
+    (so no row is overwritten while another replica is still reading). Replica 0
+    (the parent Simulator) creates the shared block and the barrier; the workers
+    attach to them by name.
+
+    If any replica fails, it aborts the barrier so that the others stop with an
+    error instead of waiting forever.
+    """
+    def __init__(self, index, count, size, shm_name, barrier, merge_every, output_dir):
+        """
+        Args:
+            index: This replica (0: parent).
+            count: Number of replicas K.
+            size: Number of plastic weights per replica.
+            shm_name: Name of the shared memory block (K x size float64).
+            barrier: multiprocessing.Barrier shared by all K replicas.
+            merge_every: Presentations per replica between merges.
+            output_dir: Output directory of the parent run (worker logs go there).
+        """
+        self.index = int(index)
+        self.count = int(count)
+        self.size = int(size)
+        self.shm_name = shm_name
+        self.barrier = barrier
+        self.merge_every = int(merge_every)
+        self.output_dir = Path(output_dir)
+        self.merges = 0
+        self._shm = None
+        self._rows = None
+        self._processes = []
+
+    @classmethod
+    def create(cls, count, size, merge_every, output_dir):
+        """Parent side: allocate the shared block and the barrier (replica 0)."""
+        shm = shared_memory.SharedMemory(create=True, size=int(count) * int(size) * 8)
+        barrier = multiprocessing.get_context('spawn').Barrier(int(count))
+        group = cls(0, count, size, shm.name, barrier, merge_every, output_dir)
+        group._attach(shm)
+        return group
+
+    def _attach(self, shm=None):
+        self._shm = shm if shm is not None else shared_memory.SharedMemory(name=self.shm_name)
+        self._rows = np.ndarray((self.count, self.size), dtype=np.float64, buffer=self._shm.buf)
+
+    def __getstate__(self):
+        # Workers receive the names, not the mapped block or process handles
+        state = dict(self.__dict__)
+        state.update(_shm=None, _rows=None, _processes=[])
+        return state
+
+    def worker(self, index):
+        """Copy of this group as seen by replica `index`."""
+        return ReplicaGroup(index, self.count, self.size, self.shm_name, self.barrier, self.merge_every,
+                            self.output_dir)
+
+    def _wait(self):
+        try:
+            self.barrier.wait()
+        except threading.BrokenBarrierError:
+            raise RuntimeError(f"Replica {self.index}: another training replica failed "
+                               f"(see {self.output_dir}/replica_*.log)") from None
+
+    def _read(self, hierarchy, row):
+        start = 0
+        for syn in plastic_synapses(hierarchy):
+            w = syn.w_[:]
+            row[start:start + len(w)] = w
+            start += len(w)
+
+    def _write(self, hierarchy, values):
+        start = 0
+        for syn in plastic_synapses(hierarchy):
+            n = len(syn.w_[:])
+            syn.w_[:] = values[start:start + n]
+            start += n
+
+    def broadcast(self, hierarchy):
+        """Start every replica from the weights of replica 0."""
+        if self._rows is None:
+            self._attach()
+        if plastic_size(hierarchy) != self.size:
+            self.abort()
+            raise ValueError(f"Replica {self.index} has {plastic_size(hierarchy)} plastic weights, replica 0 has "
+                             f"{self.size} (random connectivity needs network_params.seed)")
+        if self.index == 0:
+            self._read(hierarchy, self._rows[0])
+        self._wait()
+        if self.index != 0:
+            self._write(hierarchy, self._rows[0])
+        self._wait()
+
+    def merge(self, hierarchy):
+        """Replace the plastic weights of every replica by their mean over all replicas."""
+        self._read(hierarchy, self._rows[self.index])
+        self._wait()
+        self._write(hierarchy, self._rows.mean(axis=0))
+        self._wait()
+        self.merges += 1
+
+    def abort(self):
+        self.barrier.abort()
+
+    def start_workers(self, config_path):
+        """Parent side: launch replicas 1..K-1 in freshly spawned processes."""
+        ctx = multiprocessing.get_context('spawn')
+        for k in range(1, self.count):
+            process = ctx.Process(target=run_replica, args=(str(config_path), self.worker(k)),
+                                  name=f'psinet-replica-{k}')
+            process.start()
+            self._processes.append(process)
+        logging.info(f"Started {self.count - 1} training replicas (merge every {self.merge_every} presentations)")
+
+    def close(self, timeout=30.0):
+        """
+        Join the workers (terminating them if they do not exit within timeout seconds
+        after an abort) and release the shared block.
+
+        Returns:
+            Names of the worker processes that did not exit cleanly.
+        """
+        for process in self._processes:
+            process.join(timeout if self.barrier.broken else None)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        failed = [p.name for p in self._processes if p.exitcode != 0]
+        self._processes = []
+        self._rows = None
+        if self._shm is not None:
+            self._shm.close()
+            if self.index == 0:
+                self._shm.unlink()
+            self._shm = None
+        return failed
+
+
+def run_replica(config_path, group):
+    """
+    Worker process: build the configured network as replica `group.index`, train on
+    its shard of the stream and merge with the other replicas. Nothing is saved;
+    the log goes to <parent output>/replica_<k>.log.
+    """
+    logging.basicConfig(level=logging.INFO, filename=str(group.output_dir / f'replica_{group.index}.log'),
+                        format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    from psinet.simulation.simulator import Simulator
+
+    try:
+        sim = Simulator(config_path=config_path, replica=group)
+        sim.build()
+        sim.run()
+    except BaseException:
+        logging.exception(f"Replica {group.index} failed")
+        group.abort()
+        raise
+    finally:
+        group.close()
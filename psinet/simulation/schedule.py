@@ -0,0 +1,115 @@
+import logging
+import math
+import random
+
+import numpy as np
+
+
+def build_presentation_sequence(digits_list, cycles, shuffle=False):
+    """
+    Build the flat order in which patterns are presented over all cycles.
+
+    Args:
+        digits_list: Pattern keys (digits) presented once per cycle.
+        cycles: Number of cycles.
+        shuffle: If True, each cycle presents the digits in a fresh random order
+                 (same behaviour as ``present_all_digits``).
+
+    Returns:
+        List of pattern keys, one entry per presentation.
+    """
+    sequence = []
+    for _ in range(int(cycles)):
+        seq = list(digits_list)
+        if shuffle:
+            random.shuffle(seq)
+        sequence.extend(seq)
+    return sequence
+
+
+class CompiledSchedule:
+    """
+    Show/rest presentation sequence compiled into a time-indexed lookup table.
+
+    The input layer reads ``slot_pattern[t // slot_dt]`` to find which row of the
+    rate table is active; the last row of the rate table is reserved for silence.
+    The whole sequence can therefore be simulated with a single ``Network.run()``.
+    """
+    def __init__(self, sequence, pattern_keys, show_ms, rest_ms, dt_ms=0.1):
+        """
+        Args:
+            sequence: Pattern keys in presentation order (see build_presentation_sequence).
+            pattern_keys: Ordered keys; the row of each key in the rate table.
+            show_ms: Presentation duration per pattern (ms).
+            rest_ms: Silence duration after each pattern (ms).
+            dt_ms: Simulation time step (ms). Durations are rounded to whole steps, so
+                   the slot width is never smaller than one step.
+        """
+        self.sequence = list(sequence)
+        self.pattern_keys = list(pattern_keys)
+
+        # Work on the integer dt grid so that the slot width divides both phases exactly
+        show_steps = int(round(float(show_ms) / dt_ms))
+        rest_steps = int(round(float(rest_ms) / dt_ms))
+        if show_steps <= 0:
+            raise ValueError("duration_per_pattern_ms must be at least one time step for a compiled schedule")
+        if rest_steps < 0:
+            raise ValueError("silence_period_ms must not be negative")
+        self.show_ms = round(show_steps * dt_ms, 9)
+        self.rest_ms = round(rest_steps * dt_ms, 9)
+        if not (math.isclose(self.show_ms, float(show_ms)) and math.isclose(self.rest_ms, float(rest_ms))):
+            logging.warning(f"Compiled schedule: durations rounded to dt={dt_ms} ms "
+                            f"(show={self.show_ms} ms, rest={self.rest_ms} ms)")
+        slot_steps = math.gcd(show_steps, rest_steps)
+        self.slot_ms = round(slot_steps * dt_ms, 9)
+        self.show_slots = show_steps // slot_steps
+        self.rest_slots = rest_steps // slot_steps
+
+        row_of = {k: r for r, k in enumerate(self.pattern_keys)}
+        self.silence_row = len(self.pattern_keys)
+        block = np.empty((len(self.sequence), self.show_slots + self.rest_slots), dtype=float)
+        block[:, :self.show_slots] = np.array([row_of[k] for k in self.sequence], dtype=float)[:, None]
+        block[:, self.show_slots:] = self.silence_row
+        # Trailing silence slot: TimedArray clamps to its last value past the end
+        self.slot_pattern = np.append(block.ravel(), float(self.silence_row))
+
+    @property
+    def period_ms(self):
+        return self.show_ms + self.rest_ms
+
+    @property
+    def duration_ms(self):
+        return len(self.sequence) * self.period_ms
+
+    def windows_ms(self):
+        """Return {key: [(t_start_ms, t_end_ms), ...]} for every show phase."""
+        windows = {k: [] for k in self.pattern_keys}
+        for n, k in enumerate(self.sequence):
+            t0 = n * self.period_ms
+            windows[k].append((t0, t0 + self.show_ms))
+        return windows
+
+    def spike_trains(self, rows, indices, times_ms):
+        """
+        Place precomputed per-pattern spikes into every show phase of the sequence.
+
+        Args:
+            rows: Pattern row (position in pattern_keys) of each spike, sorted.
+            indices: Input index of each spike.
+            times_ms: Spike time relative to the start of its show phase (ms).
+
+        Returns:
+            (indices, times_ms) of all spikes over the whole sequence, times relative
+            to the start of the schedule.
+        """
+        rows = np.asarray(rows)
+        row_of = {k: r for r, k in enumerate(self.pattern_keys)}
+        presented = np.array([row_of[k] for k in self.sequence], dtype=np.int64)
+        keys = np.arange(len(self.pattern_keys))
+        starts = np.searchsorted(rows, keys)
+        lengths = (np.searchsorted(rows, keys, side='right') - starts)[presented]
+        # Gather the spikes of each presentation's pattern, shifted to its window
+        offsets = np.cumsum(lengths) - lengths
+        gather = np.arange(lengths.sum()) - np.repeat(offsets - starts[presented], lengths)
+        shift = np.repeat(np.arange(len(self.sequence)) * self.period_ms, lengths)
+        return np.asarray(indices)[gather], np.asarray(times_ms, dtype=float)[gather] + shift
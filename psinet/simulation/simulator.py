@@ -1,17 +1,35 @@
+import contextlib
+import json
+import os
+import subprocess
+import sys
 import yaml
 import numpy as np
 import brian2 as b2
+from brian2.utils.filelock import FileLock
 from pathlib import Path
 import datetime
 import logging
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import time
 
-from psinet.io.encoders import image_to_poisson_rates, create_input_layer
-from psinet.io.loaders import load_mnist
+from psinet.io.encoders import (
+    ENCODINGS, encode_rates, cached_rate_matrix, rates_to_spikes, active_input_indices, create_input_layer,
+    create_scheduled_input_layer, update_scheduled_input, create_spike_input_layer, set_input_spikes,
+)
+from psinet.io.loaders import load_mnist, MnistStream
 from psinet.network.hierarchy import Hierarchy
+from psinet.simulation.schedule import build_presentation_sequence, CompiledSchedule
+from psinet.simulation.analysis import spike_counts_per_digit, assign_labels, classify_by_votes, selectivity_index
+from psinet.simulation.recording import DiskRecorder
+from psinet.simulation.checkpoint import save_checkpoint, load_checkpoint, restore_hierarchy
+from psinet.simulation.profiling import PhaseProfiler, read_standalone_profile, write_report
+from psinet.simulation.inference import InferenceEngine
+from psinet.simulation.replicas import ReplicaGroup, plastic_size
+from psinet.simulation.clocks import DEFAULT_DT_MS, checked_interval_ms
+from psinet.simulation.backend import (
+    select_codegen_target, DEFAULT_CACHE_DIR, topology_hash, standalone_build_dir,
+    placeholder_connections_params, stdp_run_args, timed_array_run_args,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -21,13 +39,41 @@ class Simulator:
     Orchestrates a PSINet simulation from a configuration file.
     Handles network building, running the simulation, monitoring, and saving results.
     """
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, replica=None):
+        """
+        Args:
+            config_path: YAML configuration file.
+            replica: ReplicaGroup of a data-parallel worker process (see replicas.run_replica);
+                None for the main process.
+        """
         self.config_path = Path(config_path)
+        self.replica = replica
+        config_start = time.perf_counter()
         self._load_config()
+        # Opt-in instrumentation (simulation_params.profile): per-phase wall time/RSS and
+        # Brian2 per-code-object times, written to profile.json by save_results()
+        self.profiler = None
+        if self.config['simulation_params'].get('profile', False):
+            self.profiler = PhaseProfiler()
+            self.profiler.record('config_load', time.perf_counter() - config_start)
+        self._profiled_runs = 0
+        self.evaluating = self.config.get('mode', 'train') == 'eval'
+        self._eval_spike_base = 0
         self._setup_output_directory()
         self.network_objects = {}
         self.monitors = {}
         self.brian2_network = None
+        self.recorder = None
+        self.encoding = None
+        self.input_pixels = None
+        self.num_replicas = 1
+        self.schedule_dt_ms = None
+        self.plot_process = None
+        self.topology_key = None
+        self.start_position = 0
+        self.codegen_target = None
+        self.standalone = False
+        self.standalone_build_dir = None
 
     def _load_config(self):
         logging.info(f"Loading configuration from: {self.config_path}")
@@ -35,6 +81,10 @@ class Simulator:
             self.config = yaml.safe_load(f)
 
     def _setup_output_directory(self):
+        if self.replica is not None:
+            # Workers only train and write nothing; the parent run owns the results
+            self.output_dir = self.replica.output_dir / f"replica_{self.replica.index}"
+            return
         timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
         run_name = self.config.get('run_id', 'unnamed_run')
         base_dir = Path(self.config['output_params']['base_output_dir'])
@@ -45,6 +95,7 @@ class Simulator:
     # ------------------------------- BUILD ---------------------------------
     def build(self):
         logging.info("Building network components...")
+        self._lap(None)
 
         sim_p = self.config['simulation_params']
         inp_p = self.config['input_params']
@@ -54,11 +105,27 @@ class Simulator:
 
         # Device selection
         device = sim_p.get('brian2_device', 'runtime')
-        if device == 'cpp_standalone':
-            b2.set_device('cpp_standalone', directory=str(self.output_dir / 'brian2_build'), build_on_run=False)
+        self.standalone = device == 'cpp_standalone'
+        if self.evaluating and self.standalone:
+            raise ValueError("mode 'eval' requires the runtime device (brian2_device: runtime)")
+        if self.standalone:
+            # Build directory is chosen later from the topology hash (see _standalone_build)
+            b2.set_device('cpp_standalone', build_on_run=False)
+            if 'codegen_target' in sim_p:
+                logging.info(f"codegen_target '{sim_p['codegen_target']}' only applies to the runtime device; "
+                             f"ignored for cpp_standalone.")
         else:
-            b2.prefs.codegen.target = 'numpy'
+            self.codegen_target = select_codegen_target(
+                sim_p.get('codegen_target', 'auto'),
+                cache_dir=sim_p.get('codegen_cache_dir', DEFAULT_CACHE_DIR),
+            )
+        # Optional float32 state (halves per-synapse memory); must be set before any object exists
+        b2.prefs.core.default_float_dtype = np.float32 if sim_p.get('float32', False) else np.float64
+        # Global time step (set on every build: defaultclock is shared by all runs of a process)
+        dt_ms = float(sim_p.get('dt_ms', DEFAULT_DT_MS))
+        b2.defaultclock.dt = dt_ms * b2.ms
         # Ensure if user supplies tau constants in YAML we keep brian2 units compatible
+        self._lap('device_setup')
 
         # 1) Input preparation: support mnist with fallback to synthetic
         dataset = inp_p.get('dataset', 'mnist')
@@ -81,10 +148,13 @@ class Simulator:
         rates_map = {}
         digits_list = inp_p.get('patterns_to_learn', [0, 1])
         max_rate = inp_p.get('max_rate_hz', 150)
+        stream_p = inp_p.get('stream')
+        images, labels = None, None
 
         if dataset == 'mnist':
             try:
                 images, labels = load_mnist(inp_p.get('data_dir', '~/.psinet_data'))
+                selected = []
                 # Allow per-digit index; default to 0 for each if not provided
                 indices_cfg = inp_p.get('image_indices', None)
                 for idx_d, d in enumerate(digits_list):
@@ -97,33 +167,167 @@ class Simulator:
                     where = np.where(labels == d)[0]
                     if len(where) == 0:
                         raise RuntimeError(f"No images found for digit {d}")
-                    sel = where[min(idx, len(where)-1)]
-                    img = images[sel]
-                    rates_map[d] = image_to_poisson_rates(img, max_rate=max_rate*b2.Hz, invert=False)
+                    selected.append(where[min(idx, len(where)-1)])
+                # One encoded float32 row per digit (zero-copy views of the cached matrix)
+                rate_matrix = self._rate_matrix(images, 'mnist-train', indices=selected)
+                rates_map = dict(zip(digits_list, rate_matrix))
             except Exception as e:
                 logging.warning(f"MNIST yüklenemedi (hata: {e}). Sentetik 0/1 ile devam ediliyor. Hata: {e}")
-                img0 = create_digit_zero()
-                img1 = create_digit_one()
-                rates_map = {0: image_to_poisson_rates(img0, max_rate=max_rate*b2.Hz, invert=False),
-                             1: image_to_poisson_rates(img1, max_rate=max_rate*b2.Hz, invert=False)}
+                images, labels = None, None
+                rate_matrix = encode_rates(np.stack([create_digit_zero(), create_digit_one()]), max_rate, invert=False)
+                rates_map = dict(zip([0, 1], rate_matrix))
                 digits_list = [0, 1]
         else:
             # synthetic fallback
-            img0 = create_digit_zero()
-            img1 = create_digit_one()
-            rates_map = {0: image_to_poisson_rates(img0, max_rate=max_rate*b2.Hz, invert=False),
-                         1: image_to_poisson_rates(img1, max_rate=max_rate*b2.Hz, invert=False)}
+            rate_matrix = encode_rates(np.stack([create_digit_zero(), create_digit_one()]), max_rate, invert=False)
+            rates_map = dict(zip([0, 1], rate_matrix))
             digits_list = [0, 1]
+        num_inputs = rate_matrix.shape[1]
+
+        # Input coding: Poisson rates, or precomputed spike trains on a SpikeGeneratorGroup
+        self.encoding = inp_p.get('encoding', 'poisson')
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"Unknown input_params.encoding '{self.encoding}', expected one of {ENCODINGS}")
+        spiking = self.encoding != 'poisson'
 
-        # dynamic input layer initialized to silence
-        any_rates = next(iter(rates_map.values()))
-        input_layer = create_input_layer(any_rates*0)
+        # Presentation order for all cycles (shared by both run modes)
+        present_all = bool(sim_p.get('present_all_digits', False))
+        sequence = build_presentation_sequence(digits_list, sim_p['cycles'], shuffle=present_all)
+
+        # Resuming: continue the checkpointed sequence (it may have been shuffled)
+        checkpoint = None
+        if self.config.get('resume_from'):
+            if self.standalone:
+                raise ValueError("resume_from requires the runtime device (brian2_device: runtime)")
+            checkpoint = load_checkpoint(self.config['resume_from'])
+            # Keep the checkpointed order; more cycles than before extend it
+            saved = checkpoint[1]['position'].get('sequence', [])
+            sequence = saved + sequence[len(saved):]
+            if stream_p is not None and stream_p.get('seed') is None:
+                logging.warning("Resuming a stream without input_params.stream.seed: the remaining images "
+                                "are drawn from a new random order.")
+        # Evaluation restores trained weights (and the input pixel map they were trained with)
+        eval_ckpt = None
+        if self.evaluating:
+            eval_ckpt = self.config.get('evaluation_params', {}).get('checkpoint') or self.config.get('resume_from')
+            if not eval_ckpt:
+                raise ValueError("mode 'eval' needs evaluation_params.checkpoint (trained weights)")
+            if checkpoint is None:
+                checkpoint = load_checkpoint(eval_ckpt)
+
+        # Streaming source: the whole training split (chunks are gathered in run())
+        # Data-parallel training: K processes, each on its own shard of the stream
+        self.num_replicas = int(sim_p.get('replicas', 1))
+        if self.num_replicas > 1 and (stream_p is None or self.evaluating or self.standalone):
+            raise ValueError("simulation_params.replicas needs streaming training (input_params.stream) "
+                             "on the runtime device")
+        if stream_p is not None and not self.evaluating:
+            if images is None:
+                stream_rates, stream_labels = rate_matrix, np.array([0, 1])
+            else:
+                stream_rates, stream_labels = self._rate_matrix(images, 'mnist-train'), labels
+
+        # Optional pruning of input channels that are (near-)silent over the training images.
+        # A checkpoint always brings its own map so that restored weights line up with the pixels.
+        self.network_objects['pattern_rates'] = rate_matrix
+        input_pixels = None
+        if checkpoint is not None:
+            input_pixels = checkpoint[1].get('input_pixels')
+        elif inp_p.get('prune_silent_pixels', False):
+            if stream_p is not None:
+                source, rows = stream_rates, np.flatnonzero(np.isin(stream_labels, digits_list))
+            else:
+                source, rows = np.stack([rates_map[d] for d in digits_list]), None
+            input_pixels = active_input_indices(source, rows=rows,
+                                                min_active_fraction=float(inp_p.get('prune_min_active_fraction', 0.0)))
+        if input_pixels is not None:
+            input_pixels = np.asarray(input_pixels, dtype=np.int64)
+            logging.info(f"Input pruned to {input_pixels.size} of {num_inputs} pixels")
+            rates_map = {d: np.ascontiguousarray(r[input_pixels]) for d, r in rates_map.items()}
+            num_inputs = int(input_pixels.size)
+        self.input_pixels = input_pixels
+
+        # Optional slower clock of the Poisson input; compiled schedules then use its grid
+        input_dt_ms = checked_interval_ms(inp_p.get('input_dt_ms'), dt_ms, 'input_params.input_dt_ms')
+        if input_dt_ms is not None and spiking:
+            logging.warning("input_params.input_dt_ms only applies to Poisson input; ignored for "
+                            f"encoding '{self.encoding}'.")
+            input_dt_ms = None
+        input_dt = input_dt_ms * b2.ms if input_dt_ms is not None else None
+        self.schedule_dt_ms = input_dt_ms or dt_ms
+
+        if self.evaluating:
+            # Evaluation sets the rates/spikes of each test image directly (see evaluate)
+            input_layer = create_spike_input_layer(num_inputs) if spiking \
+                else create_input_layer(np.zeros(num_inputs) * b2.Hz, dt=input_dt)
+            sequence = []
+        elif stream_p is not None:
+            # Streaming training: encoded rate rows are scheduled chunk by chunk in run()
+            if self.standalone:
+                raise ValueError("input_params.stream requires the runtime device (brian2_device: runtime)")
+            stream = MnistStream(
+                stream_rates, stream_labels,
+                num_images=stream_p.get('num_images'),
+                chunk_size=stream_p.get('chunk_size', 256),
+                digits=digits_list,
+                shuffle=stream_p.get('shuffle', True),
+                balance_classes=stream_p.get('balance_classes', False),
+                epochs=sim_p['cycles'],
+                seed=stream_p.get('seed'),
+                shard=self.replica.index if self.replica is not None else 0,
+                num_shards=self.num_replicas,
+            )
+            logging.info(f"Streaming {stream.num_images} images x {stream.epochs} epochs "
+                         f"in chunks of {stream.chunk_size}")
+            # Start silent; each chunk replaces the rate/slot tables (or the spikes) before its run()
+            input_layer = create_spike_input_layer(num_inputs) if spiking \
+                else create_scheduled_input_layer(np.zeros((1, num_inputs)), [0.0], b2.defaultclock.dt, dt=input_dt)
+            self.network_objects['stream'] = stream
+            digits_list = stream.digits
+            sequence = []
+        # cpp_standalone always uses the compiled schedule: one run() call, one binary execution
+        elif sim_p.get('compiled_schedule', False) or self.standalone:
+            # whole show/rest sequence as a time-indexed rate table -> single run()
+            schedule = CompiledSchedule(sequence, digits_list,
+                                        sim_p['duration_per_pattern_ms'], sim_p['silence_period_ms'],
+                                        dt_ms=self.schedule_dt_ms)
+            if spiking:
+                # every presentation's spikes, placed at its window start
+                rows, indices, times = self._encode_spikes(np.stack([rates_map[d] for d in digits_list]),
+                                                           schedule.show_ms)
+                input_layer = create_spike_input_layer(num_inputs)
+                set_input_spikes(input_layer, *schedule.spike_trains(rows, indices, times))
+                # Checkpoint blocks and resumed runs start mid-sequence; earlier spikes are skipped by design
+                b2.BrianLogger.suppress_name('ignored_spikes')
+            else:
+                rate_table = np.vstack([rates_map[d] for d in digits_list] + [np.zeros(num_inputs)])  # last row = silence
+                input_layer = create_scheduled_input_layer(rate_table, schedule.slot_pattern, schedule.slot_ms * b2.ms,
+                                                           dt=input_dt)
+            self.network_objects['schedule'] = schedule
+        elif spiking:
+            # spikes of each pattern, loaded before each show phase
+            rows, indices, times = self._encode_spikes(np.stack([rates_map[d] for d in digits_list]),
+                                                       float(sim_p['duration_per_pattern_ms']))
+            bounds = np.searchsorted(rows, np.arange(len(digits_list) + 1))
+            self.network_objects['spike_map'] = {d: (indices[bounds[r]:bounds[r+1]], times[bounds[r]:bounds[r+1]])
+                                                 for r, d in enumerate(digits_list)}
+            input_layer = create_spike_input_layer(num_inputs)
+        else:
+            # dynamic input layer initialized to silence
+            input_layer = create_input_layer(np.zeros(num_inputs) * b2.Hz, dt=input_dt)
         self.network_objects['input_layer'] = input_layer
         self.network_objects['rates_map'] = rates_map
         self.network_objects['digits_list'] = digits_list
+        self.network_objects['sequence'] = sequence
+        self._lap('input_prep')
 
         # 2) Build hierarchy (multi-layer aware)
         connections_params = self.config.get('connections_params', None)
+        if input_pixels is not None:
+            for key, params in (connections_params or {}).items():
+                if key.startswith('inp_') and (params.get('connectivity') or {}).get('type') == 'receptive_field':
+                    raise ValueError(f"{key}: receptive_field connectivity needs the full image grid "
+                                     f"and cannot be combined with input pruning")
         if 'layers' in net_p:
             layers_config = net_p['layers']
         else:
@@ -145,14 +349,69 @@ class Simulator:
                     }
                 }
 
+        for layer in layers_config:
+            checked_interval_ms(layer.get('theta_update_interval_ms'), dt_ms,
+                                f"layer {layer.get('name')}: theta_update_interval_ms")
+
+        # In cpp_standalone, STDP parameters are generated as placeholders and supplied
+        # as run_args so that parameter-only changes reuse the compiled binary.
+        build_layers, build_params = layers_config, connections_params
+        if self.evaluating:
+            # Frozen plasticity: no traces, no on_post pathway (the trained topology is unchanged)
+            build_layers = [{**l, 'stdp_mode': 'frozen'} for l in layers_config]
+            build_params = {k: {**v, 'stdp_mode': 'frozen'} for k, v in connections_params.items()}
+        elif self.standalone:
+            build_params = placeholder_connections_params(connections_params)
         hierarchy = Hierarchy(
             input_layer=input_layer,
-            layers_config=layers_config,
-            connections_params=connections_params
+            layers_config=build_layers,
+            connections_params=build_params,
+            seed=net_p.get('seed'),
         )
         self.network_objects['hierarchy'] = hierarchy
+        self.network_objects['layers_config'] = layers_config
+        self.network_objects['connections_params'] = connections_params
+        self._lap('hierarchy_build')
 
         # 3) Monitors
+        if self.evaluating:
+            components = self._build_eval_monitors(hierarchy)
+        elif self.replica is not None:
+            components = []  # workers record nothing
+        else:
+            components = self._build_monitors(hierarchy, input_layer, mon_p)
+        self._lap('monitors')
+
+        # 4) Assemble Network
+        net = hierarchy.build_network(*components)
+        self.brian2_network = net
+
+        # A pruned input is only compatible with weights trained on the same pixel map
+        self.topology_key = topology_hash(input_layer.N, layers_config, connections_params,
+                                          extra=[] if input_pixels is None else list(input_pixels))
+        if self.evaluating:
+            arrays, meta = checkpoint
+            restore_hierarchy(hierarchy, arrays, meta, self.topology_key)
+            logging.info(f"Evaluating weights from {eval_ckpt}")
+            engine = self.config.get('evaluation_params', {}).get('engine', 'brian2')
+            if engine == 'numpy':
+                # Batched NumPy forward simulation of the restored weights (Brian2 objects are not run)
+                self.network_objects['inference_engine'] = InferenceEngine.from_hierarchy(hierarchy)
+            elif engine != 'brian2':
+                raise ValueError(f"evaluation_params.engine must be 'brian2' or 'numpy', got '{engine}'")
+        elif checkpoint is not None:
+            arrays, meta = checkpoint
+            restore_hierarchy(hierarchy, arrays, meta, self.topology_key)
+            net.t_ = meta['position']['t_ms'] / 1000.0
+            self.start_position = int(meta['position']['presented'])
+            logging.info(f"Resumed from {self.config['resume_from']}: {self.start_position} presentations done, "
+                         f"t={meta['position']['t_ms']} ms")
+        self._lap('network_assemble')
+
+        logging.info("Network build complete.")
+
+    def _build_monitors(self, hierarchy, input_layer, mon_p):
+        """Training monitors (spikes, sampled weights, optional disk recorder); returns the components."""
         components = []
         # spikes: L1 always
         if mon_p.get('record_l1_spikes', True):
@@ -171,35 +430,98 @@ class Simulator:
             # self.monitors['rate_L2'] = b2.PopulationRateMonitor(hierarchy.layers_by_name[l2_name].excitatory_neurons.group)
             # components.append(self.monitors['rate_L2'])
 
-        # weight subset monitors
+        # weight subset monitors (sampled every dt unless weight_sample_interval_ms is set)
         subset_size = int(mon_p.get('record_weight_subset_size', 100))
+        weight_dt = checked_interval_ms(mon_p.get('weight_sample_interval_ms'), float(b2.defaultclock.dt / b2.ms),
+                                        'monitor_params.weight_sample_interval_ms')
+        weight_kwargs = {'dt': float(weight_dt) * b2.ms} if weight_dt is not None else {}
         # Input->L1
         first_name = hierarchy.layers_in_order[0]
-        n_exc_l1 = hierarchy.layers_by_name[first_name].excitatory_neurons.group.N
-        total_candidates = (28*28) * n_exc_l1
+        total_candidates = hierarchy.input_to_first_syn.num_connections
         subset = np.random.choice(np.arange(total_candidates), min(subset_size, total_candidates), replace=False)
-        self.monitors['weights_inp_l1'] = b2.StateMonitor(hierarchy.input_to_first_syn.synapses, 'w', record=subset)
+        self.monitors['weights_inp_l1'] = b2.StateMonitor(hierarchy.input_to_first_syn.synapses, 'w', record=subset, **weight_kwargs)
         components.append(self.monitors['weights_inp_l1'])
         # L1->L2 if exists
         if len(hierarchy.layers_in_order) >= 2:
             second_name = hierarchy.layers_in_order[1]
             key = f"{first_name.lower()}_{second_name.lower()}"
             if key in hierarchy.connections:
-                n_exc_l2 = hierarchy.layers_by_name[second_name].excitatory_neurons.group.N
-                total_cand_l1l2 = n_exc_l1 * n_exc_l2
+                total_cand_l1l2 = hierarchy.connections[key].num_connections
                 subset2 = np.random.choice(np.arange(total_cand_l1l2), min(subset_size, total_cand_l1l2), replace=False)
-                self.monitors['weights_l1_l2'] = b2.StateMonitor(hierarchy.connections[key].synapses, 'w', record=subset2)
+                self.monitors['weights_l1_l2'] = b2.StateMonitor(hierarchy.connections[key].synapses, 'w', record=subset2, **weight_kwargs)
                 components.append(self.monitors['weights_l1_l2'])
 
-        # 4) Assemble Network
-        net = hierarchy.build_network(*components)
-        self.brian2_network = net
-
-        # In cpp_standalone, multiple run calls require build_on_run=False and explicit build
-        sim_p = self.config['simulation_params']
-        device = sim_p.get('brian2_device', 'runtime')
-        # In cpp_standalone we delay final build until after all run() calls
-        logging.info("Network build complete.")
+        # Optional streaming of monitor contents to disk (bounded memory for long runs)
+        if mon_p.get('record_to_disk', False):
+            if self.standalone:
+                logging.info("record_to_disk only applies to the runtime device; "
+                             "cpp_standalone already writes monitor data to its results directory.")
+            else:
+                self.recorder = DiskRecorder(self.output_dir / 'recordings',
+                                             flush_interval=float(mon_p.get('flush_interval_ms', 1000)) * b2.ms)
+                for name, mon in self.monitors.items():
+                    if isinstance(mon, b2.SpikeMonitor):
+                        self.recorder.add_spike_monitor(name, mon)
+                    else:
+                        self.recorder.add_weight_monitor(name, mon)
+                components.append(self.recorder.operation)
+        return components
+
+    def _build_eval_monitors(self, hierarchy):
+        """
+        Evaluation only needs per-neuron spike counts of the readout layer (no spike
+        times, no weight monitors) and an early-exit check for each presentation.
+        """
+        eval_p = self.config.get('evaluation_params', {})
+        readout = eval_p.get('readout_layer', hierarchy.layers_in_order[-1])
+        counter = b2.SpikeMonitor(hierarchy.layers_by_name[readout].excitatory_neurons.group, record=False)
+        self.monitors['eval_counts'] = counter
+        components = [counter]
+        min_spikes = int(eval_p.get('min_spikes', 5))
+        if min_spikes > 0:
+            def stop_when_enough_spikes():
+                if counter.num_spikes - self._eval_spike_base >= min_spikes:
+                    self.brian2_network.stop()
+            components.append(b2.NetworkOperation(stop_when_enough_spikes,
+                                                  dt=float(eval_p.get('check_interval_ms', 5)) * b2.ms))
+        return components
+
+    # ----------------------------- PROFILING --------------------------------
+    def _lap(self, name):
+        if self.profiler is not None:
+            self.profiler.lap(name)
+
+    def _phase(self, name):
+        return self.profiler.phase(name) if self.profiler is not None else contextlib.nullcontext()
+
+    def _run_network(self, duration, **kwargs):
+        """
+        Network.run with optional profiling. The first call is reported separately
+        ('run_first') because it includes code generation/compilation; Brian2's
+        per-code-object times are accumulated after every runtime call.
+        """
+        if self.profiler is None:
+            self.brian2_network.run(duration, **kwargs)
+            return
+        phase = 'run' if self._profiled_runs else 'run_first'
+        self._profiled_runs += 1
+        with self.profiler.phase(phase):
+            self.brian2_network.run(duration, profile=True, **kwargs)
+        if not self.standalone:
+            # (cpp_standalone only knows the times after the binary ran, see _standalone_build)
+            self.profiler.add_brian2_profile(self.brian2_network.profiling_info)
+
+    def _write_profile(self):
+        if self.profiler is None:
+            return
+        extra = {
+            'device': 'cpp_standalone' if self.standalone else 'runtime',
+            'codegen_target': self.codegen_target,
+            'simulated_ms': float(self.brian2_network.t / b2.ms),
+        }
+        write_report(self.output_dir / 'profile.json', self.profiler, self.network_objects['hierarchy'],
+                     self.monitors, extra=extra)
+        logging.info(f"Profile report written to {self.output_dir / 'profile.json'}")
 
     # ------------------------------- RUN -----------------------------------
     def run(self):
@@ -215,217 +537,484 @@ class Simulator:
         hierarchy = self.network_objects['hierarchy']
         rates_map = self.network_objects['rates_map']
         digits_list = self.network_objects['digits_list']
+        sequence = self.network_objects['sequence']
+        schedule = self.network_objects.get('schedule')
+        spike_map = self.network_objects.get('spike_map')
+
+        if self.evaluating:
+            self.evaluate()
+            return
 
         # Windows for per-digit analysis
         self.windows_per_digit = {d: [] for d in digits_list}
-
-        # Sequence construction: if present_all_digits flag, iterate all digits per cycle
-        present_all = bool(sim_p.get('present_all_digits', False))
-        if present_all:
-            # In cpp_standalone, we need to build once before multiple run() calls
-            device = self.config['simulation_params'].get('brian2_device', 'runtime')
-            if device == 'cpp_standalone':
-                b2.device.build(directory=str(self.output_dir / 'brian2_build'), compile=True, run=False, debug=False)
-
-            logging.info(f"Starting multi-digit loop: {cycles} cycles over digits {digits_list} with show={show}, rest={rest}")
+        start = self.start_position
+        # Periodic checkpoints need the state mid-run, which cpp_standalone only has after the binary ran
+        every = 0 if self.standalone else int(sim_p.get('checkpoint_every') or 0)
+
+        if 'stream' in self.network_objects and self.num_replicas > 1:
+            self._run_replicated(show, rest)
+            if self.replica.index > 0:
+                return  # replica 0 holds the merged weights and saves the results
+        elif 'stream' in self.network_objects:
+            self._run_stream(show, rest)
+        elif schedule is not None:
+            # Compiled schedule: one run() over the whole sequence (or one per checkpoint
+            # block), windows come from the same table
+            logging.info(f"Compiled schedule: {len(sequence)} presentations, slot={schedule.slot_ms} ms, "
+                         f"total={schedule.duration_ms} ms")
+            step = every or len(sequence)
+            for block_start in range(start, len(sequence), step):
+                block_end = min(block_start + step, len(sequence))
+                self._run_network((block_end - block_start) * schedule.period_ms * b2.ms, report='text')
+                if every and block_end < len(sequence):
+                    self.save_checkpoint(block_end)
+            for d, windows in schedule.windows_ms().items():
+                self.windows_per_digit[d] = [(t0 * b2.ms, t1w * b2.ms) for t0, t1w in windows
+                                             if t0 >= start * schedule.period_ms]
         else:
-            logging.info(f"Starting 2-digit loop: {cycles}x over {digits_list} with show={show}, rest={rest}")
-
-        current_t = 0 * b2.second
-        import random
-        for _ in range(cycles):
-            seq = digits_list.copy()
-            if present_all:
-                random.shuffle(seq)
-            for d in seq:
-                rates = rates_map[d]
-                hierarchy.input_layer.rates = rates
-                self.brian2_network.run(show, report='text')
+            # Per-phase path: sequence order comes from present_all_digits (shuffled per cycle)
+            if bool(sim_p.get('present_all_digits', False)):
+                logging.info(f"Starting multi-digit loop: {cycles} cycles over digits {digits_list} with show={show}, rest={rest}")
+            else:
+                logging.info(f"Starting 2-digit loop: {cycles}x over {digits_list} with show={show}, rest={rest}")
+            current_t = self.brian2_network.t
+            for n, d in enumerate(sequence[start:], start=start + 1):
+                if spike_map is not None:
+                    set_input_spikes(hierarchy.input_layer, *spike_map[d], offset=current_t)
+                else:
+                    # Unitless row assignment: no unit check or re-encoding per presentation
+                    hierarchy.input_layer.rates_[:] = rates_map[d]
+                self._run_network(show, report='text')
                 self.windows_per_digit[d].append((current_t, current_t + show))
                 current_t += show
-                hierarchy.input_layer.rates = 0 * b2.Hz
-                self.brian2_network.run(rest)
+                if spike_map is None:
+                    hierarchy.input_layer.rates_[:] = 0
+                self._run_network(rest)
                 current_t += rest
+                if every and n % every == 0 and n < len(sequence):
+                    self.save_checkpoint(n)
+
+        if self.standalone:
+            self._standalone_build()
+        if sim_p.get('checkpoint_every') or self.config['output_params'].get('save_checkpoint', False):
+            presented = self.network_objects['stream'].num_images * self.network_objects['stream'].epochs \
+                if 'stream' in self.network_objects else len(sequence)
+            self.save_checkpoint(presented)
+        if self.recorder is not None:
+            self.recorder.flush()
 
         logging.info("Simulation finished.")
 
+    def _run_replicated(self, show, rest):
+        """
+        Stream training as one of K data-parallel replicas.
+
+        The main process (replica 0) spawns replicas 1..K-1, which rebuild the same
+        network from the config and train on their own shard of the stream. All
+        replicas start from replica 0's weights and replace their plastic weights by
+        the mean over all replicas every merge_every presentations (see ReplicaGroup).
+        """
+        hierarchy = self.network_objects['hierarchy']
+        if self.replica is None:
+            stream = self.network_objects['stream']
+            merge_every = int(self.config['simulation_params'].get('merge_every') or stream.chunk_size)
+            self.replica = ReplicaGroup.create(self.num_replicas, plastic_size(hierarchy), merge_every,
+                                               self.output_dir)
+            self.replica.start_workers(self.config_path)
+        replica = self.replica
+        try:
+            replica.broadcast(hierarchy)
+            self._run_stream(show, rest)
+        except BaseException:
+            replica.abort()
+            raise
+        finally:
+            failed = replica.close() if replica.index == 0 else []
+        if failed:
+            raise RuntimeError(f"Training replicas failed: {failed} (see {self.output_dir}/replica_*.log)")
+
+    def _run_stream(self, show, rest):
+        """
+        Present the streamed dataset chunk by chunk.
+
+        Each chunk of precomputed rate rows is compiled into a schedule that
+        starts at the current simulation time and simulated with a single run(), so
+        memory is bounded by the chunk size rather than the number of images.
+        """
+        stream = self.network_objects['stream']
+        input_layer = self.network_objects['input_layer']
+        dt_ms = self.schedule_dt_ms
+
+        n_chunks = len(stream)
+        every = int(self.config['simulation_params'].get('checkpoint_every') or 0)
+        total = stream.num_images * stream.epochs
+        presented = 0
+        start = time.perf_counter()
+        for n, (_, chunk_rates, labels) in enumerate(stream, start=1):
+            if presented < self.start_position:
+                # Already presented before the checkpoint we resumed from
+                presented += len(labels)
+                continue
+            chunk_start = time.perf_counter()
+            if self.input_pixels is not None:
+                chunk_rates = chunk_rates[:, self.input_pixels]
+            # (local names must not shadow the input layer's namespace: run() also resolves caller locals)
+            rows = np.arange(len(labels))
+            schedule = CompiledSchedule(rows, rows, show / b2.ms, rest / b2.ms, dt_ms=dt_ms)
+            offset = self.brian2_network.t
+            if self.encoding != 'poisson':
+                chunk_spikes = self._encode_spikes(chunk_rates, schedule.show_ms)
+                set_input_spikes(input_layer, *schedule.spike_trains(*chunk_spikes), offset=offset)
+            else:
+                chunk_table = np.vstack([chunk_rates, np.zeros((1, chunk_rates.shape[1]))])  # last row = silence
+                update_scheduled_input(input_layer, chunk_table, schedule.slot_pattern, schedule.slot_ms * b2.ms,
+                                       offset=offset)
+            self._run_network(schedule.duration_ms * b2.ms)
+            for row, windows in schedule.windows_ms().items():
+                d = int(labels[row])
+                self.windows_per_digit[d].extend((offset + t0 * b2.ms, offset + t1w * b2.ms) for t0, t1w in windows)
+
+            presented += len(labels)
+            done = presented - self.start_position
+            elapsed = time.perf_counter() - start
+            logging.info(f"Chunk {n}/{n_chunks}: {len(labels)} images in {time.perf_counter() - chunk_start:.1f} s "
+                         f"({presented} total, {done / elapsed:.1f} images/s)")
+            # Replicas merge on chunk boundaries (all shards have the same chunks) and after the last one
+            replica = self.replica
+            merge_every = replica.merge_every if replica is not None else 0
+            if merge_every and (presented // merge_every > (presented - len(labels)) // merge_every
+                                or presented == total):
+                with self._phase('merge'):
+                    replica.merge(self.network_objects['hierarchy'])
+                logging.info(f"Merge {replica.merges}: weights averaged over {replica.count} replicas "
+                             f"({replica.count * presented} images in total, "
+                             f"{replica.count * done / (time.perf_counter() - start):.1f} images/s)")
+            # Checkpoints fall on chunk boundaries
+            if every and presented // every > (presented - len(labels)) // every and presented < total:
+                self.save_checkpoint(presented)
+
+    def _rate_matrix(self, images, dataset, indices=None):
+        """
+        Float32 rate matrix (Hz, unitless) of images[indices] (all images if None).
+        MNIST matrices are cached on disk under <data_dir>/rate_cache and memory-mapped,
+        unless input_params.cache_rates is false.
+        """
+        inp_p = self.config['input_params']
+        max_rate = inp_p.get('max_rate_hz', 150)
+        if dataset.startswith('mnist') and inp_p.get('cache_rates', True):
+            cache_dir = Path(inp_p.get('data_dir', '~/.psinet_data')).expanduser() / 'rate_cache'
+            return cached_rate_matrix(images, cache_dir, dataset, indices=indices, max_rate_hz=max_rate, invert=False)
+        return encode_rates(images if indices is None else images[np.asarray(indices)], max_rate, invert=False)
+
+    def _encode_spikes(self, rates, show_ms):
+        """Spike trains (rows, indices, times_ms) of rate rows for the configured input encoding."""
+        inp_p = self.config['input_params']
+        window = min(float(inp_p.get('encoding_window_ms', show_ms)), float(show_ms))
+        return rates_to_spikes(rates, self.encoding, window, inp_p.get('max_rate_hz', 150),
+                               threshold=float(inp_p.get('encoding_threshold', 0.0)))
+
+    def _load_eval_split(self, split):
+        """Rate rows/labels of an MNIST split, or the built-in synthetic digits if unavailable."""
+        inp_p = self.config['input_params']
+        if inp_p.get('dataset', 'mnist') == 'mnist':
+            try:
+                images, labels = load_mnist(inp_p.get('data_dir', '~/.psinet_data'), split=split)
+                return self._rate_matrix(images, f'mnist-{split}'), labels
+            except Exception as e:
+                logging.warning(f"MNIST {split} split unavailable ({e}); evaluating on synthetic 0/1 digits.")
+        return self.network_objects['pattern_rates'], np.asarray(self.network_objects['digits_list'])
+
+    def _eval_counts(self, stream, label):
+        """Present every image of a stream with frozen weights; returns (counts per image, labels)."""
+        eval_p = self.config.get('evaluation_params', {})
+        sim_p = self.config['simulation_params']
+        show = float(eval_p.get('duration_per_pattern_ms', sim_p['duration_per_pattern_ms'])) * b2.ms
+        hierarchy = self.network_objects['hierarchy']
+        input_layer = self.network_objects['input_layer']
+        counter = self.monitors['eval_counts']
+        groups = [g for name in hierarchy.layers_in_order
+                  for g in (hierarchy.layers_by_name[name].excitatory_neurons.group,
+                            hierarchy.layers_by_name[name].inhibitory_neurons.group)]
+
+        # Optional batched NumPy engine (evaluation_params.engine: numpy)
+        engine = self.network_objects.get('inference_engine')
+        engine_kwargs = {
+            'readout': eval_p.get('readout_layer', hierarchy.layers_in_order[-1]),
+            'min_spikes': int(eval_p.get('min_spikes', 5)),
+            'check_interval_ms': float(eval_p.get('check_interval_ms', 5)),
+        }
+
+        all_counts, all_labels = [], []
+        presented = 0
+        start = time.perf_counter()
+        spiking = self.encoding != 'poisson'
+        for _, chunk_rates, labels in stream:
+            if self.input_pixels is not None:
+                chunk_rates = chunk_rates[:, self.input_pixels]
+            chunk_counts = np.zeros((len(labels), counter.source.N), dtype=np.int32)
+            if spiking:
+                rows, indices, times = self._encode_spikes(chunk_rates, float(show / b2.ms))
+                bounds = np.searchsorted(rows, np.arange(len(labels) + 1))
+            if engine is not None:
+                # The whole chunk is simulated as one batch
+                inputs = ({'spikes': (rows, indices, times), 'num_images': len(labels)} if spiking
+                          else {'rates_hz': chunk_rates})
+                with self._phase('run'):
+                    chunk_counts[:] = engine.run(float(show / b2.ms), seed=self._engine_rng, **inputs, **engine_kwargs)
+            else:
+                for k in range(len(labels)):
+                    before = np.array(counter.count[:])
+                    self._eval_spike_base = counter.num_spikes
+                    if spiking:
+                        set_input_spikes(input_layer, indices[bounds[k]:bounds[k+1]], times[bounds[k]:bounds[k+1]],
+                                         offset=self.brian2_network.t)
+                    else:
+                        input_layer.rates_[:] = chunk_rates[k]
+                    self._run_network(show)  # may stop early once min_spikes is reached
+                    chunk_counts[k] = np.array(counter.count[:]) - before
+                    # Reset instead of a silence period between images
+                    for g in groups:
+                        g.v_[:] = 0
+            all_counts.append(chunk_counts)
+            all_labels.append(np.asarray(labels))
+            presented += len(labels)
+            logging.info(f"Eval {label}: {presented}/{stream.num_images} images "
+                         f"({presented / (time.perf_counter() - start):.1f} images/s)")
+        if engine is None and spiking:
+            set_input_spikes(input_layer, [], [])
+        elif engine is None:
+            input_layer.rates_[:] = 0
+        return np.concatenate(all_counts), np.concatenate(all_labels)
+
+    def evaluate(self):
+        """
+        Frozen-weight evaluation: assign a digit to each readout neuron from its
+        responses to labelled training images, then classify test images by
+        spike-count voting. Results are stored in self.evaluation.
+        """
+        eval_p = self.config.get('evaluation_params', {})
+        digits = [int(d) for d in self.network_objects['digits_list']]
+        seed = eval_p.get('seed')
+        self._engine_rng = np.random.default_rng(seed)
+
+        label_rates, label_labels = self._load_eval_split(eval_p.get('label_split', 'train'))
+        label_stream = MnistStream(label_rates, label_labels, num_images=eval_p.get('label_images', 1000),
+                                   chunk_size=eval_p.get('chunk_size', 256), digits=digits,
+                                   balance_classes=True, seed=seed)
+        counts, labels = self._eval_counts(label_stream, 'labelling')
+        rows = np.searchsorted(digits, labels)
+        count_matrix = np.zeros((len(digits), counts.shape[1]), dtype=np.int64)
+        np.add.at(count_matrix, rows, counts)
+        assignments = assign_labels(count_matrix, presentations=np.bincount(rows, minlength=len(digits)))
+
+        test_rates, test_labels = self._load_eval_split(eval_p.get('test_split', 'test'))
+        test_stream = MnistStream(test_rates, test_labels, num_images=eval_p.get('test_images', 1000),
+                                  chunk_size=eval_p.get('chunk_size', 256), digits=digits, seed=seed)
+        test_counts, test_labels = self._eval_counts(test_stream, 'test')
+        predicted = np.asarray(digits)[classify_by_votes(test_counts, assignments, len(digits))]
+        accuracy = float(np.mean(predicted == test_labels)) if len(test_labels) else 0.0
+        silent = float(np.mean(test_counts.sum(axis=1) == 0)) if len(test_labels) else 0.0
+
+        confusion = np.zeros((len(digits), len(digits)), dtype=np.int64)
+        np.add.at(confusion, (np.searchsorted(digits, test_labels), np.searchsorted(digits, predicted)), 1)
+        self.evaluation = {
+            'digits': digits,
+            'accuracy': accuracy,
+            'num_test_images': int(len(test_labels)),
+            'silent_fraction': silent,
+            'assignments': assignments,
+            'label_counts': count_matrix,
+            'confusion': confusion,
+        }
+        logging.info(f"Evaluation accuracy: {accuracy:.4f} on {len(test_labels)} images "
+                     f"({silent:.1%} without readout spikes)")
+
+    def save_checkpoint(self, presented):
+        """
+        Write <output_dir>/checkpoint.npz: all synaptic weights, neuron v/theta and the
+        schedule position (presentations done, simulation time, presentation order).
+        """
+        position = {'presented': int(presented), 't_ms': float(self.brian2_network.t / b2.ms)}
+        if 'stream' not in self.network_objects:
+            position['sequence'] = [int(d) for d in self.network_objects['sequence']]
+        save_checkpoint(self.output_dir / 'checkpoint.npz', self.network_objects['hierarchy'],
+                        self.topology_key, position, input_pixels=self.input_pixels)
+
+    def _standalone_build(self):
+        """
+        Generate, compile (incrementally) and execute the cpp_standalone project.
+
+        The project directory is keyed by the topology hash and shared across runs.
+        Brian2 only rewrites changed sources, so make recompiles nothing when only
+        run_args differ (STDP parameters, rate table and slot table values). Changing
+        durations or the schedule length changes constants in the generated code and
+        triggers a partial recompile in the same directory. Code generation and
+        compilation are serialized with a file lock; each run writes its monitor data
+        to its own results directory under output_dir, which is read back after the
+        single binary run.
+        """
+        sim_p = self.config['simulation_params']
+        hierarchy = self.network_objects['hierarchy']
+        key = topology_hash(
+            hierarchy.input_layer.N,
+            self.network_objects['layers_config'],
+            self.network_objects['connections_params'],
+            extra=sorted(self.monitors.keys()) + ([f"encoding:{self.encoding}"] if self.encoding != 'poisson' else []),
+        )
+        build_dir = standalone_build_dir(sim_p.get('codegen_cache_dir', DEFAULT_CACHE_DIR), key)
+        self.standalone_build_dir = build_dir
+        # Brian2 requires results_directory to be relative to the project directory
+        results_dir = os.path.relpath(self.output_dir.resolve() / 'brian2_results', build_dir)
+        run_args = stdp_run_args(hierarchy, self.network_objects['connections_params'])
+        run_args.update(timed_array_run_args(hierarchy.input_layer))
+        logging.info(f"cpp_standalone build directory: {build_dir} (topology {key})")
+        with self._phase('standalone_build'), FileLock(str(build_dir / 'build.lock')):
+            b2.device.build(directory=str(build_dir), results_directory=results_dir,
+                            compile=True, run=False, debug=False)
+        with self._phase('standalone_exec'):
+            b2.device.run(run_args=run_args)
+        if self.profiler is not None:
+            self.profiler.add_brian2_profile(read_standalone_profile(self.output_dir / 'brian2_results'))
+
     # ------------------------------- SAVE ----------------------------------
+    def _spikes(self, name):
+        """(t_ms, i) of a spike monitor, from the disk recorder if enabled."""
+        if self.recorder is not None:
+            return self.recorder.spikes(name)
+        mon = self.monitors[name]
+        return np.asarray(mon.t / b2.ms, dtype=float), np.array(mon.i)
+
+    def _weights(self, name):
+        """(t_ms, w) of a weight monitor with w of shape (samples, synapses)."""
+        if self.recorder is not None:
+            return self.recorder.weights(name)
+        mon = self.monitors[name]
+        return np.asarray(mon.t / b2.ms, dtype=float), mon.w.T
+
+    def _plot_in_background(self, raw_path, plot_path, num_l1, num_l2, decimate, raster_bins, max_trace_points):
+        """
+        Render the summary figure from raw_data.npz in a detached process (own session,
+        output in plot.log), so the caller can exit or start the next job right away.
+        The process handle is kept in self.plot_process.
+        """
+        cmd = [sys.executable, '-m', 'psinet.simulation.plotting', str(raw_path), str(plot_path),
+               '--num-l1', str(int(num_l1)), '--raster-bins', str(raster_bins),
+               '--max-trace-points', str(max_trace_points)]
+        if num_l2 is not None:
+            cmd += ['--num-l2', str(int(num_l2))]
+        if decimate:
+            cmd.append('--decimate')
+        env = dict(os.environ)
+        package_root = str(Path(__file__).resolve().parents[2])
+        env['PYTHONPATH'] = os.pathsep.join(p for p in (package_root, env.get('PYTHONPATH')) if p)
+        with open(self.output_dir / 'plot.log', 'w') as log:
+            self.plot_process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                                 env=env, start_new_session=True)
+        logging.info(f"Plotting in background process {self.plot_process.pid} -> {plot_path}")
+
+    def summary(self):
+        """Scalar metrics of a finished run (spike counts, active neurons, selectivity or accuracy)."""
+        if self.evaluating:
+            return {k: self.evaluation[k] for k in ('accuracy', 'num_test_images', 'silent_fraction')}
+        metrics = {'simulated_ms': float(self.brian2_network.t / b2.ms)}
+        for layer, n, t, i in self._recorded_layers():
+            prefix = layer.lower()
+            metrics[f'{prefix}_spikes'] = int(len(t))
+            metrics[f'{prefix}_active'] = int(np.unique(i).size)
+            metrics[f'{prefix}_selectivity'] = selectivity_index(self._counts_per_digit(t, i, n))
+        return metrics
+
+    def spike_counts(self):
+        """(digit x neuron) spike counts in the presentation windows of every recorded layer ('L1', 'L2')."""
+        return {layer: self._counts_per_digit(t, i, n) for layer, n, t, i in self._recorded_layers()}
+
+    def _recorded_layers(self):
+        """(layer, size, spike times in ms, spike indices) of the layers with a spike monitor."""
+        hierarchy = self.network_objects['hierarchy']
+        for pos, name in enumerate(('spikes_L1', 'spikes_L2')):
+            if name in self.monitors:
+                n = hierarchy.layers_by_name[hierarchy.layers_in_order[pos]].excitatory_neurons.group.N
+                yield (name.split('_')[1], n, *self._spikes(name))
+
+    def _counts_per_digit(self, t, i, n):
+        win = {int(k): np.array([[w[0]/b2.ms, w[1]/b2.ms] for w in v]).reshape(-1, 2)
+               for k, v in self.windows_per_digit.items()}
+        return spike_counts_per_digit(t, i, win, n, digits=list(win))
+
     def save_results(self):
         logging.info("Saving results...")
+        self._lap(None)
         out = self.output_dir
         out.mkdir(parents=True, exist_ok=True)
+        if self.evaluating:
+            ev = self.evaluation
+            summary = {k: ev[k] for k in ('digits', 'accuracy', 'num_test_images', 'silent_fraction')}
+            summary['confusion'] = ev['confusion'].tolist()
+            with open(out / 'evaluation.json', 'w') as f:
+                json.dump(summary, f, indent=2)
+            pixels = {} if self.input_pixels is None else {'input_pixels': self.input_pixels}
+            np.savez_compressed(out / 'evaluation.npz', assignments=ev['assignments'],
+                                label_counts=ev['label_counts'], confusion=ev['confusion'], **pixels)
+            self._lap('save_raw')
+            self._write_profile()
+            logging.info("Results saved successfully.")
+            return
+        # windows per digit in ms, shared by the raw data dump and the count analysis
+        win = {int(k): np.array([[w[0]/b2.ms, w[1]/b2.ms] for w in v]).reshape(-1, 2)
+               for k, v in self.windows_per_digit.items()}
 
         # raw data
         if self.config['output_params'].get('save_raw_data', True):
             npz_payload = {}
-            # spikes L1
-            if 'spikes_L1' in self.monitors:
-                npz_payload['L1_t_ms'] = (self.monitors['spikes_L1'].t / b2.ms).astype(float)
-                npz_payload['L1_i'] = np.array(self.monitors['spikes_L1'].i)
-            # spikes L2
-            if 'spikes_L2' in self.monitors:
-                npz_payload['L2_t_ms'] = (self.monitors['spikes_L2'].t / b2.ms).astype(float)
-                npz_payload['L2_i'] = np.array(self.monitors['spikes_L2'].i)
-            # input
-            if 'input_spikes' in self.monitors:
-                npz_payload['inp_t_ms'] = (self.monitors['input_spikes'].t / b2.ms).astype(float)
-                npz_payload['inp_i'] = np.array(self.monitors['input_spikes'].i)
-            # weights
-            if 'weights_inp_l1' in self.monitors:
-                npz_payload['w_inp_l1_t_ms'] = (self.monitors['weights_inp_l1'].t / b2.ms).astype(float)
-                npz_payload['w_inp_l1'] = self.monitors['weights_inp_l1'].w.T
-            if 'weights_l1_l2' in self.monitors:
-                npz_payload['w_l1_l2_t_ms'] = (self.monitors['weights_l1_l2'].t / b2.ms).astype(float)
-                npz_payload['w_l1_l2'] = self.monitors['weights_l1_l2'].w.T
+            if self.input_pixels is not None:
+                # input neuron k is pixel input_pixels[k] of the 28x28 image (see analysis.receptive_field_matrix)
+                npz_payload['input_pixels'] = self.input_pixels
+            if self.recorder is not None:
+                # Spikes and weights already live in <output_dir>/recordings as .npy segments
+                logging.info(f"Recordings stored in {self.recorder.store.directory}")
+            else:
+                # spikes L1 / L2 / input
+                for name, prefix in (('spikes_L1', 'L1'), ('spikes_L2', 'L2'), ('input_spikes', 'inp')):
+                    if name in self.monitors:
+                        npz_payload[f'{prefix}_t_ms'], npz_payload[f'{prefix}_i'] = self._spikes(name)
+                # weights
+                for name, prefix in (('weights_inp_l1', 'w_inp_l1'), ('weights_l1_l2', 'w_l1_l2')):
+                    if name in self.monitors:
+                        npz_payload[f'{prefix}_t_ms'], npz_payload[prefix] = self._weights(name)
             # windows per digit
-            win = {int(k): np.array([[w[0]/b2.ms, w[1]/b2.ms] for w in v]) for k, v in self.windows_per_digit.items()}
             np.savez_compressed(out / 'raw_data.npz', **npz_payload, windows_per_digit=win)
+        self._lap('save_raw')
 
         # plots
-        if self.config['output_params'].get('save_plots', True) and 'spikes_L1' in self.monitors:
-            l1_name = self.network_objects['hierarchy'].layers_in_order[0]
-            N1 = self.network_objects['hierarchy'].layers_by_name[l1_name].excitatory_neurons.group.N
-            t1 = self.monitors['spikes_L1'].t
-            i1 = self.monitors['spikes_L1'].i
-
-            # Per-digit counts for L1 (if classic two-digit, still works)
-            counts_per_digit = {d: np.zeros(N1, dtype=int) for d in self.windows_per_digit.keys()}
-            for d, windows in self.windows_per_digit.items():
-                for t0, t1w in windows:
-                    mask = (t1 >= t0) & (t1 < t1w)
-                    if np.any(mask):
-                        idx, cnt = np.unique(i1[mask], return_counts=True)
-                        counts_per_digit[d][idx] += cnt
-
-            # Prepare figure with optional L2
+        out_p = self.config['output_params']
+        if out_p.get('save_plots', True) and 'spikes_L1' in self.monitors:
+            hierarchy = self.network_objects['hierarchy']
+            layers = [hierarchy.layers_by_name[n].excitatory_neurons.group.N for n in hierarchy.layers_in_order]
             has_l2 = 'spikes_L2' in self.monitors
-            fig_rows = 3 if has_l2 else 2
-            fig, axes = plt.subplots(fig_rows, 3 if has_l2 else 2, figsize=(18 if has_l2 else 14, 6 + 3*fig_rows))
-
-            # L1 raster
-            axes[0, 0].plot(t1 / b2.ms, i1, '.k', markersize=1)
-            axes[0, 0].set_title('L1 Spikes')
-            axes[0, 0].set_xlabel('Time (ms)')
-            axes[0, 0].set_ylabel('Neuron index')
-            axes[0, 0].grid(True, alpha=0.3)
-
-            # Simple preference plot for two digits if present, else sum top/bottom
-            if len(counts_per_digit) == 2:
-                digits = sorted(counts_per_digit.keys())
-                pref = counts_per_digit[digits[0]] - counts_per_digit[digits[1]]
-                colors = np.where(pref >= 0, 'tab:red', 'tab:blue')
-                axes[0, 1].bar(np.arange(N1), pref, color=colors, width=0.9)
-                axes[0, 1].set_title(f'Preference (pos: {digits[0]}, neg: {digits[1]})')
-                axes[0, 1].axhline(0, color='k', linewidth=0.8)
-            else:
-                total_counts = np.sum(np.stack(list(counts_per_digit.values()), axis=0), axis=0)
-                axes[0, 1].bar(np.arange(N1), total_counts, color='tab:gray', width=0.9)
-                axes[0, 1].set_title('L1 total spike counts (all digits)')
-
-            # Weight dynamics (Input->L1)
-            if 'weights_inp_l1' in self.monitors:
-                axes[1, 0].plot(self.monitors['weights_inp_l1'].t / b2.ms, self.monitors['weights_inp_l1'].w.T, alpha=0.7, linewidth=0.8)
-                axes[1, 0].set_title('Input→L1 weight dynamics (sampled)')
-                axes[1, 0].set_xlabel('Time (ms)')
-                axes[1, 0].set_ylabel('w')
-                axes[1, 0].grid(True, alpha=0.3)
-
-            # Summary text / L2 or L1->L2 weights
-            if has_l2:
-                t2 = self.monitors['spikes_L2'].t
-                i2 = self.monitors['spikes_L2'].i
-                axes[1, 1].plot(t2 / b2.ms, i2, '.k', markersize=1)
-                axes[1, 1].set_title('L2 Spikes')
-                axes[1, 1].set_xlabel('Time (ms)')
-                axes[1, 1].set_ylabel('Neuron index')
-                axes[1, 1].grid(True, alpha=0.3)
-
-                # L1->L2 weight dynamics if present
-                if 'weights_l1_l2' in self.monitors and fig_rows >= 3:
-                    axes[2, 0].plot(self.monitors['weights_l1_l2'].t / b2.ms, self.monitors['weights_l1_l2'].w.T, alpha=0.7, linewidth=0.8)
-                    axes[2, 0].set_title('L1→L2 weight dynamics (sampled)')
-                    axes[2, 0].set_xlabel('Time (ms)')
-                    axes[2, 0].set_ylabel('w')
-
-                # Enhanced L2 selectivity analysis and bar plot
-                try:
-                    l2_name = self.network_objects['hierarchy'].layers_in_order[1]
-                    N2 = self.network_objects['hierarchy'].layers_by_name[l2_name].excitatory_neurons.group.N
-                except Exception:
-                    N2 = None
-                if N2 is not None:
-                    # Calculate L2 spike counts per digit
-                    counts_l2 = {d: np.zeros(N2, dtype=int) for d in self.windows_per_digit.keys()}
-                    for d, windows in self.windows_per_digit.items():
-                        for t0, t1w in windows:
-                            m = (t2 >= t0) & (t2 < t1w)
-                            if np.any(m):
-                                idx, cnt = np.unique(i2[m], return_counts=True)
-                                # clip indices to N2 in case of any monitor drift
-                                mask_valid = idx < N2
-                                counts_l2[d][idx[mask_valid]] += cnt[mask_valid]
-                    
-                    # Find preferred digit for each L2 neuron
-                    digits_sorted = sorted(self.windows_per_digit.keys())
-                    mat = np.stack([counts_l2[d] for d in digits_sorted], axis=1)  # shape (N2, num_digits)
-                    pref_digit_idx = np.argmax(mat, axis=1)
-                    pref_digit = np.array(digits_sorted)[pref_digit_idx]
-                    pref_count = mat[np.arange(N2), pref_digit_idx]
-                    
-                    # Enhanced L2 selectivity bar chart
-                    ax_sel = axes[1, 2] if fig_rows == 3 else axes[1, 1]
-                    cmap = plt.get_cmap('tab10')
-                    colors = [cmap(int(d) % 10) for d in pref_digit]
-                    
-                    # Create bar chart with enhanced visualization
-                    bars = ax_sel.bar(np.arange(N2), pref_count, color=colors, width=0.9)
-                    ax_sel.set_title('L2 Neuron Selectivity Analysis\n(Bar color = Preferred Digit, Height = Spike Count)',
-                                   fontsize=10, fontweight='bold')
-                    ax_sel.set_xlabel('L2 Neuron Index', fontsize=9)
-                    ax_sel.set_ylabel('Spike Count for Preferred Digit', fontsize=9)
-                    ax_sel.grid(True, alpha=0.3, axis='y')
-                    
-                    # Add colorbar legend mapping digits to colors
-                    sm = plt.cm.ScalarMappable(cmap=cmap, norm=plt.Normalize(vmin=0, vmax=9))
-                    sm.set_array([])
-                    cbar = plt.colorbar(sm, ax=ax_sel, fraction=0.046, pad=0.04)
-                    cbar.set_ticks(np.arange(10))
-                    cbar.set_ticklabels([str(d) for d in range(10)])
-                    cbar.set_label('Digit', fontsize=9)
-                    
-                    # Add statistics text
-                    total_neurons = N2
-                    digit_specialists = {d: np.sum(pref_digit == d) for d in digits_sorted}
-                    max_specialists = max(digit_specialists.values())
-                    most_specialized_digit = [d for d, count in digit_specialists.items() if count == max_specialists][0]
-                    
-                    stats_text = f"Total L2 neurons: {total_neurons}\n"
-                    stats_text += f"Most specialized digit: {most_specialized_digit} ({max_specialists} neurons)\n"
-                    stats_text += f"Digit specialists: " + ", ".join([f"{d}:{count}" for d, count in digit_specialists.items()])
-                    
-                    ax_sel.text(0.02, 0.98, stats_text, transform=ax_sel.transAxes,
-                               fontsize=8, verticalalignment='top',
-                               bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-
-                    axes[2, 0].grid(True, alpha=0.3)
-
-                # Summary text
-                total_spikes_l1 = len(t1)
-                active_l1 = len(np.unique(i1))
-                total_spikes_l2 = len(t2)
-                active_l2 = len(np.unique(i2))
-                text = f"L1: spikes={total_spikes_l1}, active={active_l1}/{N1}\nL2: spikes={total_spikes_l2}, active={active_l2}"
-                axes[2 if fig_rows==3 else 1, 1].axis('off')
-                axes[2 if fig_rows==3 else 1, 1].text(0.05, 0.9, text, fontsize=12, va='top')
+            num_l2 = layers[1] if has_l2 and len(layers) > 1 else None
+            plot_mode = out_p.get('plot_mode', 'full')
+            if plot_mode not in ('full', 'decimated'):
+                raise ValueError(f"output_params.plot_mode must be 'full' or 'decimated', got '{plot_mode}'")
+            plot_kwargs = {'decimate': plot_mode == 'decimated',
+                           'raster_bins': int(out_p.get('plot_raster_bins', 1000)),
+                           'max_trace_points': int(out_p.get('plot_max_trace_points', 2000))}
+            background = out_p.get('plot_in_background', False)
+            if background and (self.recorder is not None or not out_p.get('save_raw_data', True)):
+                logging.warning("output_params.plot_in_background needs the spikes in raw_data.npz "
+                                "(save_raw_data without disk recording); plotting in-process.")
+                background = False
+            if background:
+                self._plot_in_background(out / 'raw_data.npz', out / 'final_plot.png', layers[0], num_l2, **plot_kwargs)
             else:
-                # No L2: put summary in bottom-right
-                total_spikes_l1 = len(t1)
-                active_l1 = len(np.unique(i1))
-                text = f"L1: spikes={total_spikes_l1}, active={active_l1}/{N1}"
-                axes[1, 1].axis('off')
-                axes[1, 1].text(0.05, 0.9, text, fontsize=12, va='top')
-
-            plt.tight_layout()
-            plt.savefig(out / 'final_plot.png', dpi=150, bbox_inches='tight')
+                from psinet.simulation.plotting import plot_final_results
+                plot_final_results(
+                    out / 'final_plot.png', win, self._spikes('spikes_L1'), layers[0],
+                    weights_inp_l1=self._weights('weights_inp_l1') if 'weights_inp_l1' in self.monitors else None,
+                    spikes_l2=self._spikes('spikes_L2') if has_l2 else None, num_l2=num_l2,
+                    weights_l1_l2=self._weights('weights_l1_l2') if has_l2 and 'weights_l1_l2' in self.monitors else None,
+                    **plot_kwargs,
+                )
+        self._lap('plotting')
+        self._write_profile()
 
         logging.info("Results saved successfully.")
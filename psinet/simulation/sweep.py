@@ -0,0 +1,154 @@
+import copy
+import csv
+import itertools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+SWEEP_MODES = ('grid', 'random')
+
+
+def set_by_path(config, path, value):
+    """
+    Set a nested config value from a dotted path, e.g. 'connections_params.inp_l1.a_plus'
+    or 'network_params.layers.0.lateral_strength' (integers index lists).
+    """
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+    last = keys[-1]
+    if isinstance(node, list):
+        node[int(last)] = value
+    else:
+        node[last] = value
+
+
+def expand_sweep(spec):
+    """
+    Expand a sweep specification into a list of {dotted_path: value} overrides.
+
+    Spec keys:
+        mode: 'grid' (cartesian product of value lists, default) or 'random'.
+        params: {dotted_path: [values...]} for grid; for random each entry is a list
+                of choices or a range {low, high, log: false}.
+        num_samples: Number of random points (random mode).
+        seed: Seed for random sampling.
+    """
+    mode = spec.get('mode', 'grid')
+    if mode not in SWEEP_MODES:
+        raise ValueError(f"Unknown sweep mode '{mode}', expected one of {SWEEP_MODES}")
+    params = spec.get('params') or {}
+    if not params:
+        raise ValueError("Sweep spec needs at least one entry under 'params'")
+    paths = list(params)
+
+    if mode == 'grid':
+        for path in paths:
+            if not isinstance(params[path], list):
+                raise ValueError(f"Grid sweep values for '{path}' must be a list")
+        return [dict(zip(paths, combo)) for combo in itertools.product(*(params[p] for p in paths))]
+
+    rng = np.random.default_rng(spec.get('seed'))
+    points = []
+    for _ in range(int(spec.get('num_samples', 8))):
+        point = {}
+        for path in paths:
+            p = params[path]
+            if isinstance(p, list):
+                point[path] = p[int(rng.integers(len(p)))]
+            elif p.get('log', False):
+                point[path] = float(np.exp(rng.uniform(np.log(p['low']), np.log(p['high']))))
+            else:
+                point[path] = float(rng.uniform(p['low'], p['high']))
+        points.append(point)
+    return points
+
+
+def sweep_configs(base_config, overrides, output_dir):
+    """One full config per sweep point, each writing to its own directory under output_dir."""
+    configs = []
+    base_id = base_config.get('run_id', 'sweep')
+    for k, point in enumerate(overrides):
+        cfg = copy.deepcopy(base_config)
+        for path, value in point.items():
+            set_by_path(cfg, path, value)
+        cfg['run_id'] = f"{base_id}_{k:03d}"
+        cfg.setdefault('output_params', {})['base_output_dir'] = str(Path(output_dir) / 'runs')
+        configs.append(cfg)
+    return configs
+
+
+def run_point(index, config, config_dir):
+    """
+    Worker: run one sweep point in this (fresh) process and return its summary row.
+
+    Failures are reported in the row instead of raised, so one bad point does not
+    abort the sweep.
+    """
+    from psinet.simulation.simulator import Simulator
+
+    config_path = Path(config_dir) / f"{config['run_id']}.yaml"
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    row = {'index': index, 'run_id': config['run_id'], 'status': 'ok'}
+    start = time.perf_counter()
+    try:
+        sim = Simulator(config_path=str(config_path))
+        sim.build()
+        sim.run()
+        sim.save_results()
+        row.update(sim.summary())
+        row['output_dir'] = str(sim.output_dir)
+    except Exception as e:
+        logging.exception(f"Sweep point {index} failed")
+        row['status'] = 'error'
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['wall_s'] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_sweep(base_config, spec, output_dir, workers=None):
+    """
+    Run every sweep point in a process pool and write <output_dir>/summary.csv.
+
+    Each point runs in its own freshly spawned process (one Brian2 instance and
+    device per run). Compiled code is shared through the configs' codegen_cache_dir:
+    the Cython cache and the topology-keyed cpp_standalone build directories are
+    reused by all workers, so points that only change parameters do not recompile.
+
+    Returns:
+        List of summary rows (dicts), ordered by sweep index.
+    """
+    output_dir = Path(output_dir)
+    config_dir = output_dir / 'configs'
+    config_dir.mkdir(parents=True, exist_ok=True)
+    overrides = expand_sweep(spec)
+    configs = sweep_configs(base_config, overrides, output_dir)
+    logging.info(f"Sweep: {len(configs)} runs, {workers or 'auto'} workers, output {output_dir}")
+
+    rows = []
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_point, k, cfg, str(config_dir)): k for k, cfg in enumerate(configs)}
+        for future in as_completed(futures):
+            k = futures[future]
+            row = {**overrides[k], **future.result()}
+            rows.append(row)
+            logging.info(f"Sweep point {k} finished ({row['status']}, {row['wall_s']} s)")
+    rows.sort(key=lambda r: r['index'])
+
+    fields = ['index', 'run_id', 'status'] + list(overrides[0])
+    for row in rows:
+        fields.extend(k for k in row if k not in fields)
+    with open(output_dir / 'summary.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Sweep summary written to {output_dir / 'summary.csv'}")
+    return rows
@@ -0,0 +1,63 @@
+import numpy as np
+
+from psinet.simulation.analysis import spike_counts_per_digit
+
+
+def _loop_counts(t, i, windows_ms, n, digits):
+    out = np.zeros((len(digits), n), dtype=int)
+    for r, d in enumerate(digits):
+        for t0, t1 in windows_ms[d]:
+            m = (t >= t0) & (t < t1) & (i < n)
+            np.add.at(out[r], i[m], 1)
+    return out
+
+
+def test_matches_window_loop():
+    rng = np.random.default_rng(0)
+    windows = {0: np.array([[0, 50], [140, 190]]), 1: np.array([[70, 120], [210, 260]]), 2: np.empty((0, 2))}
+    t = rng.uniform(0, 300, 5000)
+    i = rng.integers(0, 12, 5000)  # some indices beyond num_neurons
+    t[:4] = [0.0, 50.0, 120.0, 69.999]  # window edges are half-open
+    counts = spike_counts_per_digit(t, i, windows, 10)
+    assert counts.shape == (3, 10)
+    np.testing.assert_array_equal(counts, _loop_counts(t, i, windows, 10, [0, 1, 2]))
+
+
+def test_digit_order_and_empty_inputs():
+    windows = {3: [[0, 10]], 1: [[10, 20]]}
+    counts = spike_counts_per_digit([5.0, 15.0, 15.0], [0, 1, 1], windows, 2, digits=[3, 1])
+    np.testing.assert_array_equal(counts, [[1, 0], [0, 2]])
+    assert spike_counts_per_digit([], [], {}, 4).shape == (0, 4)
+
+
+def test_label_assignment_and_voting():
+    from psinet.simulation.analysis import assign_labels, classify_by_votes
+    counts = np.array([[10, 0, 4, 0],
+                       [0, 6, 4, 1]])
+    # Neuron 2 fires equally often but digit 0 was shown twice as many times
+    assignments = assign_labels(counts, presentations=[2, 1])
+    np.testing.assert_array_equal(assignments, [0, 1, 1, 1])
+    images = np.array([[5, 0, 0, 0], [0, 1, 1, 1], [0, 0, 0, 0]])
+    np.testing.assert_array_equal(classify_by_votes(images, assignments, 3), [0, 1, 0])
+
+
+def test_receptive_fields_of_pruned_input():
+    from psinet.simulation.analysis import receptive_field_matrix
+    # 3 kept pixels (of 6) fully connected to 2 neurons
+    i, j = np.repeat(np.arange(3), 2), np.tile(np.arange(2), 3)
+    w = np.arange(6, dtype=float) + 1
+    fields = receptive_field_matrix(w, i, j, 2, input_pixels=[0, 2, 5], num_pixels=6)
+    np.testing.assert_array_equal(fields, [[1, 0, 3, 0, 0, 5], [2, 0, 4, 0, 0, 6]])
+    np.testing.assert_array_equal(receptive_field_matrix(w, i, j, 2, num_pixels=3), [[1, 3, 5], [2, 4, 6]])
+
+
+def test_spike_count_drift():
+    from psinet.simulation.analysis import spike_count_drift
+    reference = np.array([[4, 0, 2], [0, 6, 0]])
+    same = spike_count_drift(reference, reference)
+    assert same['total_change'] == 0.0 and same['mean_abs_change'] == 0.0 and same['correlation'] == 1.0
+    drift = spike_count_drift(reference * 1.5, reference)
+    assert drift['total'] == 18 and drift['reference_total'] == 12
+    assert drift['total_change'] == 0.5 and drift['mean_abs_change'] == 0.5
+    assert np.isclose(drift['correlation'], 1.0)
+    assert spike_count_drift(np.zeros((2, 3)), reference)['correlation'] == 0.0
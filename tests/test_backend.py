@@ -0,0 +1,40 @@
+import pytest
+import brian2 as b2
+
+from psinet.simulation import backend
+
+
+def test_invalid_codegen_target_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        backend.select_codegen_target('fortran', cache_dir=tmp_path)
+
+
+def test_numpy_target_skips_probe(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, 'cython_available', lambda: pytest.fail("probe should not run"))
+    assert backend.select_codegen_target('numpy', cache_dir=tmp_path) == 'numpy'
+    assert b2.prefs.codegen.target == 'numpy'
+
+
+@pytest.mark.parametrize('requested', ['cython', 'auto'])
+def test_falls_back_to_numpy_without_compiler(tmp_path, monkeypatch, requested):
+    monkeypatch.setattr(backend, 'cython_available', lambda: False)
+    assert backend.select_codegen_target(requested, cache_dir=tmp_path) == 'numpy'
+    assert b2.prefs.codegen.target == 'numpy'
+
+
+def test_cython_selected_when_available(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, 'cython_available', lambda: True)
+    old_target = b2.prefs.codegen.target
+    old_cache = b2.prefs.codegen.runtime.cython.cache_dir
+    try:
+        assert backend.select_codegen_target('auto', cache_dir=tmp_path) == 'cython'
+        assert b2.prefs.codegen.runtime.cython.cache_dir == str((tmp_path / 'cython').resolve())
+    finally:
+        b2.prefs.codegen.target = old_target
+        b2.prefs.codegen.runtime.cython.cache_dir = old_cache
+
+
+def test_probe_has_no_side_effects():
+    before = b2.prefs.codegen.runtime.cython.cache_dir
+    backend.cython_available()
+    assert b2.prefs.codegen.runtime.cython.cache_dir == before
@@ -0,0 +1,25 @@
+from benchmarks.suite import build_cases, compare, scaled_config
+
+
+def test_scaled_config_halves_each_layer():
+    cfg = scaled_config(400, 3)
+    assert [l['num_excitatory'] for l in cfg['network_params']['layers']] == [400, 200, 100]
+    assert list(cfg['connections_params']) == ['inp_l1', 'l1_l2', 'l2_l3']
+
+
+def test_cases_are_offline_and_per_backend():
+    cases = build_cases(backends=('numpy', 'standalone'), sizes=(100,), layers=(1, 2))
+    names = [name for name, _ in cases]
+    assert 'scaled_l1-100_layers-2/standalone' in names
+    assert any(n.startswith('mnist_deep_hierarchy/') for n in names)
+    for name, cfg in cases:
+        assert cfg['input_params']['dataset'] == 'synthetic'
+        expected = 'cpp_standalone' if name.endswith('/standalone') else 'runtime'
+        assert cfg['simulation_params']['brian2_device'] == expected
+
+
+def test_compare_flags_regressions_in_both_directions():
+    base = {'results': [{'case': 'a', 'status': 'ok', 'run_s': 10.0, 'sim_speed': 1.0}]}
+    new = {'results': [{'case': 'a', 'status': 'ok', 'run_s': 13.0, 'sim_speed': 0.9}]}
+    rows = {metric: worse for _, metric, _, _, _, worse in compare(new, base, tolerance=0.2)}
+    assert rows == {'run_s': True, 'sim_speed': False}
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.network.hierarchy import Hierarchy
+from psinet.simulation.checkpoint import hierarchy_state, load_checkpoint, restore_hierarchy, save_checkpoint
+
+LAYERS = [{'name': 'L1', 'num_excitatory': 6, 'num_inhibitory': 2},
+          {'name': 'L2', 'num_excitatory': 4, 'num_inhibitory': 2}]
+PARAMS = {k: {'w_max': 1.0, 'a_plus': 0.01, 'a_minus': -0.01, 'tau_plus_ms': 20.0, 'tau_minus_ms': 20.0,
+              'initial_weight_max': 0.5} for k in ('inp_l1', 'l1_l2')}
+
+
+def _hierarchy():
+    return Hierarchy(b2.PoissonGroup(9, 0*b2.Hz), LAYERS, PARAMS)
+
+
+def test_roundtrip_restores_all_state(tmp_path):
+    src = _hierarchy()
+    src.layers_by_name['L1'].excitatory_neurons.group.theta = 'i * 0.25'
+    save_checkpoint(tmp_path / 'ck.npz', src, 'abc', {'presented': 3, 't_ms': 210.0})
+
+    dst = _hierarchy()
+    arrays, meta = load_checkpoint(tmp_path / 'ck.npz')
+    assert meta['position'] == {'presented': 3, 't_ms': 210.0}
+    assert all(a.dtype == np.float32 for a in arrays.values())
+    restore_hierarchy(dst, arrays, meta, 'abc')
+    for key, value in hierarchy_state(src).items():
+        np.testing.assert_array_equal(hierarchy_state(dst)[key], value)
+    np.testing.assert_allclose(dst.layers_by_name['L1'].excitatory_neurons.group.theta[:], np.arange(6) * 0.25)
+
+
+def test_topology_mismatch_is_rejected(tmp_path):
+    save_checkpoint(tmp_path / 'ck.npz', _hierarchy(), 'abc', {'presented': 0, 't_ms': 0.0})
+    arrays, meta = load_checkpoint(tmp_path / 'ck.npz')
+    with pytest.raises(ValueError):
+        restore_hierarchy(_hierarchy(), arrays, meta, 'other')
+    arrays['conn/inp_l1/w'] = arrays['conn/inp_l1/w'][:-1]
+    with pytest.raises(ValueError):
+        restore_hierarchy(_hierarchy(), arrays, meta, 'abc')
+
+
+def test_input_pixel_map_is_stored(tmp_path):
+    save_checkpoint(tmp_path / 'ck.npz', _hierarchy(), 'abc', {'presented': 0, 't_ms': 0.0},
+                    input_pixels=np.array([3, 7, 9]))
+    assert load_checkpoint(tmp_path / 'ck.npz')[1]['input_pixels'] == [3, 7, 9]
+    save_checkpoint(tmp_path / 'ck.npz', _hierarchy(), 'abc', {'presented': 0, 't_ms': 0.0})
+    assert 'input_pixels' not in load_checkpoint(tmp_path / 'ck.npz')[1]
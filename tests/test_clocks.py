@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.core.neuron import BionicNeuron
+from psinet.io.encoders import create_input_layer
+from psinet.simulation.clocks import checked_interval_ms, dt_variant
+
+
+def test_clock_intervals_must_be_whole_steps():
+    assert checked_interval_ms(None, 0.1, 'x') is None
+    assert checked_interval_ms(1.0, 0.1, 'x') == 1.0
+    assert checked_interval_ms(0.3, 0.1, 'x') == 0.3
+    for bad in (0.05, 0.25):
+        with pytest.raises(ValueError, match='whole multiple of dt'):
+            checked_interval_ms(bad, 0.1, 'x')
+
+
+def test_dt_variant_only_changes_the_time_step(tmp_path):
+    config = {'run_id': 'r', 'simulation_params': {'dt_ms': 0.1, 'checkpoint_every': 5, 'cycles': 2},
+              'output_params': {'save_plots': True}}
+    cfg = dt_variant(config, 0.05, tmp_path)
+    assert cfg['run_id'] == 'r_dt0.05' and cfg['simulation_params'] == {'dt_ms': 0.05, 'cycles': 2}
+    assert cfg['output_params']['base_output_dir'] == str(tmp_path / 'runs')
+    assert not cfg['output_params']['save_plots']
+    assert config['simulation_params']['dt_ms'] == 0.1  # the base config is untouched
+
+
+def test_theta_on_a_coarser_clock_decays_exactly_at_its_ticks():
+    b2.prefs.codegen.target = 'numpy'
+    b2.defaultclock.dt = 0.1*b2.ms
+    fine = BionicNeuron(3, tau_theta=20*b2.ms)
+    coarse = BionicNeuron(3, tau_theta=20*b2.ms, theta_dt=1*b2.ms)
+    for n in (fine, coarse):
+        n.group.theta = 0.5
+    net = b2.Network(fine.group, coarse.group)
+    net.run(5*b2.ms)
+    # The coarse clock ticked at 0, 1, ..., 4 ms: five 1 ms decays, as many as the fine integration
+    np.testing.assert_allclose(coarse.group.theta[:], 0.5 * np.exp(-5 / 20.0))
+    np.testing.assert_allclose(coarse.group.theta[:], fine.group.theta[:], rtol=1e-6)
+
+
+def test_input_layer_runs_on_its_own_clock():
+    b2.prefs.codegen.target = 'numpy'
+    b2.defaultclock.dt = 0.1*b2.ms
+    group = create_input_layer(np.full(4, 200.0) * b2.Hz, dt=1*b2.ms)
+    mon = b2.SpikeMonitor(group)
+    b2.Network(group, mon).run(50*b2.ms)
+    assert group.clock.dt == 1*b2.ms and mon.num_spikes > 0
+    np.testing.assert_allclose(np.asarray(mon.t / b2.ms) % 1.0, 0.0, atol=1e-9)
@@ -0,0 +1,27 @@
+import numpy as np
+import brian2 as b2
+
+from psinet.network.column import BionicColumn
+
+
+def test_fixed_inhibitory_wiring_is_static_and_single():
+    b2.prefs.codegen.target = 'numpy'
+    col = BionicColumn(num_excitatory=10, num_inhibitory=3)
+    e_to_i = col.E_to_I_synapse.synapses
+    i_to_e = col.I_to_E_synapse.synapses
+    assert len(e_to_i) == 10 * 3
+    assert len(i_to_e) == 3 * 10
+    for syn in (e_to_i, i_to_e):
+        assert 'apre' not in syn.variables and 'Apre' not in syn.variables
+        assert syn.variables['w'].scalar
+    assert float(e_to_i.w[:]) == 2.0
+    assert float(i_to_e.w[:]) == -3.0
+
+
+def test_static_weights_survive_activity():
+    b2.prefs.codegen.target = 'numpy'
+    col = BionicColumn(num_excitatory=5, num_inhibitory=2, enable_lateral_inhibition=False)
+    col.excitatory_neurons.group.I = 2.0
+    b2.Network(*col.all_objects).run(30*b2.ms)
+    assert np.all(col.E_to_I_synapse.synapses.w[:] == 2.0)
+    assert np.all(col.I_to_E_synapse.synapses.w[:] == -3.0)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.core.connectivity import connection_indices
+from psinet.core.synapse import BionicSynapse, StaticSynapse
+
+
+def test_all_to_all_and_exclude_self():
+    i, j = connection_indices(None, 4, 4, exclude_self=True)
+    assert len(i) == 12 and not np.any(i == j)
+    i, j = connection_indices({'type': 'all'}, 3, 5)
+    assert len(set(zip(i, j))) == 15
+
+
+def test_random_is_seeded_unique_and_near_p():
+    spec = {'type': 'random', 'p': 0.1, 'seed': 3}
+    i, j = connection_indices(spec, 200, 300)
+    i2, j2 = connection_indices(spec, 200, 300)
+    np.testing.assert_array_equal(i, i2)
+    assert len(set(zip(i, j))) == len(i)
+    assert abs(len(i) / (200 * 300) - 0.1) < 0.01
+
+
+def test_fan_in_gives_exactly_k_distinct_inputs():
+    i, j = connection_indices({'type': 'fan_in', 'k': 7, 'seed': 0}, 20, 20, exclude_self=True)
+    counts = np.bincount(j, minlength=20)
+    assert np.all(counts == 7)
+    assert not np.any(i == j)
+    for post in range(20):
+        assert len(np.unique(i[j == post])) == 7
+    with pytest.raises(ValueError):
+        connection_indices({'type': 'fan_in', 'k': 30}, 20, 5)
+
+
+def test_receptive_fields_cover_local_patches():
+    i, j = connection_indices({'type': 'receptive_field', 'patch_size': 5, 'stride': 3}, 784, 90)
+    assert np.all(np.bincount(j) == 25)
+    rows, cols = np.divmod(i[j == 0], 28)
+    assert rows.min() == 0 and rows.max() == 4 and cols.min() == 0 and cols.max() == 4
+    # 8x8 positions on the grid; neuron 1 is shifted right by the stride
+    rows, cols = np.divmod(i[j == 1], 28)
+    assert cols.min() == 3 and rows.min() == 0
+    # neurons wrap around the 64 grid positions
+    np.testing.assert_array_equal(i[j == 64], i[j == 0])
+    with pytest.raises(ValueError):
+        connection_indices({'type': 'receptive_field'}, 100, 10)
+
+
+def test_synapses_use_connectivity_spec():
+    b2.prefs.codegen.target = 'numpy'
+    pre = b2.NeuronGroup(30, 'v : 1', threshold='v > 1')
+    post = b2.NeuronGroup(10, 'v : 1', threshold='v > 1')
+    syn = BionicSynapse(pre, post, stdp_mode='event', connectivity={'type': 'fan_in', 'k': 4, 'seed': 1})
+    assert syn.num_connections == len(syn.synapses) == 40
+    lat = StaticSynapse(post, post, weight=-0.2, exclude_self=True)
+    assert lat.num_connections == len(lat.synapses) == 90
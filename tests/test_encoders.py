@@ -0,0 +1,80 @@
+import numpy as np
+import brian2 as b2
+
+from psinet.io.encoders import (
+    image_to_poisson_rates, encode_rates, cached_rate_matrix, rates_to_spikes,
+    create_spike_input_layer, set_input_spikes, active_input_indices,
+)
+
+
+def _images(n=6):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(n, 28, 28), dtype=np.uint8)
+
+
+def test_encode_rates_matches_image_to_poisson_rates():
+    images = _images()
+    for invert in (False, True):
+        rates = encode_rates(images, max_rate_hz=150.0, min_rate_hz=10.0, invert=invert)
+        assert rates.dtype == np.float32 and rates.flags['C_CONTIGUOUS'] and rates.shape == (6, 784)
+        expected = image_to_poisson_rates(images, min_rate=10*b2.Hz, max_rate=150*b2.Hz, invert=invert) / b2.Hz
+        np.testing.assert_allclose(rates, expected, rtol=1e-5, atol=1e-4)
+
+
+def test_cached_rate_matrix_is_reused_and_keyed(tmp_path):
+    images = _images()
+    first = cached_rate_matrix(images, tmp_path, 'test', indices=[4, 1], max_rate_hz=100.0, chunk_size=1)
+    assert isinstance(first, np.memmap)
+    np.testing.assert_allclose(first, encode_rates(images[[4, 1]], 100.0))
+    assert len(list(tmp_path.glob('*.npy'))) == 1
+
+    # Same key: served from the cache file (even if the source images changed)
+    again = cached_rate_matrix(np.zeros_like(images), tmp_path, 'test', indices=[4, 1], max_rate_hz=100.0)
+    np.testing.assert_array_equal(again, first)
+
+    # Any key change produces a new entry
+    cached_rate_matrix(images, tmp_path, 'test', indices=[4, 1], max_rate_hz=50.0)
+    whole = cached_rate_matrix(images, tmp_path, 'test', max_rate_hz=100.0)
+    assert whole.shape == (6, 784)
+    assert len(list(tmp_path.glob('*.npy'))) == 3
+    assert np.shares_memory(whole[2], whole)  # rows are views
+
+
+def test_spike_encodings_are_deterministic_and_skip_silent_pixels():
+    rates = np.array([[0.0, 150.0, 75.0, 0.0], [30.0, 0.0, 150.0, 150.0]], dtype=np.float32)
+    rows, idx, t = rates_to_spikes(rates, 'latency', 50.0, 150.0)
+    np.testing.assert_array_equal(rows, [0, 0, 1, 1, 1])
+    np.testing.assert_array_equal(idx, [1, 2, 0, 2, 3])
+    np.testing.assert_allclose(t, [0.0, 25.0, 40.0, 0.0, 0.0])
+
+    rows, idx, t = rates_to_spikes(rates, 'rank_order', 30.0, 150.0)
+    np.testing.assert_array_equal(idx, [1, 2, 0, 2, 3])
+    np.testing.assert_allclose(t, [0.0, 15.0, 20.0, 0.0, 10.0])  # ties keep pixel order
+
+    rows, idx, t = rates_to_spikes(rates, 'regular', 50.0, 150.0)
+    assert np.all(t < 50.0) and not np.isin(idx[rows == 0], [0, 3]).any()
+    np.testing.assert_allclose(t[(rows == 0) & (idx == 2)], [1000 / 75, 2000 / 75, 3000 / 75])
+
+
+def test_spike_input_layer_replays_loaded_spikes():
+    b2.prefs.codegen.target = 'numpy'
+    group = create_spike_input_layer(4)
+    mon = b2.SpikeMonitor(group)
+    net = b2.Network(group, mon)
+    net.run(1*b2.ms)
+    set_input_spikes(group, [1, 2], [0.0, 5.0], offset=net.t)
+    net.run(10*b2.ms)
+    set_input_spikes(group, [3], [2.0], offset=net.t)
+    net.run(5*b2.ms)
+    np.testing.assert_allclose(mon.t / b2.ms, [1.0, 6.0, 13.0])
+    np.testing.assert_array_equal(mon.i, [1, 2, 3])
+
+
+def test_active_input_indices_drops_silent_pixels():
+    rates = np.zeros((4, 6), dtype=np.float32)
+    rates[0, 1] = rates[1, 1] = rates[2, 1] = 50.0
+    rates[3, 4] = 10.0
+    np.testing.assert_array_equal(active_input_indices(rates, chunk_size=3), [1, 4])
+    np.testing.assert_array_equal(active_input_indices(rates, min_active_fraction=0.5), [1])
+    np.testing.assert_array_equal(active_input_indices(rates, rows=[3, 0]), [1, 4])
+    np.testing.assert_array_equal(active_input_indices(rates, rows=[0]), [1])
@@ -0,0 +1,40 @@
+import numpy as np
+import brian2 as b2
+
+from psinet.network.hierarchy import Hierarchy
+
+LAYERS = [{'name': 'L1', 'num_excitatory': 8, 'num_inhibitory': 2},
+          {'name': 'L2', 'num_excitatory': 4, 'num_inhibitory': 1}]
+PARAMS = {
+    'inp_l1': {'w_max': 0.3, 'a_plus': 0.01, 'a_minus': -0.01, 'tau_plus_ms': 20.0, 'tau_minus_ms': 15.0,
+               'initial_weight_max': 0.1},
+    'l1_l2': {'w_max': 0.8, 'a_plus': 0.02, 'a_minus': -0.02, 'tau_plus_ms': 20.0, 'tau_minus_ms': 20.0,
+              'initial_weight_max': 0.2},
+}
+
+
+def _build(seed):
+    b2.prefs.codegen.target = 'numpy'
+    return Hierarchy(b2.PoissonGroup(6, 0*b2.Hz), LAYERS, PARAMS, seed=seed)
+
+
+def _weights(h):
+    syns = [h.layers_by_name[n].E_to_E_synapse for n in h.layers_in_order] + list(h.connections.values())
+    return [np.array(s.synapses.w_[:]) for s in syns]
+
+
+def test_stdp_parameters_are_shared_scalars():
+    s = _build(0).connections['inp_l1'].synapses
+    for name in ('taupre', 'taupost', 'wmax', 'Apre', 'Apost'):
+        assert s.variables[name].scalar
+    assert float(s.taupost_[:]) == 0.015
+    assert float(s.wmax[:]) == 0.3
+
+
+def test_seeded_weights_are_reproducible_and_in_range():
+    first, second, other = _weights(_build(5)), _weights(_build(5)), _weights(_build(6))
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(first[2], other[2])
+    w_inp = first[2]
+    assert w_inp.shape == (6 * 8,) and np.all((w_inp >= 0) & (w_inp < 0.1))
@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# Pure NumPy/YAML core: config sweeps, encoders, loaders, schedules, analysis, checkpoints
+CORE_MODULES = ('psinet.io', 'psinet.io.loaders', 'psinet.simulation.analysis', 'psinet.simulation.schedule',
+                'psinet.simulation.checkpoint', 'psinet.simulation.sweep', 'psinet.simulation.clocks')
+HEAVY_MODULES = ('brian2', 'matplotlib', 'sympy', 'torch', 'torchvision')
+# Generous wall-time budget for importing the core in a fresh interpreter (typically ~0.2 s)
+CORE_IMPORT_BUDGET_S = 1.5
+
+
+def _fresh_import(modules):
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"for name in {list(modules)!r}:\n"
+        "    __import__(name)\n"
+        "print(json.dumps({'seconds': time.perf_counter() - t0, 'modules': sorted(sys.modules)}))\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_core_imports_without_heavy_dependencies():
+    result = _fresh_import(CORE_MODULES)
+    loaded = set(result['modules'])
+    assert not loaded & set(HEAVY_MODULES)
+    assert result['seconds'] < CORE_IMPORT_BUDGET_S
+
+
+def test_simulator_defers_plotting():
+    loaded = set(_fresh_import(['psinet.simulation.simulator'])['modules'])
+    assert 'psinet.simulation.plotting' not in loaded
+    assert 'torch' not in loaded
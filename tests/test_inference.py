@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.io.encoders import create_spike_input_layer, set_input_spikes, rates_to_spikes
+from psinet.network.hierarchy import Hierarchy
+from psinet.simulation.inference import InferenceEngine, export_hierarchy
+
+LAYERS = [{'name': 'L1', 'num_excitatory': 20, 'num_inhibitory': 5, 'lateral_strength': 0.2, 'stdp_mode': 'frozen'},
+          {'name': 'L2', 'num_excitatory': 10, 'num_inhibitory': 3, 'lateral_inhibition_mode': 'population',
+           'stdp_mode': 'frozen'}]
+PARAMS = {name: {'w_max': 1.0, 'a_plus': 0.01, 'a_minus': -0.01, 'tau_plus_ms': 20.0, 'tau_minus_ms': 20.0,
+                 'initial_weight_max': w, 'stdp_mode': 'frozen'}
+          for name, w in (('inp_l1', 0.3), ('l1_l2', 0.6))}
+NUM_INPUTS = 50
+SHOW_MS = 50.0
+
+
+def _build(theta_interval_ms=None):
+    b2.prefs.codegen.target = 'numpy'
+    input_layer = create_spike_input_layer(NUM_INPUTS)
+    layers = [dict(l, theta_update_interval_ms=theta_interval_ms) for l in LAYERS]
+    return input_layer, Hierarchy(input_layer, layers, PARAMS, seed=1)
+
+
+def _rates(n=6):
+    return np.random.default_rng(0).random((n, NUM_INPUTS)).astype(np.float32) * 150
+
+
+def test_export_folds_population_inhibition_into_lateral_weights():
+    _, h = _build()
+    l1, l2 = export_hierarchy(h)
+    assert l1['ff'].shape == (NUM_INPUTS, 20) and l2['ff'].shape == (20, 10)
+    assert l1['ei'].shape == (20, 5) and l1['ie'].shape == (5, 20)
+    col = h.layers_by_name['L2']
+    ee = col.E_to_E_synapse.synapses
+    excitatory = np.zeros((10, 10))
+    excitatory[ee.i[:], ee.j[:]] = ee.w_[:]
+    strength = float(col.E_lateral_inhib.broadcast.strength_[:])
+    np.testing.assert_allclose(l2['ee'], excitatory - strength * (1 - np.eye(10)))
+
+
+@pytest.mark.parametrize('theta_interval_ms', [None, 1.0])
+def test_engine_matches_brian2_on_deterministic_spikes(theta_interval_ms):
+    input_layer, h = _build(theta_interval_ms)
+    monitors = {n: b2.SpikeMonitor(h.layers_by_name[n].excitatory_neurons.group) for n in h.layers_in_order}
+    net = h.build_network(*monitors.values())
+    groups = [g for n in h.layers_in_order
+              for g in (h.layers_by_name[n].excitatory_neurons.group, h.layers_by_name[n].inhibitory_neurons.group)]
+    engine = InferenceEngine.from_hierarchy(h, dtype=np.float64)
+    rows, indices, times = rates_to_spikes(_rates(), 'regular', SHOW_MS, 150.0)
+
+    # Brian2: one image after another, each from a freshly reset state (as the engine does)
+    expected = {n: [] for n in h.layers_in_order}
+    for k in range(6):
+        net.run(10*b2.ms)  # outlasts the refractory period
+        for g in groups:
+            g.v_[:] = 0
+            g.theta_[:] = 0
+        before = {n: np.bincount(m.i[:], minlength=m.source.N) for n, m in monitors.items()}
+        sel = rows == k
+        set_input_spikes(input_layer, indices[sel], times[sel], offset=net.t)
+        net.run(SHOW_MS*b2.ms)
+        for n, m in monitors.items():
+            expected[n].append(np.bincount(m.i[:], minlength=m.source.N) - before[n])
+
+    for n in h.layers_in_order:
+        counts = engine.run(SHOW_MS, spikes=(rows, indices, times), num_images=6, readout=n)
+        assert counts.sum() > 0
+        np.testing.assert_array_equal(counts, np.array(expected[n]))
+
+
+def test_early_exit_stops_images_independently():
+    _, h = _build()
+    engine = InferenceEngine.from_hierarchy(h)
+    rates = _rates(8)
+    rates[3] = 0  # never reaches min_spikes
+    full = engine.run(SHOW_MS, rates_hz=rates, readout='L1', seed=3)
+    early = engine.run(SHOW_MS, rates_hz=rates, readout='L1', min_spikes=2, check_interval_ms=1.0, seed=3)
+    assert early.shape == full.shape == (8, 20)
+    assert early[3].sum() == full[3].sum() == 0
+    reached = full.sum(axis=1) >= 2
+    assert np.all(early.sum(axis=1)[reached] >= 2)
+    assert early.sum() < full.sum()
+    # Seeded Poisson input is reproducible
+    np.testing.assert_array_equal(full, engine.run(SHOW_MS, rates_hz=rates, readout='L1', seed=3))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.network.column import BionicColumn
+
+
+def _run_column(mode):
+    b2.prefs.codegen.target = 'numpy'
+    b2.seed(7)
+    col = BionicColumn(num_excitatory=12, num_inhibitory=3, lateral_strength=0.3,
+                       lateral_inhibition_mode=mode)
+    exc = col.excitatory_neurons.group
+    exc.I = np.linspace(1.2, 3.0, 12)
+    mon = b2.SpikeMonitor(exc)
+    vmon = b2.StateMonitor(exc, 'v', record=True)
+    b2.Network(*col.all_objects, mon, vmon).run(60*b2.ms)
+    return np.asarray(mon.t / b2.ms), np.asarray(mon.i), np.asarray(vmon.v)
+
+
+def test_population_inhibition_matches_synapses():
+    t_syn, i_syn, v_syn = _run_column('synapses')
+    t_pop, i_pop, v_pop = _run_column('population')
+    assert len(t_syn) > 0
+    np.testing.assert_array_equal(i_syn, i_pop)
+    np.testing.assert_allclose(t_syn, t_pop)
+    np.testing.assert_allclose(v_syn, v_pop, atol=1e-9)
+
+
+def test_population_inhibition_is_linear_in_size():
+    b2.prefs.codegen.target = 'numpy'
+    col = BionicColumn(num_excitatory=50, num_inhibitory=2, lateral_inhibition_mode='population')
+    assert len(col.E_lateral_inhib.collect) + len(col.E_lateral_inhib.broadcast) == 100
+    with pytest.raises(ValueError):
+        BionicColumn(num_excitatory=5, num_inhibitory=2, lateral_inhibition_mode='population',
+                     lateral_connectivity={'type': 'random', 'p': 0.5})
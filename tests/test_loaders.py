@@ -0,0 +1,57 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from psinet.io.loaders import load_mnist, read_idx
+
+
+def _write_idx(path, array):
+    header = bytes([0, 0, 0x08, array.ndim]) + np.array(array.shape, dtype='>u4').tobytes()
+    payload = header + array.astype(np.uint8).tobytes()
+    if path.suffix == '.gz':
+        with gzip.open(path, 'wb') as f:
+            f.write(payload)
+    else:
+        path.write_bytes(payload)
+
+
+@pytest.fixture
+def mnist_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    raw = tmp_path / 'mnist' / 'MNIST' / 'raw'
+    raw.mkdir(parents=True)
+    images = rng.integers(0, 256, size=(12, 28, 28), dtype=np.uint8)
+    labels = rng.integers(0, 10, size=12, dtype=np.uint8)
+    _write_idx(raw / 'train-images-idx3-ubyte.gz', images)
+    _write_idx(raw / 'train-labels-idx1-ubyte', labels)
+    return tmp_path, images, labels
+
+
+def test_read_idx_memmaps_plain_files(mnist_dir):
+    base, _, labels = mnist_dir
+    arr = read_idx(base / 'mnist' / 'MNIST' / 'raw' / 'train-labels-idx1-ubyte')
+    assert isinstance(arr, np.memmap)
+    np.testing.assert_array_equal(arr, labels)
+
+
+def test_load_mnist_converts_once_then_memmaps(mnist_dir):
+    base, images, labels = mnist_dir
+    imgs, labs = load_mnist(str(base))
+    assert (base / 'mnist' / 'train_images.npy').exists()
+    assert isinstance(imgs, np.memmap) and imgs.dtype == np.uint8
+    np.testing.assert_array_equal(imgs[[3, 7]], images[[3, 7]])
+    np.testing.assert_array_equal(labs, labels)
+    # Raw files are no longer needed once cached
+    for f in (base / 'mnist' / 'MNIST' / 'raw').iterdir():
+        f.unlink()
+    imgs2, _ = load_mnist(str(base))
+    np.testing.assert_array_equal(imgs2, images)
+
+
+def test_missing_split_raises(mnist_dir):
+    base, _, _ = mnist_dir
+    with pytest.raises(FileNotFoundError):
+        load_mnist(str(base), split='test')
+    with pytest.raises(ValueError):
+        load_mnist(str(base), split='validation')
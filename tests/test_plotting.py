@@ -0,0 +1,33 @@
+import numpy as np
+
+from psinet.simulation.plotting import decimate_trace, raster_image, plot_from_raw
+
+
+def test_decimated_traces_keep_extremes_within_budget():
+    t = np.arange(10000, dtype=float)
+    w = np.zeros((10000, 2))
+    w[5003, 0], w[7001, 1] = 1.0, -1.0
+    td, wd = decimate_trace(t, w, max_points=100)
+    assert len(td) == len(wd) <= 100 and wd.shape[1] == 2
+    assert wd[:, 0].max() == 1.0 and wd[:, 1].min() == -1.0
+    assert np.all(np.diff(td) >= 0)
+    short_t, short_w = decimate_trace(t[:50], w[:50], max_points=100)
+    assert len(short_t) == len(short_w) == 50
+
+
+def test_raster_image_counts_every_spike():
+    rng = np.random.default_rng(0)
+    t, i = rng.uniform(0, 500, 20000), rng.integers(0, 40, 20000)
+    counts, extent = raster_image(t, i, 40, 500.0, time_bins=50, neuron_bins=10)
+    assert counts.shape == (10, 50) and counts.sum() == 20000
+    assert extent == (0.0, 500.0, 0.0, 40.0)
+
+
+def test_plot_from_raw_data(tmp_path):
+    rng = np.random.default_rng(1)
+    win = {0: np.array([[0.0, 50.0]]), 1: np.array([[70.0, 120.0]])}
+    np.savez_compressed(tmp_path / 'raw_data.npz', L1_t_ms=np.sort(rng.uniform(0, 120, 500)),
+                        L1_i=rng.integers(0, 8, 500), w_inp_l1_t_ms=np.arange(1200) * 0.1,
+                        w_inp_l1=rng.random((1200, 3)), windows_per_digit=win)
+    plot_from_raw(tmp_path / 'raw_data.npz', tmp_path / 'plot.png', num_l1=8, raster_bins=20, max_trace_points=50)
+    assert (tmp_path / 'plot.png').stat().st_size > 0
@@ -0,0 +1,44 @@
+import brian2 as b2
+
+from psinet.simulation.profiling import PhaseProfiler, aggregate_by_component, monitor_sizes
+
+
+def test_phase_profiler_accumulates_calls():
+    profiler = PhaseProfiler()
+    for _ in range(3):
+        with profiler.phase('run'):
+            pass
+    profiler.lap('build')
+    assert profiler.phases['run']['calls'] == 3
+    assert profiler.phases['build']['calls'] == 1
+    assert profiler.phases['run']['total_s'] >= profiler.phases['run']['max_s'] >= 0.0
+
+
+def test_brian2_profiles_are_summed_across_runs():
+    profiler = PhaseProfiler()
+    profiler.add_brian2_profile([('synapses_pre', 1.0)])
+    profiler.add_brian2_profile([('synapses_pre', 0.5), ('neurongroup_stateupdater', 2.0)])
+    assert profiler.codeobject_s == {'synapses_pre': 1.5, 'neurongroup_stateupdater': 2.0}
+
+
+def test_aggregate_uses_longest_object_name():
+    names = {'synapses_1': 'inp_l1', 'synapses_10': 'L1/E->E', 'spikemonitor': 'monitor:spikes_L1'}
+    times = {'synapses_1_pre': 1.0, 'synapses_10_pre': 2.0, 'synapses_10_stateupdater': 0.5,
+             'spikemonitor': 0.25, 'neurongroup_thresholder': 4.0}
+    totals = aggregate_by_component(times, names)
+    assert totals == {'other': 4.0, 'L1/E->E': 2.5, 'inp_l1': 1.0, 'monitor:spikes_L1': 0.25}
+    assert list(totals)[0] == 'other'
+
+
+def test_monitor_sizes_count_entries():
+    b2.prefs.codegen.target = 'numpy'
+    group = b2.NeuronGroup(3, 'v : 1', threshold='True')
+    spikes = b2.SpikeMonitor(group)
+    counts = b2.SpikeMonitor(group, record=False)
+    states = b2.StateMonitor(group, 'v', record=[0, 1])
+    b2.Network(group, spikes, counts, states).run(1*b2.ms)
+    sizes = monitor_sizes({'spikes': spikes, 'counts': counts, 'states': states})
+    steps = int(round(1*b2.ms / b2.defaultclock.dt))
+    assert sizes['spikes'] == {'entries': 3 * steps, 'bytes': 3 * steps * 12}
+    assert sizes['counts']['bytes'] == 0
+    assert sizes['states'] == {'entries': steps, 'bytes': steps * (8 + 16)}
@@ -0,0 +1,38 @@
+import numpy as np
+import brian2 as b2
+
+from psinet.simulation.recording import DiskRecorder, SegmentStore
+
+
+def test_segment_store_appends_and_concatenates(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.append('x', a=np.arange(3), b=np.ones((3, 2)))
+    store.append('x', a=np.arange(3, 5), b=np.zeros((2, 2)))
+    np.testing.assert_array_equal(store.load('x', 'a'), np.arange(5))
+    assert store.load('x', 'b').shape == (5, 2)
+    assert store.load('missing', 'a').shape == (0,)
+
+
+def test_recorder_flushes_and_clears_monitors(tmp_path):
+    b2.prefs.codegen.target = 'numpy'
+    b2.seed(1)
+    group = b2.PoissonGroup(5, 200*b2.Hz)
+    syn = b2.Synapses(group, group, 'w : 1')
+    syn.connect()
+    syn.w = "j * 0.1"
+    spikes = b2.SpikeMonitor(group)
+    weights = b2.StateMonitor(syn, 'w', record=[0, 3], dt=1*b2.ms)
+    recorder = DiskRecorder(tmp_path, flush_interval=20*b2.ms)
+    recorder.add_spike_monitor('spikes', spikes)
+    recorder.add_weight_monitor('weights', weights)
+    b2.Network(group, syn, spikes, weights, recorder.operation).run(100*b2.ms)
+    recorder.flush()
+
+    assert spikes.num_spikes == 0 and len(weights.t) == 0
+    t, i = recorder.spikes('spikes')
+    assert t.size == i.size == spikes.count[:].sum() > 0
+    assert np.all(np.diff(t) >= 0)
+    tw, w = recorder.weights('weights')
+    np.testing.assert_allclose(tw, np.arange(100))
+    np.testing.assert_allclose(w, np.tile([0.0, 0.3], (100, 1)))
+    assert len(list((tmp_path / 'spikes').glob('t_ms_*.npy'))) > 1
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.network.hierarchy import Hierarchy
+from psinet.simulation.replicas import ReplicaGroup, plastic_synapses, plastic_size
+
+LAYERS = [{'name': 'L1', 'num_excitatory': 6, 'num_inhibitory': 2},
+          {'name': 'L2', 'num_excitatory': 4, 'num_inhibitory': 2}]
+PARAMS = {k: {'w_max': 1.0, 'a_plus': 0.01, 'a_minus': -0.01, 'tau_plus_ms': 20.0, 'tau_minus_ms': 20.0,
+              'initial_weight_max': 0.5} for k in ('inp_l1', 'l1_l2')}
+
+
+def _hierarchy(seed):
+    b2.prefs.codegen.target = 'numpy'
+    return Hierarchy(b2.PoissonGroup(9, 0*b2.Hz), LAYERS, PARAMS, seed=seed)
+
+
+def _weights(h):
+    return np.concatenate([np.array(s.w_[:]) for s in plastic_synapses(h)])
+
+
+def _in_threads(groups, method, hierarchies):
+    # Replicas normally live in separate processes; the barrier works across threads as well
+    errors = []
+
+    def target(group, h):
+        try:
+            getattr(group, method)(h)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=target, args=args) for args in zip(groups, hierarchies)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    return errors
+
+
+def test_replicas_start_from_replica_zero_and_merge_to_the_mean(tmp_path):
+    hierarchies = [_hierarchy(seed) for seed in (0, 1, 2)]
+    parent = ReplicaGroup.create(3, plastic_size(hierarchies[0]), merge_every=4, output_dir=tmp_path)
+    groups = [parent, parent.worker(1), parent.worker(2)]
+    try:
+        start = _weights(hierarchies[0])
+        assert not _in_threads(groups, 'broadcast', hierarchies)
+        for h in hierarchies:
+            np.testing.assert_array_equal(_weights(h), start)
+
+        # Local training changes the replicas differently
+        for k, h in enumerate(hierarchies):
+            h.connections['inp_l1'].synapses.w_[:] = 0.1 * k
+        expected = np.mean([_weights(h) for h in hierarchies], axis=0)
+        assert not _in_threads(groups, 'merge', hierarchies)
+        for h in hierarchies:
+            np.testing.assert_allclose(_weights(h), expected)
+        assert all(g.merges == 1 for g in groups)
+    finally:
+        for g in groups[1:]:
+            g.close()
+        assert parent.close() == []
+
+
+def test_failed_replica_releases_the_others(tmp_path):
+    h = _hierarchy(0)
+    parent = ReplicaGroup.create(2, plastic_size(h), merge_every=4, output_dir=tmp_path)
+    try:
+        parent.abort()  # what a crashing worker does
+        with pytest.raises(RuntimeError, match='another training replica failed'):
+            parent.merge(h)
+    finally:
+        parent.close()
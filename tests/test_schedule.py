@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.io.encoders import create_scheduled_input_layer
+from psinet.simulation.schedule import build_presentation_sequence, CompiledSchedule
+
+
+def test_sequence_covers_every_digit_each_cycle():
+    seq = build_presentation_sequence([0, 1, 2], cycles=4, shuffle=True)
+    assert len(seq) == 12
+    for c in range(4):
+        assert sorted(seq[3*c:3*c+3]) == [0, 1, 2]
+    assert build_presentation_sequence([0, 1], cycles=2) == [0, 1, 0, 1]
+
+
+def test_slot_table_and_trailing_silence():
+    sched = CompiledSchedule([1, 0, 1], [0, 1], show_ms=50, rest_ms=20)
+    assert sched.slot_ms == 10.0
+    assert (sched.show_slots, sched.rest_slots) == (5, 2)
+    assert sched.silence_row == 2
+    expected = [1]*5 + [2]*2 + [0]*5 + [2]*2 + [1]*5 + [2]*2 + [2]
+    np.testing.assert_array_equal(sched.slot_pattern, expected)
+    assert sched.duration_ms == 210.0
+
+
+def test_windows_match_show_phases():
+    sched = CompiledSchedule([1, 0, 1], [0, 1], show_ms=50, rest_ms=20)
+    assert sched.windows_ms() == {0: [(70.0, 120.0)], 1: [(0.0, 50.0), (140.0, 190.0)]}
+
+
+def test_zero_rest_uses_show_as_slot():
+    sched = CompiledSchedule([0, 0], [0], show_ms=30, rest_ms=0)
+    assert sched.slot_ms == 30.0
+    np.testing.assert_array_equal(sched.slot_pattern, [0, 0, 1])
+
+
+def test_durations_rounded_to_dt():
+    sched = CompiledSchedule([0], [0], show_ms=250.001, rest_ms=100, dt_ms=0.1)
+    assert sched.show_ms == 250.0
+    assert sched.slot_ms >= 0.1
+    with pytest.raises(ValueError):
+        CompiledSchedule([0], [0], show_ms=0.01, rest_ms=100, dt_ms=0.1)
+
+
+def test_scheduled_input_drives_rows_and_silence():
+    b2.prefs.codegen.target = 'numpy'
+    sched = CompiledSchedule([0, 1], [0, 1], show_ms=50, rest_ms=50)
+    table = np.zeros((3, 2))
+    table[0, 0] = 500.0  # digit 0 -> input 0 only
+    table[1, 1] = 500.0  # digit 1 -> input 1 only
+    group = create_scheduled_input_layer(table, sched.slot_pattern, sched.slot_ms * b2.ms)
+    mon = b2.SpikeMonitor(group)
+    b2.Network(group, mon).run(sched.duration_ms * b2.ms)
+    t = np.asarray(mon.t / b2.ms)
+    i = np.asarray(mon.i)
+    assert np.all(i[t < 50] == 0) and np.any(t < 50)
+    assert np.all(i[(t >= 100) & (t < 150)] == 1)
+    assert not np.any(((t >= 50) & (t < 100)) | (t >= 150))
+
+
+def test_spike_trains_follow_the_sequence():
+    schedule = CompiledSchedule([1, 0, 1], [0, 1], 10, 5, dt_ms=0.1)
+    indices, times = schedule.spike_trains(np.array([0, 0, 1]), np.array([3, 4, 7]), np.array([1.0, 2.0, 3.0]))
+    np.testing.assert_array_equal(indices, [7, 3, 4, 7])
+    np.testing.assert_allclose(times, [3.0, 16.0, 17.0, 33.0])
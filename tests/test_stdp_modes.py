@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import brian2 as b2
+
+from psinet.core.neuron import STDP_TRACE_EQUATION, BionicNeuron
+from psinet.core.synapse import BionicSynapse
+from psinet.network.hierarchy import Hierarchy
+
+
+def _run_pair(stdp_mode):
+    b2.prefs.codegen.target = 'numpy'
+    # Deterministic spikes: pre at 10/30 ms, post at 15/28 ms
+    stim = np.zeros((400, 2))
+    stim[100, 0] = stim[300, 0] = 1  # pre neuron (index 0)
+    stim[150, 1] = stim[280, 1] = 1  # post neuron (index 1)
+    ta = b2.TimedArray(stim, dt=0.1*b2.ms)
+    group = b2.NeuronGroup(2, 'v : 1' + STDP_TRACE_EQUATION, threshold='ta(t, i) > 0.5',
+                           reset='xtrace += 1', namespace={'ta': ta}, method='exact')
+    group.tau_stdp = 20*b2.ms
+    syn = BionicSynapse(group[0:1], group[1:2], w_max=1.0, A_pre=0.01, A_post=-0.012,
+                        stdp_mode=stdp_mode)
+    syn.synapses.w = 0.5
+    b2.Network(group, syn.synapses).run(40*b2.ms)
+    return float(syn.synapses.w[0])
+
+
+def test_event_and_neuron_modes_match_clock():
+    w_clock = _run_pair('clock')
+    assert w_clock != 0.5
+    assert _run_pair('event') == pytest.approx(w_clock, rel=1e-6)
+    assert _run_pair('neuron') == pytest.approx(w_clock, rel=1e-6)
+
+
+def test_neuron_mode_requires_traces():
+    b2.prefs.codegen.target = 'numpy'
+    inp = b2.PoissonGroup(3, rates=10*b2.Hz)
+    post = b2.NeuronGroup(2, 'v : 1' + STDP_TRACE_EQUATION, threshold='v > 1')
+    with pytest.raises(ValueError):
+        BionicSynapse(inp, post, stdp_mode='neuron')
+    with pytest.raises(ValueError):
+        BionicSynapse(post, post, stdp_mode='fast')
+
+
+def test_trace_taus_per_layer():
+    layers = [{'name': 'L1', 'stdp_mode': 'neuron'}, {'name': 'L2'}]
+    cp = {'inp_l1': {'stdp_mode': 'event'},
+          'l1_l2': {'stdp_mode': 'neuron', 'tau_plus_ms': 20.0, 'tau_minus_ms': 15.0}}
+    assert Hierarchy.stdp_trace_taus(layers, cp) == {'L1': 20.0, 'L2': 15.0}
+    cp['l1_l2']['tau_plus_ms'] = 10.0
+    with pytest.raises(ValueError):
+        Hierarchy.stdp_trace_taus(layers, cp)
+
+
+def test_frozen_mode_has_no_plasticity():
+    b2.prefs.codegen.target = 'numpy'
+    pre = b2.SpikeGeneratorGroup(2, [0, 1, 0], [1, 2, 8] * b2.ms)
+    post = BionicNeuron(2)
+    syn = BionicSynapse(pre, post, w_max=1.0, A_pre=0.5, A_post=-0.5, initial_weight_max=0.8, stdp_mode='frozen')
+    assert len(syn.synapses._pathways) == 1
+    w0 = np.array(syn.synapses.w[:])
+    b2.Network(pre, post.group, syn.synapses).run(20 * b2.ms)
+    np.testing.assert_array_equal(syn.synapses.w[:], w0)
@@ -0,0 +1,60 @@
+import numpy as np
+import brian2 as b2
+
+from psinet.io.encoders import image_to_poisson_rates
+from psinet.io.loaders import MnistStream
+
+
+def _dataset(n_per_class=10, digits=(0, 1, 2)):
+    labels = np.repeat(np.array(digits), n_per_class)
+    images = np.zeros((labels.size, 28, 28), dtype=np.uint8)
+    images[:, 0, 0] = np.arange(labels.size)  # image id in the first pixel
+    return images, labels
+
+
+def test_batch_rates_match_single_image():
+    images, _ = _dataset()
+    batch = image_to_poisson_rates(images[:4], max_rate=100*b2.Hz)
+    assert batch.shape == (4, 784)
+    for k in range(4):
+        np.testing.assert_allclose(batch[k] / b2.Hz, image_to_poisson_rates(images[k], max_rate=100*b2.Hz) / b2.Hz)
+
+
+def test_stream_chunks_cover_selection_once_per_epoch():
+    images, labels = _dataset()
+    stream = MnistStream(images, labels, num_images=14, chunk_size=4, digits=[0, 2], epochs=2, seed=1)
+    chunks = list(stream)
+    assert len(chunks) == len(stream) == 8
+    assert all(len(idx) <= 4 for idx, _, _ in chunks)
+    first = np.concatenate([idx for idx, _, _ in chunks[:4]])
+    second = np.concatenate([idx for idx, _, _ in chunks[4:]])
+    assert first.size == 14 and np.unique(first).size == 14
+    assert sorted(first) == sorted(second)
+    for idx, imgs, labs in chunks:
+        np.testing.assert_array_equal(imgs[:, 0, 0], idx)
+        assert set(labs) <= {0, 2}
+
+
+def test_balanced_stream_interleaves_classes():
+    images, labels = _dataset()
+    stream = MnistStream(images, labels, num_images=9, chunk_size=3, balance_classes=True, seed=0)
+    for _, _, labs in stream:
+        assert sorted(labs) == [0, 1, 2]
+
+
+def test_shards_partition_one_selection():
+    images, labels = _dataset()
+    shards = [MnistStream(images, labels, num_images=14, chunk_size=4, seed=1, shard=k, num_shards=3)
+              for k in range(3)]
+    parts = [shard.indices for shard in shards]
+    assert all(part.size == 4 for part in parts)  # 14 // 3, remainder dropped
+    assert np.unique(np.concatenate(parts)).size == 12
+    np.testing.assert_array_equal(np.concatenate(parts),
+                                  MnistStream(images, labels, num_images=14, seed=1).indices[:12])
+
+    balanced = [MnistStream(images, labels, chunk_size=3, balance_classes=True, seed=0, shard=k, num_shards=2)
+                for k in range(2)]
+    assert not set(balanced[0].indices) & set(balanced[1].indices)
+    for shard in balanced:
+        for _, _, labs in shard:
+            assert sorted(labs) == [0, 1, 2]
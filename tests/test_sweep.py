@@ -0,0 +1,39 @@
+import pytest
+
+from psinet.simulation.sweep import expand_sweep, set_by_path, sweep_configs
+
+BASE = {
+    'run_id': 'base',
+    'network_params': {'layers': [{'name': 'L1', 'lateral_strength': 0.2}]},
+    'connections_params': {'inp_l1': {'a_plus': 0.01}},
+    'output_params': {'base_output_dir': 'outputs'},
+}
+
+
+def test_set_by_path_handles_dicts_and_lists():
+    cfg = {'a': {'b': [{'c': 1}]}}
+    set_by_path(cfg, 'a.b.0.c', 5)
+    set_by_path(cfg, 'a.d', 'x')
+    assert cfg == {'a': {'b': [{'c': 5}], 'd': 'x'}}
+
+
+def test_grid_expansion_and_configs(tmp_path):
+    points = expand_sweep({'params': {'connections_params.inp_l1.a_plus': [0.01, 0.02],
+                                      'network_params.layers.0.lateral_strength': [0.1, 0.2, 0.3]}})
+    assert len(points) == 6
+    configs = sweep_configs(BASE, points, tmp_path)
+    assert [c['run_id'] for c in configs[:2]] == ['base_000', 'base_001']
+    assert configs[5]['connections_params']['inp_l1']['a_plus'] == 0.02
+    assert configs[5]['network_params']['layers'][0]['lateral_strength'] == 0.3
+    assert BASE['connections_params']['inp_l1']['a_plus'] == 0.01  # base untouched
+    assert configs[0]['output_params']['base_output_dir'] == str(tmp_path / 'runs')
+
+
+def test_random_expansion_is_seeded_and_in_range():
+    spec = {'mode': 'random', 'num_samples': 20, 'seed': 3,
+            'params': {'x': {'low': 1e-3, 'high': 1e-1, 'log': True}, 'y': ['a', 'b']}}
+    points = expand_sweep(spec)
+    assert points == expand_sweep(spec)
+    assert all(1e-3 <= p['x'] <= 1e-1 and p['y'] in ('a', 'b') for p in points)
+    with pytest.raises(ValueError):
+        expand_sweep({'mode': 'bayes', 'params': {'x': [1]}})